@@ -43,6 +43,10 @@ from ui_flows.dwt_emd_ui import draw_dwt_emd_embed_tab, draw_dwt_emd_extract_tab
 from ui_flows.fft_lsb_ui import draw_fft_lsb_embed_tab, draw_fft_lsb_extract_tab
 from ui_flows.fft_pvd_ui import draw_fft_pvd_embed_tab, draw_fft_pvd_extract_tab
 from ui_flows.fft_emd_ui import draw_fft_emd_embed_tab, draw_fft_emd_extract_tab # <--- DITAMBAHKAN
+from methods.spatial import kernels
+
+# Kompilasi kernel Numba (jika tersedia) sekali saat server mulai, bukan di request pertama
+kernels.warmup()
 
 
 # --- Session State Initialization ---
@@ -0,0 +1,121 @@
+import numpy as np
+import cv2
+from helpers.message_binary import message_to_bit_array
+
+
+def _per_image(value, count: int, name: str) -> list:
+    """
+    Expands a shared argument to one value per image.
+
+    A list means "one value per image"; anything else (str, int, tuple, None)
+    is shared by every image.
+    """
+    if isinstance(value, list):
+        if len(value) != count:
+            raise ValueError(f"Expected {count} values for '{name}', got {len(value)}.")
+        return value
+    return [value] * count
+
+
+def iter_stacks(images, values, name: str = "values", batch_size: int | None = None):
+    """
+    Groups images by (shape, dtype, value) and stacks each group.
+
+    Args:
+        images (sequence of np.ndarray): Images of shape (H, W, 3).
+        values (any | list): Message / bit length shared by all images, or a
+                             list with one entry per image.
+        name (str): Argument name used in error messages.
+        batch_size (int | None): Maximum number of images per stack.
+
+    Yields:
+        tuple: (indices (list[int]), stack (np.ndarray, (N, H, W, 3)), value)
+    """
+    images = list(images)
+    per_image = _per_image(values, len(images), name)
+
+    groups = {}
+    for index, (image, value) in enumerate(zip(images, per_image)):
+        key = (image.shape, image.dtype.str, value)
+        groups.setdefault(key, []).append(index)
+
+    for (_, _, value), indices in groups.items():
+        step = batch_size or len(indices)
+        for start in range(0, len(indices), step):
+            chunk = indices[start:start + step]
+            yield chunk, np.stack([images[i] for i in chunk]), value
+
+
+class BatchEmbeddingMixin:
+    """
+    Adds embed_many / extract_many on top of the stack kernels of a method.
+
+    A class using this mixin implements `_embed_stack(stack, message, plan)` and
+    `_extract_stack(stack, bit_length, plan)`, both working on (N, H, W, 3)
+    stacks. Same-shape covers are stacked so that colour conversion,
+    transforms and index setup run once per batch instead of once per image.
+    """
+
+    def embed_many(self, cover_images, secret_message, batch_size: int | None = None, plan=None):
+        """
+        Embeds into many cover images.
+
+        Args:
+            cover_images (sequence of np.ndarray): RGB covers (H, W, 3).
+            secret_message (str | list[str]): One message for all covers, or
+                                              one message per cover.
+            batch_size (int | None): Maximum number of covers stacked at once.
+            plan (EmbeddingPlan | None): Precompiled plan; all covers must then
+                                         have the shape it was compiled for.
+
+        Yields:
+            tuple: (index, stego_image, bit_length) per cover, as each
+                   same-shape batch finishes.
+        """
+        for indices, stack, message in iter_stacks(cover_images, secret_message, "secret_message", batch_size):
+            stego_stack, bit_length = self._embed_stack(stack, message, plan)
+            for position, index in enumerate(indices):
+                yield index, stego_stack[position], bit_length
+
+    def extract_many(self, stego_images, bit_length, batch_size: int | None = None, plan=None):
+        """
+        Extracts from many stego images.
+
+        Args:
+            stego_images (sequence of np.ndarray): RGB stego images (H, W, 3).
+            bit_length (any | list): The bit length argument of `extract`,
+                                     shared or given per image as a list.
+            batch_size (int | None): Maximum number of images stacked at once.
+            plan (EmbeddingPlan | None): Precompiled plan for the image shape.
+
+        Yields:
+            tuple: (index, message) per image, as each batch finishes.
+        """
+        for indices, stack, length in iter_stacks(stego_images, bit_length, "bit_length", batch_size):
+            messages = self._extract_stack(stack, length, plan)
+            for index, message in zip(indices, messages):
+                yield index, message
+
+    def extract_bits(self, stego_image: np.ndarray, bit_length, plan=None) -> np.ndarray:
+        """
+        Reads the message bits of one stego image as a uint8 0/1 array,
+        without decoding them to text (for BER). Methods with a bit-level
+        kernel (`_extract_bits_stack`) return the first `bit_length` raw bits,
+        possibly fewer if the capacity is short; others re-encode the text
+        returned by `extract`.
+        """
+        if hasattr(self, '_extract_bits_stack'):
+            return np.asarray(self._extract_bits_stack(stego_image[None], bit_length, plan)[0], dtype=np.uint8)
+        return message_to_bit_array(self.extract(stego_image, bit_length, plan) or "")
+
+
+def stack_cvt_color(stack: np.ndarray, code: int) -> np.ndarray:
+    """
+    Applies cv2.cvtColor to a (N, H, W, 3) stack in a single call.
+
+    The stack is viewed as one tall (N*H, W, 3) image, which is valid because
+    colour conversions are per-pixel.
+    """
+    n, h, w, c = stack.shape
+    converted = cv2.cvtColor(np.ascontiguousarray(stack).reshape(n * h, w, c), code)
+    return converted.reshape(n, h, w, -1)
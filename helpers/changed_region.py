@@ -0,0 +1,59 @@
+import numpy as np
+
+
+class ChangedRegion:
+    """
+    Rows of an image that an embed may have changed, as sorted, disjoint
+    [r0, r1) ranges. Every pixel outside these rows is identical to the
+    cover, so metrics only need to look at (and around) them.
+
+    Spatial methods set `last_changed_region` after `embed` (see
+    LSBSteganography, EMDSteganography, PVDSteganography).
+    """
+    def __init__(self, row_ranges: list, height: int):
+        self.row_ranges = [(int(r0), int(r1)) for r0, r1 in row_ranges if r1 > r0]
+        self.height = int(height)
+
+    @classmethod
+    def from_rows(cls, rows: np.ndarray, height: int) -> "ChangedRegion":
+        """Region covering the given row indices (any order, duplicates allowed), merged into runs."""
+        rows = np.unique(np.asarray(rows, dtype=np.int64))
+        if rows.size == 0:
+            return cls([], height)
+        breaks = np.flatnonzero(np.diff(rows) > 1)
+        starts = np.concatenate(([rows[0]], rows[breaks + 1]))
+        stops = np.concatenate((rows[breaks], [rows[-1]])) + 1
+        return cls(zip(starts.tolist(), stops.tolist()), height)
+
+    @classmethod
+    def full(cls, height: int) -> "ChangedRegion":
+        return cls([(0, height)], height)
+
+    @property
+    def row_count(self) -> int:
+        return sum(r1 - r0 for r0, r1 in self.row_ranges)
+
+    def dilated(self, margin: int, lo: int = 0, hi: int | None = None) -> list:
+        """Row ranges grown by `margin` on each side, clipped to [lo, hi) and merged."""
+        hi = self.height if hi is None else hi
+        merged = []
+        for r0, r1 in self.row_ranges:
+            r0, r1 = max(lo, r0 - margin), min(hi, r1 + margin)
+            if r1 <= r0:
+                continue
+            if merged and r0 <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], r1))
+            else:
+                merged.append((r0, r1))
+        return merged
+
+    def downsampled(self, factor: int, height: int) -> "ChangedRegion":
+        """Conservative region of an f x f mean-filtered and decimated image with `height` rows."""
+        if factor <= 1:
+            return self
+        scaled = ChangedRegion([(max(0, (r0 - factor) // factor), min(height, (r1 + factor) // factor + 1))
+                                for r0, r1 in self.row_ranges], height)
+        return ChangedRegion(scaled.dilated(0), height)
+
+    def __repr__(self) -> str:
+        return f"ChangedRegion({self.row_ranges}, height={self.height})"
@@ -0,0 +1,98 @@
+import numpy as np
+
+# Runtime state that does not change the layout a plan encodes
+_RUNTIME_ATTRIBUTES = {'workers', 'last_changed_region'}
+
+
+def _freeze_value(value):
+    """Hashable form of an attribute value (nested dicts, lists, arrays and method instances)."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze_value(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze_value(v) for v in value)
+    if isinstance(value, np.ndarray):
+        return value.shape, value.dtype.str, value.tobytes()
+    if hasattr(value, '__dict__'):
+        return type(value).__name__, method_params(value)
+    return value
+
+
+def method_params(method) -> tuple:
+    """
+    Frozen public attributes of a method instance, i.e. its constructor
+    parameters after normalization (sub-methods of a hybrid included).
+    Instances created from the same parameters give the same key.
+    """
+    return tuple(sorted((name, _freeze_value(value)) for name, value in vars(method).items()
+                        if not name.startswith('_') and name not in _RUNTIME_ATTRIBUTES))
+
+
+class EmbeddingPlan:
+    """
+    Content-independent index work of one method for one image shape.
+
+    A plan only holds positions (which pixels, pairs, groups, blocks or
+    coefficients carry which bit), never pixel values, so the same plan can be
+    reused for every image of that shape and parameter set. Index arrays are
+    stored as read-only int32 so a cached plan can be shared safely. The plan
+    records the parameters of the instance that compiled it (method_params)
+    and rejects instances with other parameters.
+    """
+    def __init__(self, owner, shape, max_bits: int, arrays: dict | None = None, parts: tuple = (),
+                 meta: dict | None = None):
+        """
+        Args:
+            owner (object | str): Method instance (or class name) the plan belongs to.
+            shape (tuple): Image shape (H, W, 3) the plan was compiled for.
+            max_bits (int): Largest message (in bits) the plan covers.
+            arrays (dict | None): name -> index array.
+            parts (tuple): Sub-plans, used by the hybrid methods.
+            meta (dict | None): Scalar facts about the layout (e.g. number of
+                                available positions).
+        """
+        self.owner = owner if isinstance(owner, str) else type(owner).__name__
+        self.params = None if isinstance(owner, str) else method_params(owner)
+        self.shape = tuple(int(s) for s in shape)
+        self.max_bits = int(max_bits)
+        self.arrays = {}
+        for name, values in (arrays or {}).items():
+            values = np.ascontiguousarray(values, dtype=np.int32)
+            values.flags.writeable = False
+            self.arrays[name] = values
+        self.parts = tuple(parts)
+        self.meta = dict(meta or {})
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self.arrays.values()) + sum(p.nbytes for p in self.parts)
+
+    def check(self, owner, shape):
+        """Raises ValueError if the plan does not belong to `owner` (class and parameters) / `shape`."""
+        owner_name = owner if isinstance(owner, str) else type(owner).__name__
+        if owner_name != self.owner:
+            raise ValueError(f"Plan was compiled for {self.owner}, not {owner_name}.")
+        if self.params is not None and not isinstance(owner, str) and method_params(owner) != self.params:
+            raise ValueError(f"Plan was compiled for a {self.owner} with other parameters.")
+        if tuple(shape) != self.shape:
+            raise ValueError(f"Plan was compiled for shape {self.shape}, got {tuple(shape)}.")
+
+    def take(self, name: str, count: int) -> np.ndarray:
+        """The first `count` entries of index array `name`."""
+        values = self.arrays[name]
+        if count > len(values):
+            raise ValueError(
+                f"Plan covers only {len(values)} entries of '{name}', {count} needed. "
+                f"Compile it with a larger max_bits."
+            )
+        return values[:count]
+
+    def __repr__(self):
+        return f"EmbeddingPlan({self.owner}, shape={self.shape}, max_bits={self.max_bits}, nbytes={self.nbytes})"
+
+
+def plan_parts(plan, owner, shape) -> tuple:
+    """Sub-plans of a hybrid plan, or (None, None) when no plan is given."""
+    if plan is None:
+        return None, None
+    plan.check(owner, shape)
+    return plan.parts
@@ -0,0 +1,388 @@
+import re
+import struct
+
+import numpy as np
+
+# ZIGZAG[k] = natural (row * 8 + col) index of the k-th coefficient in zigzag order
+ZIGZAG = np.array([
+     0,  1,  8, 16,  9,  2,  3, 10, 17, 24, 32, 25, 18, 11,  4,  5,
+    12, 19, 26, 33, 40, 48, 41, 34, 27, 20, 13,  6,  7, 14, 21, 28,
+    35, 42, 49, 56, 57, 50, 43, 36, 29, 22, 15, 23, 30, 37, 44, 51,
+    58, 59, 52, 45, 38, 31, 39, 46, 53, 60, 61, 54, 47, 55, 62, 63,
+])
+
+# Standard Huffman tables (ITU-T T.81 Annex K.3): (code counts per length 1..16, symbols)
+STD_DC_LUMINANCE = ([0, 1, 5, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0, 0, 0], list(range(12)))
+STD_DC_CHROMINANCE = ([0, 3, 1, 1, 1, 1, 1, 1, 1, 1, 1, 0, 0, 0, 0, 0], list(range(12)))
+STD_AC_LUMINANCE = ([0, 2, 1, 3, 3, 2, 4, 3, 5, 5, 4, 4, 0, 0, 1, 0x7d], [
+    0x01, 0x02, 0x03, 0x00, 0x04, 0x11, 0x05, 0x12, 0x21, 0x31, 0x41, 0x06, 0x13, 0x51, 0x61, 0x07,
+    0x22, 0x71, 0x14, 0x32, 0x81, 0x91, 0xa1, 0x08, 0x23, 0x42, 0xb1, 0xc1, 0x15, 0x52, 0xd1, 0xf0,
+    0x24, 0x33, 0x62, 0x72, 0x82, 0x09, 0x0a, 0x16, 0x17, 0x18, 0x19, 0x1a, 0x25, 0x26, 0x27, 0x28,
+    0x29, 0x2a, 0x34, 0x35, 0x36, 0x37, 0x38, 0x39, 0x3a, 0x43, 0x44, 0x45, 0x46, 0x47, 0x48, 0x49,
+    0x4a, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59, 0x5a, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68, 0x69,
+    0x6a, 0x73, 0x74, 0x75, 0x76, 0x77, 0x78, 0x79, 0x7a, 0x83, 0x84, 0x85, 0x86, 0x87, 0x88, 0x89,
+    0x8a, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97, 0x98, 0x99, 0x9a, 0xa2, 0xa3, 0xa4, 0xa5, 0xa6, 0xa7,
+    0xa8, 0xa9, 0xaa, 0xb2, 0xb3, 0xb4, 0xb5, 0xb6, 0xb7, 0xb8, 0xb9, 0xba, 0xc2, 0xc3, 0xc4, 0xc5,
+    0xc6, 0xc7, 0xc8, 0xc9, 0xca, 0xd2, 0xd3, 0xd4, 0xd5, 0xd6, 0xd7, 0xd8, 0xd9, 0xda, 0xe1, 0xe2,
+    0xe3, 0xe4, 0xe5, 0xe6, 0xe7, 0xe8, 0xe9, 0xea, 0xf1, 0xf2, 0xf3, 0xf4, 0xf5, 0xf6, 0xf7, 0xf8,
+    0xf9, 0xfa,
+])
+STD_AC_CHROMINANCE = ([0, 2, 1, 2, 4, 4, 3, 4, 7, 5, 4, 4, 0, 1, 2, 0x77], [
+    0x00, 0x01, 0x02, 0x03, 0x11, 0x04, 0x05, 0x21, 0x31, 0x06, 0x12, 0x41, 0x51, 0x07, 0x61, 0x71,
+    0x13, 0x22, 0x32, 0x81, 0x08, 0x14, 0x42, 0x91, 0xa1, 0xb1, 0xc1, 0x09, 0x23, 0x33, 0x52, 0xf0,
+    0x15, 0x62, 0x72, 0xd1, 0x0a, 0x16, 0x24, 0x34, 0xe1, 0x25, 0xf1, 0x17, 0x18, 0x19, 0x1a, 0x26,
+    0x27, 0x28, 0x29, 0x2a, 0x35, 0x36, 0x37, 0x38, 0x39, 0x3a, 0x43, 0x44, 0x45, 0x46, 0x47, 0x48,
+    0x49, 0x4a, 0x53, 0x54, 0x55, 0x56, 0x57, 0x58, 0x59, 0x5a, 0x63, 0x64, 0x65, 0x66, 0x67, 0x68,
+    0x69, 0x6a, 0x73, 0x74, 0x75, 0x76, 0x77, 0x78, 0x79, 0x7a, 0x82, 0x83, 0x84, 0x85, 0x86, 0x87,
+    0x88, 0x89, 0x8a, 0x92, 0x93, 0x94, 0x95, 0x96, 0x97, 0x98, 0x99, 0x9a, 0xa2, 0xa3, 0xa4, 0xa5,
+    0xa6, 0xa7, 0xa8, 0xa9, 0xaa, 0xb2, 0xb3, 0xb4, 0xb5, 0xb6, 0xb7, 0xb8, 0xb9, 0xba, 0xc2, 0xc3,
+    0xc4, 0xc5, 0xc6, 0xc7, 0xc8, 0xc9, 0xca, 0xd2, 0xd3, 0xd4, 0xd5, 0xd6, 0xd7, 0xd8, 0xd9, 0xda,
+    0xe2, 0xe3, 0xe4, 0xe5, 0xe6, 0xe7, 0xe8, 0xe9, 0xea, 0xf2, 0xf3, 0xf4, 0xf5, 0xf6, 0xf7, 0xf8,
+    0xf9, 0xfa,
+])
+
+# Largest magnitudes a baseline (8-bit) JPEG can entropy-code
+DC_LIMIT = 2047
+AC_LIMIT = 1023
+
+_SOF_BASELINE = (0xC0, 0xC1)
+_SOF_UNSUPPORTED = (0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF)
+_RST_SPLIT = re.compile(rb'\xff[\xd0-\xd7]')
+
+
+def _ceil_div(a: int, b: int) -> int:
+    return -(-a // b)
+
+
+def _canonical_codes(counts, symbols) -> dict:
+    """symbol -> (code, length) of a canonical Huffman table."""
+    codes, code, k = {}, 0, 0
+    for length, count in enumerate(counts, start=1):
+        for _ in range(count):
+            codes[symbols[k]] = (code, length)
+            code += 1
+            k += 1
+        code <<= 1
+    return codes
+
+
+def _decode_lut(counts, symbols) -> tuple:
+    """16-bit lookup tables (symbol, code length) indexed by the next 16 bits of the stream."""
+    lut_symbol = np.zeros(1 << 16, dtype=np.int32)
+    lut_length = np.zeros(1 << 16, dtype=np.int32)
+    for symbol, (code, length) in _canonical_codes(counts, symbols).items():
+        start = code << (16 - length)
+        stop = (code + 1) << (16 - length)
+        lut_symbol[start:stop] = symbol
+        lut_length[start:stop] = length
+    return lut_symbol.tolist(), lut_length.tolist()
+
+
+class JpegComponent:
+    """One colour component of a baseline JPEG and its quantized DCT coefficients."""
+    def __init__(self, component_id: int, h: int, v: int, tq: int):
+        self.id = component_id
+        self.h = h
+        self.v = v
+        self.tq = tq
+        self.blocks_y = 0
+        self.blocks_x = 0
+        self.coefs = None  # (padded_by, padded_bx, 8, 8) int32, natural order
+
+    @property
+    def blocks(self) -> np.ndarray:
+        """Coefficients of the visible blocks as a (blocks_y, blocks_x, 8, 8) view."""
+        return self.coefs[:self.blocks_y, :self.blocks_x]
+
+
+class JpegCoefficients:
+    """
+    Quantized DCT coefficients of a baseline JPEG plus everything needed to
+    write it back (quantization tables and APPn / COM segments are kept as is).
+    """
+    def __init__(self):
+        self.width = 0
+        self.height = 0
+        self.components = []
+        self.quant_tables = {}
+        self.segments = []  # raw (marker, payload) of APPn / COM / DQT, in file order
+
+    def _mcu_grid(self) -> tuple:
+        hmax = max(c.h for c in self.components)
+        vmax = max(c.v for c in self.components)
+        return hmax, vmax, _ceil_div(self.width, 8 * hmax), _ceil_div(self.height, 8 * vmax)
+
+
+class _BitReader:
+    """MSB-first reader over one unstuffed restart interval."""
+    def __init__(self, data: bytes):
+        self.data = data + b'\xff\xff\xff'
+        self.pos = 0
+
+    def peek16(self) -> int:
+        data, byte = self.data, self.pos >> 3
+        chunk = (data[byte] << 16) | (data[byte + 1] << 8) | data[byte + 2]
+        return (chunk >> (8 - (self.pos & 7))) & 0xFFFF
+
+    def decode(self, lut) -> int:
+        window = self.peek16()
+        length = lut[1][window]
+        if length == 0:
+            raise ValueError("Corrupt JPEG: invalid Huffman code.")
+        self.pos += length
+        return lut[0][window]
+
+    def receive_extend(self, size: int) -> int:
+        if size == 0:
+            return 0
+        value = self.peek16() >> (16 - size)
+        self.pos += size
+        return value - (1 << size) + 1 if value < (1 << (size - 1)) else value
+
+
+class _BitWriter:
+    def __init__(self):
+        self.out = bytearray()
+        self.acc = 0
+        self.nbits = 0
+
+    def write(self, value: int, length: int):
+        self.acc = (self.acc << length) | value
+        self.nbits += length
+        while self.nbits >= 8:
+            self.nbits -= 8
+            self.out.append((self.acc >> self.nbits) & 0xFF)
+        self.acc &= (1 << self.nbits) - 1
+
+    def flush(self) -> bytes:
+        if self.nbits:
+            self.write((1 << (8 - self.nbits)) - 1, 8 - self.nbits)
+        return bytes(self.out).replace(b'\xff', b'\xff\x00')
+
+
+def _scan_blocks(jpeg: JpegCoefficients, scan_components: list):
+    """Yields (component, block_row, block_col) in scan order, one list per MCU."""
+    if len(scan_components) == 1:
+        comp = scan_components[0]
+        for by in range(comp.blocks_y):
+            for bx in range(comp.blocks_x):
+                yield [(comp, by, bx)]
+        return
+    _, _, mcus_x, mcus_y = jpeg._mcu_grid()
+    for my in range(mcus_y):
+        for mx in range(mcus_x):
+            yield [(comp, my * comp.v + y, mx * comp.h + x)
+                   for comp in scan_components for y in range(comp.v) for x in range(comp.h)]
+
+
+def _decode_scan(jpeg, scan_components, tables, data: bytes, restart_interval: int):
+    zigzag = ZIGZAG.tolist()
+    intervals = _RST_SPLIT.split(data)
+    mcus = _scan_blocks(jpeg, [c for c, _, _ in scan_components])
+    luts = {c.id: (tables[(0, td)], tables[(1, ta)]) for c, td, ta in scan_components}
+
+    for interval in intervals:
+        reader = _BitReader(interval.replace(b'\xff\x00', b'\xff'))
+        predictors = {c.id: 0 for c, _, _ in scan_components}
+        count = 0
+        for mcu in mcus:
+            for comp, by, bx in mcu:
+                dc_lut, ac_lut = luts[comp.id]
+                block = comp.coefs[by, bx].reshape(64)
+                predictors[comp.id] += reader.receive_extend(reader.decode(dc_lut))
+                block[0] = predictors[comp.id]
+                k = 1
+                while k < 64:
+                    rs = reader.decode(ac_lut)
+                    run, size = rs >> 4, rs & 15
+                    if size == 0:
+                        if run != 15:
+                            break
+                        k += 16
+                        continue
+                    k += run
+                    if k > 63:
+                        raise ValueError("Corrupt JPEG: AC run past end of block.")
+                    block[zigzag[k]] = reader.receive_extend(size)
+                    k += 1
+            count += 1
+            if restart_interval and count == restart_interval:
+                break
+
+
+def read_jpeg(source) -> JpegCoefficients:
+    """
+    Reads the quantized DCT coefficients of a baseline (SOF0 / SOF1, Huffman)
+    JPEG without an inverse DCT or colour conversion.
+
+    Args:
+        source (str | bytes): File path or the JPEG bytes.
+    """
+    data = source if isinstance(source, (bytes, bytearray)) else open(source, 'rb').read()
+    data = bytes(data)
+    if data[:2] != b'\xff\xd8':
+        raise ValueError("Not a JPEG file (missing SOI marker).")
+
+    jpeg = JpegCoefficients()
+    tables, restart_interval, frame_seen = {}, 0, False
+    pos = 2
+    while pos < len(data):
+        if data[pos] != 0xFF:
+            raise ValueError(f"Corrupt JPEG: expected a marker at byte {pos}.")
+        while data[pos] == 0xFF:
+            pos += 1
+        marker = data[pos]
+        pos += 1
+        if marker == 0xD9:  # EOI
+            break
+        if 0xD0 <= marker <= 0xD7 or marker == 0x01:
+            continue
+        length = struct.unpack('>H', data[pos:pos + 2])[0]
+        payload = data[pos + 2:pos + length]
+        pos += length
+
+        if marker in _SOF_UNSUPPORTED:
+            raise ValueError("Only baseline Huffman JPEG is supported (progressive / lossless / arithmetic found).")
+        if marker in _SOF_BASELINE:
+            precision, jpeg.height, jpeg.width, count = struct.unpack('>BHHB', payload[:6])
+            if precision != 8:
+                raise ValueError("Only 8-bit JPEG is supported.")
+            for i in range(count):
+                cid, hv, tq = payload[6 + 3 * i:9 + 3 * i]
+                jpeg.components.append(JpegComponent(cid, hv >> 4, hv & 15, tq))
+            hmax, vmax, mcus_x, mcus_y = jpeg._mcu_grid()
+            for comp in jpeg.components:
+                comp.blocks_x = _ceil_div(_ceil_div(jpeg.width * comp.h, hmax), 8)
+                comp.blocks_y = _ceil_div(_ceil_div(jpeg.height * comp.v, vmax), 8)
+                comp.coefs = np.zeros((mcus_y * comp.v, mcus_x * comp.h, 8, 8), dtype=np.int32)
+            frame_seen = True
+        elif marker == 0xC4:  # DHT
+            offset = 0
+            while offset < len(payload):
+                tc, th = payload[offset] >> 4, payload[offset] & 15
+                counts = list(payload[offset + 1:offset + 17])
+                symbols = list(payload[offset + 17:offset + 17 + sum(counts)])
+                tables[(tc, th)] = _decode_lut(counts, symbols)
+                offset += 17 + sum(counts)
+        elif marker == 0xDB:  # DQT
+            jpeg.segments.append((marker, payload))
+            offset = 0
+            while offset < len(payload):
+                pq, tq = payload[offset] >> 4, payload[offset] & 15
+                size = 128 if pq else 64
+                values = np.frombuffer(payload[offset + 1:offset + 1 + size], dtype='>u2' if pq else np.uint8)
+                table = np.zeros(64, dtype=np.int32)
+                table[ZIGZAG] = values
+                jpeg.quant_tables[tq] = table.reshape(8, 8)
+                offset += 1 + size
+        elif marker == 0xDD:  # DRI
+            restart_interval = struct.unpack('>H', payload[:2])[0]
+        elif marker == 0xDA:  # SOS
+            if not frame_seen:
+                raise ValueError("Corrupt JPEG: scan before frame header.")
+            by_id = {c.id: c for c in jpeg.components}
+            scan_components = [(by_id[payload[1 + 2 * i]], payload[2 + 2 * i] >> 4, payload[2 + 2 * i] & 15)
+                               for i in range(payload[0])]
+            end = pos
+            while True:
+                end = data.index(b'\xff', end)
+                if data[end + 1] != 0x00 and not 0xD0 <= data[end + 1] <= 0xD7:
+                    break
+                end += 2
+            _decode_scan(jpeg, scan_components, tables, data[pos:end], restart_interval)
+            pos = end
+        elif 0xE0 <= marker <= 0xEF or marker == 0xFE:  # APPn / COM
+            jpeg.segments.append((marker, payload))
+
+    if not frame_seen:
+        raise ValueError("Corrupt JPEG: no frame header found.")
+    return jpeg
+
+
+def _segment(marker: int, payload: bytes) -> bytes:
+    return bytes((0xFF, marker)) + struct.pack('>H', len(payload) + 2) + payload
+
+
+def _encode_scan(jpeg, scan_components, codes) -> bytes:
+    writer = _BitWriter()
+    rows = {c.id: c.coefs.reshape(-1, 64)[:, ZIGZAG].tolist() for c in scan_components}
+    predictors = {c.id: 0 for c in scan_components}
+
+    for mcu in _scan_blocks(jpeg, scan_components):
+        for comp, by, bx in mcu:
+            dc_codes, ac_codes = codes[comp.id]
+            block = rows[comp.id][by * comp.coefs.shape[1] + bx]
+            diff = block[0] - predictors[comp.id]
+            predictors[comp.id] = block[0]
+            size = abs(diff).bit_length()
+            writer.write(*dc_codes[size])
+            if size:
+                writer.write(diff if diff > 0 else diff + (1 << size) - 1, size)
+            run = 0
+            for k in range(1, 64):
+                value = block[k]
+                if value == 0:
+                    run += 1
+                    continue
+                while run > 15:
+                    writer.write(*ac_codes[0xF0])
+                    run -= 16
+                size = abs(value).bit_length()
+                writer.write(*ac_codes[(run << 4) | size])
+                writer.write(value if value > 0 else value + (1 << size) - 1, size)
+                run = 0
+            if run:
+                writer.write(*ac_codes[0x00])
+    return writer.flush()
+
+
+def write_jpeg(jpeg: JpegCoefficients, path: str | None = None) -> bytes:
+    """
+    Entropy-codes the coefficients back into a baseline JPEG using the
+    standard Annex K Huffman tables (which cover every baseline symbol).
+    Quantization tables and APPn / COM segments are copied unchanged.
+
+    Returns:
+        bytes: The JPEG file contents (also written to `path` if given).
+    """
+    for comp in jpeg.components:
+        limits = np.abs(comp.coefs.reshape(-1, 64))
+        if limits[:, 0].max(initial=0) > DC_LIMIT or limits[:, 1:].max(initial=0) > AC_LIMIT:
+            raise ValueError("Coefficient out of baseline JPEG range.")
+
+    out = bytearray(b'\xff\xd8')
+    for marker, payload in jpeg.segments:
+        out += _segment(marker, payload)
+
+    frame = struct.pack('>BHHB', 8, jpeg.height, jpeg.width, len(jpeg.components))
+    for comp in jpeg.components:
+        frame += bytes((comp.id, (comp.h << 4) | comp.v, comp.tq))
+    out += _segment(0xC0, frame)
+
+    # Table 0 for the first (luma) component, table 1 for the chroma components
+    std = {0: (STD_DC_LUMINANCE, STD_AC_LUMINANCE), 1: (STD_DC_CHROMINANCE, STD_AC_CHROMINANCE)}
+    selectors = {comp.id: 0 if i == 0 else 1 for i, comp in enumerate(jpeg.components)}
+    dht = b''
+    for table_id in sorted(set(selectors.values())):
+        for table_class, (counts, symbols) in enumerate(std[table_id]):
+            dht += bytes(((table_class << 4) | table_id,)) + bytes(counts) + bytes(symbols)
+    out += _segment(0xC4, dht)
+
+    codes = {cid: tuple(_canonical_codes(*table) for table in std[t]) for cid, t in selectors.items()}
+    components = jpeg.components
+    if len(components) == 1 or sum(c.h * c.v for c in components) > 10:
+        scans = [[comp] for comp in components]
+    else:
+        scans = [components]
+    for scan in scans:
+        header = bytes((len(scan),))
+        for comp in scan:
+            header += bytes((comp.id, (selectors[comp.id] << 4) | selectors[comp.id]))
+        out += _segment(0xDA, header + bytes((0, 63, 0)))
+        out += _encode_scan(jpeg, scan, codes)
+
+    out += b'\xff\xd9'
+    if path is not None:
+        with open(path, 'wb') as f:
+            f.write(out)
+    return bytes(out)
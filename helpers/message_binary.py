@@ -1,3 +1,5 @@
+import numpy as np
+
 def message_to_binary(message: str) -> str:
     """
     Converts a UTF-8 string into a continuous binary string.
@@ -44,4 +46,38 @@ def binary_to_message(binary_str: str) -> str:
         print("Error: Could not decode binary string with standard UTF-8. Replacing invalid characters.")
         message = byte_data.decode('utf-8', errors='replace')
 
-    return message
\ No newline at end of file
+    return message
+
+def message_to_bit_array(message: str) -> np.ndarray:
+    """
+    Converts a UTF-8 string into a uint8 array of bits (MSB first).
+
+    Equivalent to message_to_binary() but without the intermediate string,
+    so it can feed vectorized embedding kernels directly.
+
+    Args:
+        message: The input string.
+
+    Returns:
+        A 1-D np.uint8 array of 0/1 values.
+    """
+    encoded = np.frombuffer(message.encode('utf-8'), dtype=np.uint8)
+    return np.unpackbits(encoded)
+
+def bit_array_to_message(bits: np.ndarray) -> str:
+    """
+    Converts an array of 0/1 values back into a UTF-8 string.
+
+    Args:
+        bits: A 1-D array of 0/1 values.
+
+    Returns:
+        The decoded string (same rules as binary_to_message()).
+    """
+    bits = np.asarray(bits, dtype=np.uint8).ravel()
+    return binary_to_message(bits_to_binary_string(bits))
+
+def bits_to_binary_string(bits: np.ndarray) -> str:
+    """Renders an array of 0/1 values as a string of '0's and '1's."""
+    bits = np.asarray(bits, dtype=np.uint8).ravel()
+    return (bits + ord('0')).tobytes().decode('ascii')
@@ -0,0 +1,120 @@
+import numpy as np
+
+_WHITESPACE = {'\t', '\n', '\r'}
+_SENTENCE_PUNCTUATION = set(".,'-:;?")
+
+
+def bits_to_bytes(bits: np.ndarray) -> bytes:
+    """Packs a 0/1 array (MSB first) into bytes, dropping an incomplete last byte."""
+    bits = np.asarray(bits, dtype=np.uint8)
+    return np.packbits(bits[:len(bits) - len(bits) % 8]).tobytes()
+
+
+def decode_text(bits: np.ndarray) -> tuple:
+    """
+    Decodes bits as UTF-8 without printing warnings.
+
+    Returns:
+        tuple: (text (str), valid (bool)); invalid sequences are replaced.
+    """
+    data = bits_to_bytes(bits)
+    try:
+        return data.decode('utf-8'), True
+    except UnicodeDecodeError:
+        return data.decode('utf-8', errors='replace'), False
+
+
+def byte_plausibility(byte_rows: np.ndarray) -> np.ndarray:
+    """
+    Cheap vectorized pre-score of (K, n) uint8 byte rows: printable ASCII and
+    common whitespace count 1, bytes >= 0x80 (possible UTF-8) count 0.5 and
+    control bytes count 0.
+
+    Returns:
+        np.ndarray: (K,) scores in [0, 1].
+    """
+    b = np.asarray(byte_rows, dtype=np.uint8)
+    if b.shape[-1] == 0:
+        return np.zeros(b.shape[:-1])
+    printable = ((b >= 0x20) & (b < 0x7F)) | (b == 0x09) | (b == 0x0A) | (b == 0x0D)
+    return (printable + 0.5 * (b >= 0x80)).mean(axis=-1)
+
+
+def text_plausibility(bits: np.ndarray) -> float:
+    """
+    How much the bits look like a real text message, in [0, 1].
+
+    Valid UTF-8 scores the fraction of printable characters; invalid UTF-8
+    is capped at half of its byte-level score, so any valid decode with
+    mostly printable text ranks above it.
+    """
+    text, valid = decode_text(bits)
+    if not text:
+        return 0.0
+    if not valid:
+        return 0.5 * float(byte_plausibility(np.frombuffer(bits_to_bytes(bits), dtype=np.uint8)[None])[0])
+    return sum(ch.isprintable() or ch in _WHITESPACE for ch in text) / len(text)
+
+
+def score_bit_rows(bit_rows: np.ndarray) -> np.ndarray:
+    """text_plausibility for every row of a (K, bits) array of candidates."""
+    return np.array([text_plausibility(row) for row in np.asarray(bit_rows)], dtype=np.float64)
+
+
+def plausible_prefix(bits: np.ndarray) -> str:
+    """
+    Longest leading run of printable text in the bits: decoding stops at the
+    first invalid UTF-8 sequence or control character. Useful when the
+    message length is unknown and the bits run past the end of the message.
+    """
+    data = bits_to_bytes(bits)
+    try:
+        text = data.decode('utf-8')
+    except UnicodeDecodeError as error:
+        text = data[:error.start].decode('utf-8')
+    for index, ch in enumerate(text):
+        if not (ch.isprintable() or ch in _WHITESPACE):
+            return text[:index]
+    return text
+
+
+def _latin_alnum(ch: str) -> bool:
+    """Letter or digit from ASCII, Latin-1 or Latin Extended-A (U+0000-U+017F)."""
+    return ch.isalnum() and ord(ch) < 0x180
+
+
+def clean_text_ratio(text: str) -> float:
+    """
+    Fraction of characters that are Latin letters, digits, whitespace or
+    common sentence punctuation. Unlike text_plausibility it tells a message
+    apart from a near miss with a few flipped bits ('jumps' vs 'jUm0s!'),
+    which is still printable; it does not grow with the text length. Letters
+    of other scripts (e.g. Hangul from random multi-byte junk) do not count.
+    """
+    if not text:
+        return 0.0
+    return sum(_latin_alnum(ch) or ch.isspace() or ch in _SENTENCE_PUNCTUATION for ch in text) / len(text)
+
+
+def foreign_char_count(text: str) -> int:
+    """
+    Number of characters that are neither printable ASCII, a newline nor a
+    Latin letter or digit: control characters and letters of other scripts,
+    which random bytes past the end of a message tend to decode as.
+    """
+    return sum(not (_latin_alnum(ch) or ch == '\n' or (ch.isascii() and ch.isprintable())) for ch in text)
+
+
+def strip_foreign_tail(text: str) -> str:
+    """
+    Drops trailing letters of non-Latin scripts from otherwise Latin text:
+    random bytes after the end of a message often decode as one CJK or
+    Hangul character. Text that already uses such letters is left alone.
+    """
+    end = len(text)
+    while end and text[end - 1].isalpha() and not _latin_alnum(text[end - 1]):
+        end -= 1
+    head = text[:end]
+    if end == len(text) or any(ch.isalpha() and not _latin_alnum(ch) for ch in head):
+        return text
+    return head
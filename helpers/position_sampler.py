@@ -0,0 +1,133 @@
+import numpy as np
+
+_MASK64 = (1 << 64) - 1
+
+
+def _splitmix64(state: int) -> tuple:
+    """
+    One step of the SplitMix64 generator on plain Python integers.
+
+    Returns:
+        tuple: (next_state, output) both as 64-bit integers.
+    """
+    state = (state + 0x9E3779B97F4A7C15) & _MASK64
+    z = state
+    z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return state, z ^ (z >> 31)
+
+
+def _mix64(values: np.ndarray) -> np.ndarray:
+    """SplitMix64 finalizer applied element-wise to a uint64 array (wraps mod 2^64)."""
+    z = values.copy()
+    z ^= z >> np.uint64(30)
+    z *= np.uint64(0xBF58476D1CE4E5B9)
+    z ^= z >> np.uint64(27)
+    z *= np.uint64(0x94D049BB133111EB)
+    z ^= z >> np.uint64(31)
+    return z
+
+
+class KeyedPositionSampler:
+    """
+    Keyed pseudo-random ordering of the index range [0, domain_size).
+
+    A balanced Feistel network over the smallest even number of bits that
+    covers the domain acts as a format-preserving permutation; indices that
+    land outside the domain are re-encrypted (cycle walking) until they fall
+    inside. Because the mapping is a bijection, position i of the order can be
+    computed on its own, so the first k positions cost O(k) regardless of the
+    size of the image.
+    """
+    def __init__(self, domain_size: int, key: int, rounds: int = 4):
+        """
+        Args:
+            domain_size (int): Number of embeddable positions (pixels, pairs,
+                               groups, coefficients, ...).
+            key (int): Secret key shared by the embedder and the extractor.
+            rounds (int): Number of Feistel rounds (>= 3 recommended).
+        """
+        self.domain_size = int(domain_size)
+        if self.domain_size < 1:
+            raise ValueError("domain_size must be at least 1.")
+        self.key = int(key)
+        self.rounds = max(1, int(rounds))
+
+        # Half-width of the Feistel block; 2**(2*half_bits) < 4 * domain_size,
+        # so cycle walking needs fewer than 4 passes on average.
+        total_bits = max(2, (self.domain_size - 1).bit_length())
+        self.half_bits = (total_bits + 1) // 2
+        self._half_mask = np.uint64((1 << self.half_bits) - 1)
+
+        state = self.key & _MASK64
+        round_keys = []
+        for _ in range(self.rounds):
+            state, rk = _splitmix64(state)
+            round_keys.append(rk)
+        self._round_keys = np.array(round_keys, dtype=np.uint64)
+
+    def _encrypt(self, x: np.ndarray) -> np.ndarray:
+        """One pass of the Feistel network over the power-of-four block."""
+        shift = np.uint64(self.half_bits)
+        left = x >> shift
+        right = x & self._half_mask
+        for rk in self._round_keys:
+            f = _mix64(right ^ rk) & self._half_mask
+            left, right = right, left ^ f
+        return (left << shift) | right
+
+    def permute(self, indices) -> np.ndarray:
+        """
+        Maps order indices to positions.
+
+        Args:
+            indices (array-like): Order indices in [0, domain_size).
+
+        Returns:
+            np.ndarray: int64 positions; distinct inputs give distinct outputs.
+        """
+        x = np.atleast_1d(np.asarray(indices, dtype=np.uint64))
+        if x.size and int(x.max()) >= self.domain_size:
+            raise ValueError("Order index outside of the sampler domain.")
+        y = self._encrypt(x)
+        pending = np.flatnonzero(y >= np.uint64(self.domain_size))
+        while pending.size:
+            y[pending] = self._encrypt(y[pending])
+            pending = pending[y[pending] >= np.uint64(self.domain_size)]
+        return y.astype(np.int64)
+
+    def take(self, start: int, stop: int) -> np.ndarray:
+        """Positions for order indices start .. stop-1."""
+        stop = min(int(stop), self.domain_size)
+        start = max(0, int(start))
+        if stop <= start:
+            return np.empty(0, dtype=np.int64)
+        return self.permute(np.arange(start, stop, dtype=np.uint64))
+
+    def first_k(self, k: int) -> np.ndarray:
+        """The first k distinct positions of the keyed order."""
+        if k > self.domain_size:
+            raise ValueError(f"Requested {k} positions, but only {self.domain_size} exist.")
+        return self.take(0, k)
+
+
+def select_positions(domain_size: int, count: int, key: int | None = None) -> np.ndarray:
+    """
+    Returns the first `count` embedding positions out of `domain_size`.
+
+    Without a key this is plain raster order (0, 1, 2, ...); with a key the
+    positions follow the KeyedPositionSampler order. Both cost O(count).
+
+    Args:
+        domain_size (int): Number of available positions.
+        count (int): Number of positions needed.
+        key (int | None): Secret ordering key, or None for raster order.
+
+    Returns:
+        np.ndarray: int64 array of `count` distinct positions.
+    """
+    if count > domain_size:
+        raise ValueError(f"Requested {count} positions, but capacity is {domain_size}.")
+    if key is None:
+        return np.arange(count, dtype=np.int64)
+    return KeyedPositionSampler(domain_size, key).first_k(count)
@@ -0,0 +1,192 @@
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import tifffile
+
+TIFF_EXTENSIONS = ('.tif', '.tiff', '.btf', '.tf8')
+
+# Classic TIFF stores 32-bit offsets; larger outputs are written as BigTIFF
+_BIGTIFF_THRESHOLD = 2**31
+
+
+class RowSource:
+    """
+    Reads an RGB image band by band without loading it whole.
+
+    Supported sources:
+    - an np.ndarray or np.memmap (read by slicing),
+    - a '.npy' file (opened with mmap_mode='r'),
+    - a TIFF / BigTIFF file: uncompressed contiguous files are memory-mapped,
+      compressed, striped or tiled files are decoded one strip/tile at a time.
+    """
+    def __init__(self, source):
+        self._array = None
+        self._tiff = None
+        self._lock = threading.Lock()
+
+        if isinstance(source, np.ndarray):
+            self._array = source
+        else:
+            path = str(source)
+            lower = path.lower()
+            if lower.endswith('.npy'):
+                self._array = np.load(path, mmap_mode='r')
+            elif lower.endswith(TIFF_EXTENSIONS):
+                try:
+                    self._array = tifffile.memmap(path, mode='r')
+                except ValueError:
+                    self._open_segments(path)
+            else:
+                raise ValueError(f"Unsupported streaming source: {path} (use .npy, .tif/.tiff or an ndarray).")
+
+        if self._array is not None:
+            self.shape, self.dtype = tuple(self._array.shape), self._array.dtype
+        if len(self.shape) != 3 or self.shape[2] < 3:
+            raise ValueError(f"Expected an RGB image (H, W, 3), got shape {self.shape}.")
+
+    def _open_segments(self, path: str):
+        self._tiff = tifffile.TiffFile(path)
+        page = self._tiff.pages[0]
+        if page.planarconfig != 1:
+            raise ValueError("Only contiguous (interleaved RGB) TIFF files can be streamed.")
+        self._page = page
+        self._row_cache = {}
+        self.shape, self.dtype = tuple(page.shape), page.dtype
+        height, width = self.shape[:2]
+        if page.is_tiled:
+            self._segment_shape = (page.tilelength, page.tilewidth)
+        else:
+            self._segment_shape = (page.rowsperstrip or height, width)
+
+    def _segment_row(self, sy: int) -> np.ndarray:
+        """Decodes strip / tile row `sy` as a (seg_h, W, C) array (last two rows are cached)."""
+        with self._lock:
+            if sy in self._row_cache:
+                return self._row_cache[sy]
+
+        height, width, channels = self.shape
+        seg_h, seg_w = self._segment_shape
+        per_row = -(-width // seg_w)
+        page, fh = self._page, self._tiff.filehandle
+        rows = np.empty((min(seg_h, height - sy * seg_h), width, channels), dtype=self.dtype)
+        for sx in range(per_row):
+            index = sy * per_row + sx
+            with self._lock:
+                fh.seek(page.dataoffsets[index])
+                data = fh.read(page.databytecounts[index])
+            segment, indices, _ = page.decode(data, index)
+            segment = segment[0]
+            x = indices[-2]
+            x1 = min(x + segment.shape[1], width)
+            rows[:, x:x1] = segment[:len(rows), :x1 - x]
+
+        with self._lock:
+            self._row_cache[sy] = rows
+            while len(self._row_cache) > 2:
+                self._row_cache.pop(next(iter(self._row_cache)))
+        return rows
+
+    def read(self, r0: int, r1: int) -> np.ndarray:
+        """Rows r0:r1 as an in-memory (r1-r0, W, C) array."""
+        if self._array is not None:
+            return np.array(self._array[r0:r1])
+
+        out = np.empty((r1 - r0,) + self.shape[1:], dtype=self.dtype)
+        seg_h = self._segment_shape[0]
+        for sy in range(r0 // seg_h, (r1 - 1) // seg_h + 1):
+            rows = self._segment_row(sy)
+            y = sy * seg_h
+            y0, y1 = max(y, r0), min(y + len(rows), r1)
+            out[y0 - r0:y1 - r0] = rows[y0 - y:y1 - y]
+        return out
+
+    def close(self):
+        if self._tiff is not None:
+            self._tiff.close()
+            self._tiff = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _iter_tiles(bands, tile: tuple, width: int):
+    """Regroups row bands of any height into (tile_h, tile_w) tiles in row-major order."""
+    tile_h, tile_w = tile
+    pending = None
+    for band in bands:
+        pending = band if pending is None or not len(pending) else np.concatenate((pending, band))
+        while len(pending) >= tile_h:
+            tile_row, pending = pending[:tile_h], pending[tile_h:]
+            for x in range(0, width, tile_w):
+                yield tile_row[:, x:x + tile_w]
+    if pending is not None and len(pending):
+        for x in range(0, width, tile_w):
+            yield pending[:, x:x + tile_w]
+
+
+def write_rows(path: str, shape: tuple, dtype, bands, tile: tuple = (256, 256), compression=None):
+    """
+    Writes an image from an iterator of row bands, one band at a time.
+
+    Args:
+        path (str): '.npy' (memory-mapped raw array) or '.tif' / '.tiff'
+                    (tiled TIFF, BigTIFF when larger than 2 GB).
+        shape (tuple): Full image shape (H, W, 3).
+        dtype: Image dtype.
+        bands (iterator of np.ndarray): Consecutive row bands, top to bottom.
+        tile (tuple): TIFF tile shape (multiples of 16).
+        compression (str | None): TIFF compression passed to tifffile.
+    """
+    lower = str(path).lower()
+    if lower.endswith('.npy'):
+        out = np.lib.format.open_memmap(path, mode='w+', dtype=dtype, shape=shape)
+        row = 0
+        for band in bands:
+            out[row:row + len(band)] = band
+            row += len(band)
+        out.flush()
+        del out
+    elif lower.endswith(TIFF_EXTENSIONS):
+        if tile[0] % 16 or tile[1] % 16:
+            raise ValueError("TIFF tile dimensions must be multiples of 16.")
+        nbytes = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        tifffile.imwrite(path, _iter_tiles(bands, tile, shape[1]), shape=shape, dtype=dtype,
+                         photometric='rgb', tile=tile, compression=compression,
+                         bigtiff=nbytes >= _BIGTIFF_THRESHOLD)
+    else:
+        raise ValueError(f"Unsupported streaming output: {path} (use .npy or .tif/.tiff).")
+
+
+def ordered_map(func, items, workers: int):
+    """
+    Like ThreadPoolExecutor.map, but keeps at most `workers` items in flight,
+    so memory stays bounded while results are consumed in order.
+    """
+    if workers <= 1:
+        for item in items:
+            yield func(item)
+        return
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(func, item))
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def map_tiles(func, tasks: list, workers: int) -> list:
+    """
+    Runs func over independent tiles in a thread pool and returns the results
+    in task order (NumPy FFT, PyWavelets and cv2 release the GIL).
+    """
+    if workers <= 1 or len(tasks) <= 1:
+        return [func(task) for task in tasks]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(func, tasks))
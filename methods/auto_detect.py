@@ -0,0 +1,492 @@
+import os
+import inspect
+import zlib
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+import cv2
+import numpy as np
+
+from constants import (
+    METHOD_LSB, METHOD_PVD, METHOD_EMD,
+    METHOD_DCT, METHOD_DWT, METHOD_FFT,
+    METHOD_DCT_LSB, METHOD_DCT_PVD, METHOD_DCT_EMD,
+    METHOD_DWT_LSB, METHOD_DWT_PVD, METHOD_DWT_EMD,
+    METHOD_FFT_LSB, METHOD_FFT_PVD, METHOD_FFT_EMD,
+)
+from helpers.batching import stack_cvt_color
+from helpers.plausibility import (decode_text, plausible_prefix, text_plausibility, clean_text_ratio,
+                                  strip_foreign_tail, foreign_char_count)
+from methods.registry import METHOD_REGISTRY, create_method, _freeze
+from methods.frequency.dct import DCTSteganography, DCT_SWEEP_QUANT_FACTORS
+from methods.frequency.dwt import DWTSteganography
+from methods.frequency.fft import FFTSteganography
+from methods.spatial import kernels
+
+# Keluarga kandidat, urut dari yang paling murah. Satu keluarga = satu tugas
+# di process pool, dan transformasinya dihitung sekali untuk semua kandidat.
+DETECT_FAMILIES = ("spatial", "dwt", "dct", "fft")
+
+DETECT_PROBE_BITS = 2048   # Bit yang dibaca per kandidat jika panjang pesan tidak diketahui
+DETECT_MIN_CHARS = 16      # Panjang teks minimal (seluruh pesan, juga hibrida) agar kandidat dianggap yakin
+DETECT_CLEAN_SCORE = 0.9   # clean_text_ratio minimal agar kandidat dianggap teks sungguhan
+DETECT_MAX_OVERRUN_CHARS = 3  # Ekor sampah terpanjang yang dianggap overrun (_trim_overruns, _align_hybrid)
+DETECT_MIN_PLAUSIBILITY = 0.95  # Skor minimal jika bit_length diketahui
+
+# Varian di luar parameter registry
+DETECT_SPATIAL_VARIANTS = [(METHOD_LSB, {'bits_per_channel': 2}), (METHOD_EMD, {'n': 3})]
+DETECT_DWT_DELTAS = (10.0, 15.0, 20.0, 25.0, 30.0, 40.0, 50.0)
+
+# Metode dasar sisi frekuensi hibrida (sisi lainnya spasial)
+FREQUENCY_METHODS = (METHOD_DCT, METHOD_DWT, METHOD_FFT)
+
+# Nama pendek untuk kunci parameter hibrida ('dct_params', 'dct_lsb_ratio', ...)
+_SHORT_NAMES = {METHOD_LSB: 'lsb', METHOD_PVD: 'pvd', METHOD_EMD: 'emd',
+                METHOD_DCT: 'dct', METHOD_DWT: 'dwt', METHOD_FFT: 'fft'}
+
+# (metode frekuensi, metode spasial) -> metode hibrida
+HYBRID_METHODS = {
+    (METHOD_DCT, METHOD_LSB): METHOD_DCT_LSB,
+    (METHOD_DCT, METHOD_PVD): METHOD_DCT_PVD,
+    (METHOD_DCT, METHOD_EMD): METHOD_DCT_EMD,
+    (METHOD_DWT, METHOD_LSB): METHOD_DWT_LSB,
+    (METHOD_DWT, METHOD_PVD): METHOD_DWT_PVD,
+    (METHOD_DWT, METHOD_EMD): METHOD_DWT_EMD,
+    (METHOD_FFT, METHOD_LSB): METHOD_FFT_LSB,
+    (METHOD_FFT, METHOD_PVD): METHOD_FFT_PVD,
+    (METHOD_FFT, METHOD_EMD): METHOD_FFT_EMD,
+}
+
+# Porsi pesan terkecil yang dibawa satu sisi hibrida (dari rasio default registry)
+_HYBRID_MIN_SHARE = min(min(METHOD_REGISTRY[hybrid][1][f"{_SHORT_NAMES[freq]}_{_SHORT_NAMES[spatial]}_ratio"])
+                        for (freq, spatial), hybrid in HYBRID_METHODS.items())
+
+
+def registry_presets(method: str) -> list:
+    """
+    Semua set parameter yang dikenal untuk satu metode dasar: default
+    registry, sub-parameter setiap hibrida yang memakainya, dan default
+    konstruktor ({}), tanpa duplikat.
+    """
+    presets = {}
+    candidates = [METHOD_REGISTRY[method][1]]
+    for pair, hybrid in HYBRID_METHODS.items():
+        if method in pair:
+            candidates.append(METHOD_REGISTRY[hybrid][1].get(f"{_SHORT_NAMES[method]}_params") or {})
+    candidates.append({})
+    # Dua set parameter sama jika hasil akhirnya (setelah default konstruktor) sama
+    signature = inspect.signature(METHOD_REGISTRY[method][0])
+    for params in candidates:
+        resolved = signature.bind_partial(**params)
+        resolved.apply_defaults()
+        presets.setdefault(_freeze(resolved.arguments), dict(params))
+    return list(presets.values())
+
+
+def _score(bits: np.ndarray, bit_length: int | None, min_chars: int):
+    """
+    Menilai bit hasil ekstraksi satu kandidat.
+
+    Returns:
+        tuple | None: (pesan, skor) jika kandidat meyakinkan, selain itu None.
+    """
+    if bit_length is not None:
+        bits = bits[:bit_length]
+        text, valid = decode_text(bits)
+        score = text_plausibility(bits)
+        return (text, score) if valid and text and score >= DETECT_MIN_PLAUSIBILITY else None
+    # Panjang tidak diketahui: ambil teks terbaca terpanjang di awal bit.
+    # Ujung prefix bisa berisi byte sampah yang kebetulan terbaca, jadi skornya
+    # kebersihan teks, bukan panjangnya (lihat juga AutoDetector._trim_overruns)
+    text = strip_foreign_tail(plausible_prefix(bits))
+    if len(text) < min_chars:
+        return None
+    return text, clean_text_ratio(text)
+
+
+def _hit(method: str, params: dict, message: str, score: float, verified: bool = False) -> dict:
+    return {'method': method, 'params': params, 'message': message,
+            'bit_length': len(message.encode('utf-8')) * 8, 'score': float(score), 'verified': verified}
+
+
+def _detect_spatial(rgb, ycrcb, bit_length, probe_bits, min_chars) -> list:
+    """LSB / EMD / PVD: setiap kandidat membaca bit langsung dari piksel."""
+    count = bit_length or probe_bits
+    candidates = [(method, params) for method in (METHOD_LSB, METHOD_EMD, METHOD_PVD)
+                  for params in registry_presets(method)] + DETECT_SPATIAL_VARIANTS
+    hits = []
+    for method, params in candidates:
+        bits = np.asarray(create_method(method, params)._extract_bits_stack(rgb[None], count)[0], dtype=np.uint8)
+        scored = _score(bits, bit_length, min_chars)
+        if scored is not None:
+            hits.append(_hit(method, params, *scored))
+    return hits
+
+
+def _detect_dct(rgb, ycrcb, bit_length, probe_bits, min_chars) -> list:
+    """DCT: satu DCT blok pada bidang Y untuk seluruh grid quant_factor x preset posisi."""
+    count = bit_length or probe_bits
+    dct = DCTSteganography()
+    plane = ycrcb[..., 0].astype(np.float32)
+    hits = []
+    for _, positions, parity in dct._sweep_parity(plane, count, DCT_SWEEP_QUANT_FACTORS):
+        for quant_factor, bits in zip(DCT_SWEEP_QUANT_FACTORS, parity):
+            scored = _score(bits, bit_length, min_chars)
+            if scored is not None:
+                params = {'quant_factor': quant_factor, 'embed_positions': list(positions)}
+                hits.append(_hit(METHOD_DCT, params, *scored))
+    return hits
+
+
+def _dwt_candidates(bit_length) -> list:
+    """Preset DWT dari registry, ditambah grid delta untuk setiap tata letak sub-band."""
+    presets = {}
+    for params in registry_presets(METHOD_DWT):
+        params = dict(params)
+        # Mode robust butuh panjang pesan untuk interleaving
+        if params.get('robust_mode', True) and bit_length is None:
+            continue
+        presets.setdefault(_freeze(params), params)
+        if params.get('delta') is not None:
+            for delta in DETECT_DWT_DELTAS:
+                variant = dict(params, delta=delta)
+                presets.setdefault(_freeze(variant), variant)
+    return list(presets.values())
+
+
+def _detect_dwt(rgb, ycrcb, bit_length, probe_bits, min_chars) -> list:
+    """DWT: satu wavedec2 per (wavelet, level), dipakai ulang oleh semua band / delta."""
+    y = ycrcb[None, ..., 0].astype(np.float32)
+    decompositions = {}
+    hits = []
+    for params in _dwt_candidates(bit_length):
+        dwt = DWTSteganography(**params)
+        key = (dwt.wavelet, dwt.level)
+        if key not in decompositions:
+            decompositions[key] = dwt._wavedec(y)
+        sub, _ = dwt._get_subband_ref(decompositions[key])
+        sub_flat = sub.astype(np.float64).reshape(1, -1)
+
+        count = (bit_length * dwt.payload_reps if dwt.robust_mode else bit_length) if bit_length else probe_bits
+        count = min(count, sub_flat.shape[1])
+        bits = dwt._qim_read(sub_flat, dwt._coef_index(rgb.shape, count))[0]
+        if dwt.robust_mode:
+            payload = dwt._deinterleave(''.join(map(str, bits)), dwt.interleave_seed)
+            bits = np.frombuffer(dwt._majority_decode(payload, dwt.payload_reps).encode(), dtype=np.uint8) - ord('0')
+        scored = _score(bits.astype(np.uint8), bit_length, min_chars)
+        if scored is not None:
+            hits.append(_hit(METHOD_DWT, params, *scored))
+    return hits
+
+
+def _detect_fft(rgb, ycrcb, bit_length, probe_bits, min_chars) -> list:
+    """
+    FFT: fase setiap bidang YCrCb dihitung sekali. Header dengan CRC yang
+    cocok langsung terverifikasi; selain itu payload dinilai sebagai teks.
+    """
+    phases = {}
+    hits = []
+    for params in registry_presets(METHOD_FFT):
+        fft = FFTSteganography(**params)
+
+        def phase(name):
+            if name not in phases:
+                plane = ycrcb[None, ..., FFTSteganography.PLANE_NAMES.index(name)]
+                phases[name] = fft._plane_phase(plane)
+            return phases[name]
+
+        try:
+            header = fft._parse_header(fft._read_grouped_bits(phase(fft.header_channel), fft.HDR_BITS, fft.HDR_R)[0])
+            if header is None or header[1] <= 0:
+                continue
+            seed, length, crc = header
+            bits_perm = fft._read_grouped_bits(phase(fft.payload_channel), length, fft.PAY_R)[0]
+        except ValueError:
+            # Panjang header acak melebihi kapasitas annulus
+            continue
+        bits = fft._unpermute(bits_perm, seed)
+        payload = fft._bits_to_bytes(bits)
+        if zlib.crc32(payload) & 0xFFFFFFFF == crc:
+            hits.append(_hit(METHOD_FFT, params, payload.decode('utf-8', errors='replace'), 1.0, verified=True))
+            continue
+        scored = _score(np.frombuffer(bits.encode(), dtype=np.uint8) - ord('0'), bit_length, min_chars)
+        if scored is not None:
+            hits.append(_hit(METHOD_FFT, params, *scored))
+    return hits
+
+
+_FAMILY_DETECTORS = {'spatial': _detect_spatial, 'dct': _detect_dct, 'dwt': _detect_dwt, 'fft': _detect_fft}
+
+
+def _run_family(family, rgb, ycrcb, bit_length, probe_bits, min_chars) -> list:
+    """Worker process pool: menjalankan satu keluarga kandidat pada satu gambar."""
+    return _FAMILY_DETECTORS[family](rgb, ycrcb, bit_length, probe_bits, min_chars)
+
+
+class AutoDetector:
+    """
+    Deteksi otomatis metode dan parameter untuk gambar stego yang tidak dikenal.
+
+    Kandidat (metode dasar x preset parameter dari registry) dikelompokkan
+    per keluarga transformasi (spasial, DWT, DCT, FFT). YCrCb dihitung sekali
+    per gambar, dan setiap keluarga menghitung transformasinya sekali untuk
+    semua kandidatnya (satu DCT blok untuk seluruh grid quant_factor, satu
+    wavedec2 per wavelet/level, satu FFT per bidang). Keluarga dijalankan
+    paralel di process pool; begitu satu gambar punya kandidat yang yakin,
+    keluarga yang masih antre untuk gambar itu dibatalkan.
+
+    Kandidat dinilai dengan CRC header (FFT) atau plausibilitas teks. Jika
+    bit_length tidak diketahui, yang dinilai adalah prefix teks terbaca
+    (lihat helpers.plausibility.plausible_prefix), jadi 'bit_length' hasil
+    adalah perkiraan. Hibrida dilaporkan jika keluarga frekuensi dan spasial
+    sama-sama menemukan kandidat; panjang kedua bagiannya dipotong agar
+    sesuai rasio pembagian hibrida (lihat _align_hybrid). Setiap keluarga
+    menerima prefix sependek porsi satu sisi hibrida dari min_chars;
+    min_chars sendiri berlaku untuk pesan utuh (metode dasar atau gabungan
+    hibrida). Kandidat teratas diekstrak ulang dengan panjang hasil deteksi.
+
+    Dengan stop_on_first, kandidat dari satu sisi saja (spasial atau
+    frekuensi) tidak pernah menghentikan sisi lainnya, karena bisa jadi itu
+    hanya separuh pesan hibrida: pencarian berhenti setelah keluarga spasial
+    dievaluasi dan sisi frekuensi punya kandidat (atau semua keluarganya
+    sudah dievaluasi).
+    """
+    def __init__(self, bit_length: int | None = None, probe_bits: int = DETECT_PROBE_BITS,
+                 min_chars: int = DETECT_MIN_CHARS, workers: int | None = None,
+                 stop_on_first: bool = True, families=DETECT_FAMILIES):
+        """
+        Args:
+            bit_length (int | None): Panjang pesan (bit) jika diketahui; berlaku untuk metode dasar.
+            probe_bits (int): Jumlah bit yang dibaca per kandidat jika bit_length None.
+            min_chars (int): Panjang prefix teks minimal agar kandidat dianggap yakin.
+            workers (int | None): Jumlah proses; None = os.cpu_count(), 1 = tanpa pool.
+            stop_on_first (bool): Hentikan pencarian gambar begitu kedua sisi hibrida
+                                  selesai (lihat _settled).
+            families (sequence): Subset dari DETECT_FAMILIES yang dicoba.
+        """
+        unknown = set(families) - set(DETECT_FAMILIES)
+        if unknown:
+            raise ValueError(f"Keluarga tidak dikenal: {sorted(unknown)}")
+        self.bit_length = None if bit_length is None else int(bit_length)
+        self.probe_bits = int(probe_bits)
+        self.min_chars = int(min_chars)
+        # Satu sisi hibrida hanya membawa sebagian pesan
+        self.half_chars = max(1, int(self.min_chars * _HYBRID_MIN_SHARE))
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.stop_on_first = stop_on_first
+        self.families = tuple(f for f in DETECT_FAMILIES if f in families)
+
+    @staticmethod
+    def _load(image) -> np.ndarray:
+        """Path gambar (dibaca sebagai RGB) atau array RGB (H, W, 3)."""
+        if isinstance(image, (str, os.PathLike)):
+            bgr = cv2.imread(os.fspath(image), cv2.IMREAD_COLOR)
+            if bgr is None:
+                raise ValueError(f"Gagal membaca gambar: {image}")
+            return cv2.cvtColor(bgr, cv2.COLOR_BGR2RGB)
+        image = np.asarray(image)
+        if image.ndim != 3 or image.shape[2] != 3:
+            raise ValueError("Gambar harus RGB (H, W, 3).")
+        return image.astype(np.uint8, copy=False)
+
+    def _tasks(self, image) -> list:
+        rgb = self._load(image)
+        ycrcb = stack_cvt_color(rgb[None], cv2.COLOR_RGB2YCrCb)[0]
+        return [(family, rgb, ycrcb, self.bit_length, self.probe_bits, self.half_chars) for family in self.families]
+
+    def _settled(self, evaluated: set, hits: list) -> bool:
+        """
+        True jika pencarian satu gambar boleh berhenti: keluarga spasial sudah
+        dievaluasi, dan sisi frekuensi sudah punya kandidat yang meyakinkan (FFT
+        terverifikasi CRC, atau teks bersih sepanjang min_chars) atau semua
+        keluarga frekuensinya sudah dievaluasi. Prefix yang lebih pendek bisa
+        saja sampah, jadi tidak menghentikan pencarian.
+        """
+        spatial_done = 'spatial' not in self.families or 'spatial' in evaluated
+        frequency_done = (all(f in evaluated for f in self.families if f != 'spatial')
+                          or any(hit['method'] in FREQUENCY_METHODS
+                                 and (hit['verified'] or (hit['score'] >= DETECT_CLEAN_SCORE
+                                                          and len(hit['message']) >= self.min_chars))
+                                 for hit in hits))
+        return spatial_done and frequency_done
+
+    def detect(self, image) -> list:
+        """
+        Mendeteksi metode untuk satu gambar.
+
+        Returns:
+            list: Kandidat yakin, terbaik lebih dulu; masing-masing dict
+                  {'method', 'params', 'message', 'bit_length', 'score', 'verified'}.
+                  Untuk hibrida 'bit_length' berupa tuple (frekuensi, spasial).
+                  List kosong = tidak ada yang terdeteksi.
+        """
+        return self.detect_many([image])[0]
+
+    def detect_many(self, images) -> list:
+        """
+        Mendeteksi metode untuk banyak gambar (path atau array), misalnya satu
+        folder. Paling banyak `workers` gambar dimuat bersamaan.
+
+        Returns:
+            list: Satu list hasil (lihat detect) per gambar, urutan input.
+        """
+        images = list(images)
+        results = [[] for _ in images]
+        if self.workers == 1:
+            for index, image in enumerate(images):
+                evaluated = set()
+                for task in self._tasks(image):
+                    results[index].extend(_run_family(*task))
+                    evaluated.add(task[0])
+                    if self.stop_on_first and self._settled(evaluated, results[index]):
+                        break
+            return [self._confirm(image, self._rank(hits, self.min_chars)) for image, hits in zip(images, results)]
+
+        pending = {}
+        evaluated = [set() for _ in images]
+        next_image = 0
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=kernels.init_worker,
+                                 initargs=(kernels.get_backend(),)) as pool:
+            while next_image < len(images) or pending:
+                # Isi antrean sampai `workers` gambar sedang diproses
+                while next_image < len(images) and len({i for i, _ in pending.values()}) < self.workers:
+                    for task in self._tasks(images[next_image]):
+                        pending[pool.submit(_run_family, *task)] = (next_image, task[0])
+                    next_image += 1
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    index, family = pending.pop(future)
+                    results[index].extend(future.result())
+                    evaluated[index].add(family)
+                    if self.stop_on_first and self._settled(evaluated[index], results[index]):
+                        for other, (other_index, _) in list(pending.items()):
+                            if other_index == index and other.cancel():
+                                del pending[other]
+        return [self._confirm(image, self._rank(hits, self.min_chars)) for image, hits in zip(images, results)]
+
+    def _confirm(self, image, ranked: list) -> list:
+        """
+        Mengekstrak ulang kandidat teratas dengan panjang bit hasil deteksi. Saat
+        panjang belum diketahui, pasangan terakhir PVD terbaca dengan lebar
+        penuh, padahal hanya memuat sisa bit, sehingga karakter terakhir bisa salah.
+        """
+        if self.bit_length is not None or not ranked:
+            return ranked
+        best = ranked[0]
+        try:
+            message = create_method(best['method'], best['params']).extract(self._load(image), best['bit_length'])
+        except ValueError:
+            return ranked
+        if (message != best['message'] and len(message.encode('utf-8')) == len(best['message'].encode('utf-8'))
+                and clean_text_ratio(message) >= best['score']):
+            ranked[0] = dict(best, message=message, score=clean_text_ratio(message))
+        return ranked
+
+    @staticmethod
+    def _trim_overruns(hits: list) -> list:
+        """
+        Jika pesan satu kandidat adalah prefix pesan kandidat lain dari metode
+        yang sama dan selisihnya pendek (paling banyak DETECT_MAX_OVERRUN_CHARS),
+        ekor kandidat yang lebih panjang hanyalah byte sampah yang kebetulan
+        terbaca setelah akhir pesan: keduanya memakai prefix terpendek.
+        """
+        trimmed = []
+        for hit in hits:
+            if not hit['verified']:
+                shorter = [other['message'] for other in hits
+                           if other['method'] == hit['method'] and other['message']
+                           and hit['message'].startswith(other['message'])
+                           and len(hit['message']) - len(other['message']) <= DETECT_MAX_OVERRUN_CHARS]
+                message = min(shorter, key=len)
+                if message != hit['message']:
+                    hit = dict(hit, message=message, bit_length=len(message.encode('utf-8')) * 8,
+                               score=clean_text_ratio(message))
+            trimmed.append(hit)
+        return trimmed
+
+    @staticmethod
+    def _align_hybrid(freq: dict, spatial: dict, ratio: float, min_chars: int = DETECT_MIN_CHARS):
+        """
+        Memotong kedua bagian hibrida ke panjang yang konsisten dengan pembagian
+        pesan saat embed (bit frekuensi = int(total * ratio)) dan memuat paling
+        sedikit karakter asing, agar byte sampah di ujung salah satu bagian tidak
+        ikut dilaporkan. Bagian frekuensi yang terverifikasi CRC tidak dipotong.
+        Bagian frekuensi tak terverifikasi yang lebih pendek dari `min_chars`
+        bisa saja prefix sampah; ia tidak boleh membuang lebih dari
+        DETECT_MAX_OVERRUN_CHARS karakter (atau separuh bagian spasial yang
+        tersisa, jika lebih banyak) dari pesan spasial.
+
+        Returns:
+            tuple | None: (pesan frekuensi, pesan spasial), atau None jika tidak
+                          ada pembagian yang konsisten.
+        """
+        freq_data, spatial_data = freq['message'].encode('utf-8'), spatial['message'].encode('utf-8')
+        freq_max, spatial_max = len(freq_data) * 8, len(spatial_data) * 8
+        short_freq = not freq['verified'] and len(freq['message']) < min_chars
+        best, best_key = None, None
+        for total in range(freq_max + spatial_max, 0, -8):
+            freq_bits = int(total * ratio)
+            spatial_bits = total - freq_bits
+            if freq_bits % 8 or freq_bits > freq_max or spatial_bits > spatial_max or spatial_bits <= 0:
+                continue
+            if freq['verified'] and freq_bits != freq_max:
+                continue
+            try:
+                parts = (freq_data[:freq_bits // 8].decode('utf-8'),
+                         spatial_data[:spatial_bits // 8].decode('utf-8'))
+            except UnicodeDecodeError:
+                continue  # Potongan membelah karakter multi-byte
+            dropped = len(spatial['message']) - len(parts[1])
+            if short_freq and dropped > max(DETECT_MAX_OVERRUN_CHARS, len(parts[1]) // 2):
+                continue
+            # Karakter asing (kontrol / aksara lain) di ujung kedua bagian
+            # menandakan byte sampah: pilih pembagian dengan paling sedikit
+            # karakter asing, lalu yang terpanjang
+            key = foreign_char_count(parts[0] + parts[1])
+            if best_key is None or key < best_key:
+                best, best_key = parts, key
+        return best
+
+    @staticmethod
+    def _rank(hits: list, min_chars: int = DETECT_MIN_CHARS) -> list:
+        """
+        Menambahkan kombinasi hibrida lalu mengurutkan. Urutan: terverifikasi,
+        teks bersih (>= DETECT_CLEAN_SCORE), hibrida, skor, dukungan, panjang.
+        Dukungan = jumlah titik grid (preset / quant_factor / delta) yang
+        membaca pesan yang sama, sehingga near miss dari satu titik grid kalah
+        dari pesan yang dibaca beberapa titik bertetangga. Metode dasar dan
+        gabungan hibrida dengan pesan lebih pendek dari `min_chars` dibuang.
+        """
+        hits = AutoDetector._trim_overruns(hits)
+        combined = [hit for hit in hits if len(hit['message']) >= min_chars]
+        for freq in hits:
+            for spatial in hits:
+                hybrid = HYBRID_METHODS.get((freq['method'], spatial['method']))
+                if hybrid is None:
+                    continue
+                freq_name, spatial_name = _SHORT_NAMES[freq['method']], _SHORT_NAMES[spatial['method']]
+                params = dict(METHOD_REGISTRY[hybrid][1])
+                params[f"{freq_name}_params"] = freq['params']
+                params[f"{spatial_name}_params"] = spatial['params']
+                aligned = AutoDetector._align_hybrid(freq, spatial, params[f"{freq_name}_{spatial_name}_ratio"][0],
+                                                     min_chars)
+                if aligned is None or len(aligned[0] + aligned[1]) < min_chars:
+                    continue
+                freq_message, spatial_message = aligned
+                freq_score = 1.0 if freq['verified'] else clean_text_ratio(freq_message)
+                combined.append({'method': hybrid, 'params': params,
+                                 'message': freq_message + spatial_message,
+                                 'bit_length': (len(freq_message.encode('utf-8')) * 8,
+                                                len(spatial_message.encode('utf-8')) * 8),
+                                 'score': min(freq_score, clean_text_ratio(spatial_message)),
+                                 'verified': freq['verified']})
+        # Dihitung setelah pemotongan: titik grid yang membaca ekor sampah
+        # berbeda tetap mendukung pesan yang sama
+        support = {}
+        for hit in combined:
+            support[(hit['method'], hit['message'])] = support.get((hit['method'], hit['message']), 0) + 1
+        combined = [dict(hit, support=support[(hit['method'], hit['message'])]) for hit in combined]
+        combined.sort(key=lambda h: (h['verified'], h['score'] >= DETECT_CLEAN_SCORE,
+                                     h['method'] in HYBRID_METHODS.values(), h['score'], h['support'],
+                                     sum(h['bit_length']) if isinstance(h['bit_length'], tuple) else h['bit_length']),
+                      reverse=True)
+        return combined
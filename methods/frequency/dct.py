@@ -1,20 +1,40 @@
+import os
 import numpy as np
 import cv2  # cv2 IS REQUIRED for YCrCb color space conversion
 from scipy.fftpack import dct, idct
-from helpers.message_binary import message_to_binary, binary_to_message
+from helpers.message_binary import message_to_bit_array, bit_array_to_message
+from helpers.batching import BatchEmbeddingMixin, stack_cvt_color
+from helpers.embedding_plan import EmbeddingPlan
+from helpers.tiled_io import map_tiles
+from helpers.jpeg_codec import read_jpeg, write_jpeg, DC_LIMIT, AC_LIMIT
+from helpers.plausibility import decode_text, score_bit_rows
+from constants import DCT_POSITION_PRESETS
+
+# Grid quant_factor default untuk extract_sweep
+DCT_SWEEP_QUANT_FACTORS = list(range(5, 155, 5))
 
 # Assumes message_to_binary() and binary_to_message() exist
 
-class DCTSteganography:
+class DCTSteganography(BatchEmbeddingMixin):
     """
     Implementasi Steganografi DCT (Discrete Cosine Transform) - Versi RGB-Only
 
     Catatan: Kelas ini masih memerlukan 'cv2' untuk konversi
     ruang warna RGB <-> YCrCb, yang merupakan inti dari metode ini.
     """
-    def __init__(self, block_size=8, quant_factor=15, embed_positions=None):
+    CHANNEL_NAMES = ("Y", "Cr", "Cb")
+
+    def __init__(self, block_size=8, quant_factor=15, embed_positions=None, channels=None, workers=None):
         """
         Inisialisasi objek DCTSteganography.
+
+        Args:
+            channels (list | dict | None): Kanal target. None = hanya Y. List nama
+                (mis. ["Y", "Cb"]) memakai quant_factor dan embed_positions default;
+                dict {nama: {"quant_factor": ..., "embed_positions": [...]}} memberi
+                pengaturan sendiri per kanal. Bit dibagi antar kanal sebanding
+                dengan kapasitasnya.
+            workers (int | None): Jumlah thread untuk memproses kanal secara paralel.
         """
         self.block_size = block_size
         self.quant_factor = quant_factor
@@ -24,6 +44,22 @@ class DCTSteganography:
         else:
             self.embed_positions = embed_positions
 
+        if channels is None:
+            channels = ["Y"]
+        if not isinstance(channels, dict):
+            channels = {name: {} for name in channels}
+        for name, overrides in channels.items():
+            if name not in self.CHANNEL_NAMES:
+                raise ValueError(f"Kanal tidak dikenal: {name}. Pilih dari {self.CHANNEL_NAMES}.")
+            unknown = set(overrides) - {"quant_factor", "embed_positions"}
+            if unknown:
+                raise ValueError(f"Parameter kanal tidak dikenal untuk {name}: {sorted(unknown)}")
+        if not channels:
+            raise ValueError("Minimal satu kanal harus dipilih.")
+        # Urutan kanal selalu Y, Cr, Cb agar pembagian bit deterministik
+        self.channels = {name: dict(channels[name]) for name in self.CHANNEL_NAMES if name in channels}
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+
         # Tabel kuantisasi standar JPEG (Luminance)
         self.jpeg_quant_table = np.array([
             [16, 11, 10, 16, 24, 40, 51, 61],
@@ -36,112 +72,374 @@ class DCTSteganography:
             [72, 92, 95, 98, 112, 100, 103, 99]
         ])
 
+        # Tabel kuantisasi standar JPEG (Chrominance), dipakai untuk Cr / Cb
+        self.jpeg_chroma_quant_table = np.array([
+            [17, 18, 24, 47, 99, 99, 99, 99],
+            [18, 21, 26, 66, 99, 99, 99, 99],
+            [24, 26, 56, 99, 99, 99, 99, 99],
+            [47, 66, 99, 99, 99, 99, 99, 99],
+            [99, 99, 99, 99, 99, 99, 99, 99],
+            [99, 99, 99, 99, 99, 99, 99, 99],
+            [99, 99, 99, 99, 99, 99, 99, 99],
+            [99, 99, 99, 99, 99, 99, 99, 99]
+        ])
+
     def _dct2d(self, block):
-        """2D DCT menggunakan scipy"""
-        return dct(dct(block.T, type=2, norm='ortho').T, type=2, norm='ortho')
+        """2D DCT menggunakan scipy (pada dua sumbu terakhir, jadi bisa untuk batch blok)"""
+        return dct(dct(block, axis=-2, type=2, norm='ortho'), axis=-1, type=2, norm='ortho')
 
     def _idct2d(self, block):
-        """2D IDCT menggunakan scipy"""
-        return idct(idct(block.T, type=2, norm='ortho').T, type=2, norm='ortho')
+        """2D IDCT menggunakan scipy (pada dua sumbu terakhir, jadi bisa untuk batch blok)"""
+        return idct(idct(block, axis=-2, type=2, norm='ortho'), axis=-1, type=2, norm='ortho')
+
+    def _channel_specs(self) -> list:
+        """
+        Pengaturan efektif setiap kanal target, urutan Y, Cr, Cb.
+
+        Returns:
+            list: (indeks kanal YCrCb, quant_factor, embed_positions, tabel kuantisasi).
+        """
+        specs = []
+        for name, overrides in self.channels.items():
+            index = self.CHANNEL_NAMES.index(name)
+            table = self.jpeg_quant_table if index == 0 else self.jpeg_chroma_quant_table
+            specs.append((index,
+                          overrides.get("quant_factor", self.quant_factor),
+                          overrides.get("embed_positions", self.embed_positions),
+                          table))
+        return specs
 
     def _calculate_capacity(self, image_shape):
         """Menghitung kapasitas penyisipan maksimum dalam bit."""
+        return sum(self._channel_capacities(image_shape))
+
+    def _channel_capacities(self, image_shape) -> list:
+        """Kapasitas (bit) setiap kanal target."""
         # Asumsikan image_shape adalah (H, W, 3)
         height, width = image_shape[:2]
         blocks_y = height // self.block_size
         blocks_x = width // self.block_size
-        return (blocks_y * blocks_x) * len(self.embed_positions)
+        return [(blocks_y * blocks_x) * len(positions) for _, _, positions, _ in self._channel_specs()]
+
+    def _split_bits(self, bit_length: int, image_shape, capacities=None) -> list:
+        """
+        Rentang bit (start, stop) untuk setiap kanal, sebanding dengan kapasitas
+        kanal. Dengan satu kanal semua bit masuk ke kanal tersebut.
+        """
+        if capacities is None:
+            capacities = self._channel_capacities(image_shape)
+        total = max(sum(capacities), 1)
+        cuts = [0] + [bit_length * int(c) // total for c in np.cumsum(capacities)]
+        return list(zip(cuts[:-1], cuts[1:]))
+
+    def _block_index(self, block_count, width, plan=None):
+        """
+        Indeks baris/kolom piksel untuk `block_count` blok pertama (urutan raster).
+
+        Returns:
+            tuple: (rows (nb, bs, 1), cols (nb, 1, bs)) untuk fancy indexing.
+        """
+        if plan is not None:
+            rows, cols = plan.take('block_rows', block_count), plan.take('block_cols', block_count)
+            return rows[:, :, None], cols[:, None, :]
+        blocks_x = width // self.block_size
+        block_ids = np.arange(block_count)
+        offsets = np.arange(self.block_size)
+        rows = (block_ids // blocks_x)[:, None] * self.block_size + offsets
+        cols = (block_ids % blocks_x)[:, None] * self.block_size + offsets
+        return rows[:, :, None], cols[:, None, :]
+
+    def _position_steps(self, block_count, spec=None):
+        """Indeks (u, v) dan langkah kuantisasi per slot bit, urutan blok lalu posisi."""
+        _, quant_factor, positions, table = spec or self._channel_specs()[0]
+        us = np.array([u for u, _ in positions])
+        vs = np.array([v for _, v in positions])
+        steps = quant_factor * table[us, vs] / 50.0
+        return us, vs, np.tile(steps, block_count)
 
-    def embed(self, cover_image: np.ndarray, secret_message: str) -> tuple:
+    def _build_plan(self, image_shape, max_bits=None):
+        """
+        Menyiapkan indeks piksel blok untuk gambar berukuran `image_shape`
+        (lihat methods.registry.compile_plan).
+        """
+        capacity = self._calculate_capacity(image_shape)
+        max_bits = capacity if max_bits is None else min(max_bits, capacity)
+        # Semua kanal memakai urutan blok yang sama; plan mencakup kanal yang butuh blok terbanyak
+        block_count = max(-(-(stop - start) // len(positions))
+                          for (start, stop), (_, _, positions, _) in zip(self._split_bits(max_bits, image_shape),
+                                                                          self._channel_specs()))
+        rows, cols = self._block_index(block_count, image_shape[1])
+        return EmbeddingPlan(self, image_shape, max_bits, {'block_rows': rows[:, :, 0], 'block_cols': cols[:, 0, :]})
+
+    def embed(self, cover_image: np.ndarray, secret_message: str, plan=None) -> tuple:
         """
         Menyisipkan pesan rahasia ke dalam gambar cover RGB menggunakan DCT.
         """
         # --- MODIFIKASI ---
         # Cek grayscale dihapus. Asumsikan cover_image adalah RGB.
         # ---
+        stego_stack, bit_length = self._embed_stack(cover_image[None], secret_message, plan)
+        return stego_stack[0], bit_length
+
+    def extract(self, stego_image: np.ndarray, bit_length: int, plan=None) -> str:
+        """
+        Mengekstrak pesan rahasia dari gambar stego RGB.
+        """
+        # --- MODIFIKASI ---
+        # Cek grayscale dihapus. Asumsikan stego_image adalah RGB.
+        # ---
+        return self._extract_stack(stego_image[None], bit_length, plan)[0]
 
+    def _embed_stack(self, cover_stack: np.ndarray, secret_message: str, plan=None) -> tuple:
+        """Menyisipkan pesan yang sama ke setiap gambar dalam stack (N, H, W, 3)."""
+        bits = message_to_bit_array(secret_message)
+        return self._embed_bits_stack(cover_stack, bits, plan), int(bits.size)
+
+    def _embed_bits_stack(self, cover_stack: np.ndarray, bits: np.ndarray, plan=None) -> np.ndarray:
+        """Menyisipkan array bit 0/1 ke setiap gambar dalam stack (N, H, W, 3)."""
+        if plan is not None:
+            plan.check(self, cover_stack.shape[1:])
         # Cek kapasitas
-        max_bits = self._calculate_capacity(cover_image.shape)
-        binary_message = message_to_binary(secret_message)
-        bit_length = len(binary_message)
+        max_bits = self._calculate_capacity(cover_stack.shape[1:])
+        bit_length = int(bits.size)
 
         if bit_length > max_bits:
             raise ValueError(f"Pesan terlalu panjang! Kapasitas: {max_bits} bit, Dibutuhkan: {bit_length} bit.")
 
         # Konversi ke YCrCb (WAJIB untuk metode ini)
-        ycrcb = cv2.cvtColor(cover_image, cv2.COLOR_RGB2YCrCb)
-        y_channel = ycrcb[:, :, 0].astype(np.float32)
-        stego_y = y_channel.copy()
-        height, width = y_channel.shape
-        binary_index = 0
+        ycrcb = stack_cvt_color(cover_stack, cv2.COLOR_RGB2YCrCb)
 
-        for i in range(height // self.block_size):
-            for j in range(width // self.block_size):
-                if binary_index >= bit_length: break
+        # Setiap kanal target diproses di thread-nya sendiri (kanal tidak saling tumpang tindih)
+        def process(task):
+            spec, (start, stop) = task
+            plane = ycrcb[..., spec[0]].astype(np.float32)
+            self._embed_plane(plane, bits[start:stop], spec, plan)
+            ycrcb[..., spec[0]] = plane.astype(np.uint8)
 
-                row_start, col_start = i * self.block_size, j * self.block_size
-                block = stego_y[row_start:row_start+self.block_size, col_start:col_start+self.block_size]
+        map_tiles(process, list(zip(self._channel_specs(), self._split_bits(bit_length, cover_stack.shape[1:]))),
+                  self.workers)
 
-                dct_block = self._dct2d(block - 128.0)
+        # Kembalikan gambar stego dalam format RGB
+        return stack_cvt_color(ycrcb, cv2.COLOR_YCrCb2RGB)
 
-                for u, v in self.embed_positions:
-                    if binary_index >= bit_length: break
+    def _embed_plane(self, stego_y: np.ndarray, bits: np.ndarray, spec, plan=None):
+        """QIM paritas pada koefisien DCT satu kanal (N, H, W) float32, langsung di array."""
+        bit_length = int(bits.size)
+        positions = spec[2]
 
-                    quant_step = self.quant_factor * self.jpeg_quant_table[u, v] / 50.0
-                    quant_coef = np.round(dct_block[u, v] / quant_step)
-                    bit = int(binary_message[binary_index])
+        # Hanya blok yang memuat bit pesan yang ditransformasi (batch dctn)
+        block_count = -(-bit_length // len(positions))
+        rows, cols = self._block_index(block_count, stego_y.shape[2], plan)
+        dct_blocks = self._dct2d(stego_y[:, rows, cols] - 128.0)
+        self._write_blocks(stego_y, dct_blocks, rows, cols, bits, spec)
 
-                    if (quant_coef % 2) != bit:
-                        quant_coef += 1 if quant_coef >= 0 else -1
+    def _write_blocks(self, stego_y: np.ndarray, dct_blocks: np.ndarray, rows, cols, bits: np.ndarray, spec):
+        """
+        QIM + inverse DCT untuk blok yang sudah ditransformasi (diubah di
+        tempat), lalu menulis hasilnya ke stego_y. Dipisah dari _embed_plane
+        agar transformasi maju bisa di-cache (lihat methods.strength_tuner).
+        """
+        bit_length = int(bits.size)
+        block_count = dct_blocks.shape[1]
+        us, vs, steps = self._position_steps(block_count, spec)
+        coefs = dct_blocks[..., us, vs].reshape(len(stego_y), -1)[:, :bit_length]
+        quant_coef = np.round(coefs / steps[:bit_length])
 
-                    dct_block[u, v] = quant_coef * quant_step
-                    binary_index += 1
+        mismatch = (quant_coef % 2) != bits
+        quant_coef = np.where(mismatch, quant_coef + np.where(quant_coef >= 0, 1.0, -1.0), quant_coef)
 
-                idct_block = self._idct2d(dct_block) + 128.0
-                stego_y[row_start:row_start+self.block_size, col_start:col_start+self.block_size] = np.clip(idct_block, 0, 255)
-            if binary_index >= bit_length: break
+        flat = dct_blocks[..., us, vs].reshape(len(stego_y), -1)
+        flat[:, :bit_length] = quant_coef * steps[:bit_length]
+        dct_blocks[..., us, vs] = flat.reshape(len(stego_y), block_count, len(us))
 
-        # Gabungkan kembali kanal dan konversi kembali ke RGB
-        ycrcb[:, :, 0] = stego_y.astype(np.uint8)
+        idct_blocks = self._idct2d(dct_blocks) + 128.0
+        stego_y[:, rows, cols] = np.clip(idct_blocks, 0, 255)
 
-        # Kembalikan gambar stego dalam format RGB
-        return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2RGB), bit_length
+    def _extract_stack(self, stego_stack: np.ndarray, bit_length: int, plan=None) -> list:
+        """Mengekstrak bit_length bit dari setiap gambar dalam stack (N, H, W, 3)."""
+        return [bit_array_to_message(row) for row in self._extract_bits_stack(stego_stack, bit_length, plan)]
+
+    def _extract_bits_stack(self, stego_stack: np.ndarray, bit_length: int, plan=None) -> np.ndarray:
+        """Membaca bit_length bit pertama dari setiap gambar sebagai array uint8 (N, bit)."""
+        if plan is not None:
+            plan.check(self, stego_stack.shape[1:])
+        # Konversi ke YCrCb untuk ekstraksi (WAJIB untuk metode ini)
+        ycrcb = stack_cvt_color(stego_stack, cv2.COLOR_RGB2YCrCb)
+
+        bit_length = min(bit_length, self._calculate_capacity(stego_stack.shape[1:]))
+
+        def process(task):
+            spec, (start, stop) = task
+            return self._extract_plane(ycrcb[..., spec[0]].astype(np.float32), stop - start, spec, plan)
 
-    def extract(self, stego_image: np.ndarray, bit_length: int) -> str:
+        parts = map_tiles(process, list(zip(self._channel_specs(), self._split_bits(bit_length, stego_stack.shape[1:]))),
+                          self.workers)
+        return np.concatenate(parts, axis=1)
+
+    def _extract_plane(self, y_channel: np.ndarray, bit_length: int, spec, plan=None) -> np.ndarray:
+        """Membaca paritas kuantisasi bit_length koefisien pertama dari satu kanal (N, H, W)."""
+        block_count = -(-bit_length // len(spec[2]))
+        rows, cols = self._block_index(block_count, y_channel.shape[2], plan)
+        dct_blocks = self._dct2d(y_channel[:, rows, cols] - 128.0)
+
+        us, vs, steps = self._position_steps(block_count, spec)
+        coefs = dct_blocks[..., us, vs].reshape(len(y_channel), -1)[:, :bit_length]
+        quant_coef = np.round(coefs / steps[:bit_length])
+        return np.mod(quant_coef.astype(np.int64), 2).astype(np.uint8)
+    
+    def extract_sweep(self, stego_image: np.ndarray, bit_length: int, quant_factors=None,
+                      presets: dict | None = None, top_k: int | None = None) -> list:
         """
-        Mengekstrak pesan rahasia dari gambar stego RGB.
+        Ekstraksi untuk banyak tebakan quant_factor x preset posisi sekaligus.
+
+        Koefisien DCT tidak bergantung pada quant_factor maupun posisi, jadi
+        blok cukup ditransformasi sekali; paritas untuk seluruh grid
+        quant_factor dihitung dalam satu langkah vektor per preset. Hasil
+        diurutkan berdasarkan skor plausibilitas teks (DCT tidak punya header CRC).
+
+        Args:
+            stego_image (np.ndarray): Gambar stego RGB (H, W, 3).
+            bit_length (int): Panjang pesan dalam bit.
+            quant_factors (sequence | None): Grid quant_factor (default DCT_SWEEP_QUANT_FACTORS).
+            presets (dict | None): nama -> embed_positions (default DCT_POSITION_PRESETS).
+            top_k (int | None): Hanya kembalikan k kandidat terbaik.
+
+        Returns:
+            list: dict {'score', 'quant_factor', 'preset', 'embed_positions', 'message'},
+                  skor tertinggi lebih dulu.
         """
-        # --- MODIFIKASI ---
-        # Cek grayscale dihapus. Asumsikan stego_image adalah RGB.
-        # ---
+        if len(self.channels) != 1:
+            raise ValueError("extract_sweep hanya mendukung DCT satu kanal.")
+        quant_factors = list(DCT_SWEEP_QUANT_FACTORS if quant_factors is None else quant_factors)
+        index = self._channel_specs()[0][0]
+        plane = stack_cvt_color(stego_image[None], cv2.COLOR_RGB2YCrCb)[0, ..., index].astype(np.float32)
+
+        candidates = []
+        for name, positions, parity in self._sweep_parity(plane, bit_length, quant_factors, presets):
+            for quant_factor, bits, score in zip(quant_factors, parity, score_bit_rows(parity)):
+                candidates.append({'score': float(score), 'quant_factor': quant_factor, 'preset': name,
+                                   'embed_positions': list(positions), 'message': decode_text(bits)[0]})
+
+        candidates.sort(key=lambda c: c['score'], reverse=True)
+        return candidates[:top_k] if top_k else candidates
+
+    def _sweep_parity(self, plane: np.ndarray, bit_length: int, quant_factors, presets: dict | None = None):
+        """
+        Paritas untuk setiap preset posisi x quant_factor dari satu bidang
+        YCrCb (H, W) yang sudah dikonversi; blok cukup ditransformasi sekali.
+
+        Yields:
+            tuple: (nama preset, embed_positions, paritas uint8 (len(quant_factors), bit)).
+        """
+        presets = dict(DCT_POSITION_PRESETS if presets is None else presets)
+        table = self._channel_specs()[0][3]
+        height, width = plane.shape
+        total_blocks = (height // self.block_size) * (width // self.block_size)
+
+        # Satu kali DCT untuk blok terbanyak yang dibutuhkan preset mana pun
+        block_count = min(total_blocks, max(-(-bit_length // len(p)) for p in presets.values()))
+        rows, cols = self._block_index(block_count, width)
+        dct_blocks = self._dct2d(plane[rows, cols] - 128.0)
+
+        q_grid = np.asarray(quant_factors, dtype=np.float64)[:, None]
+        for name, positions in presets.items():
+            length = min(bit_length, total_blocks * len(positions))
+            us = np.array([u for u, _ in positions])
+            vs = np.array([v for _, v in positions])
+            coefs = dct_blocks[:, us, vs].reshape(-1)[:length]
+            steps = np.tile(q_grid * table[us, vs] / 50.0, block_count)[:, :length]
+            yield name, positions, np.mod(np.round(coefs / steps).astype(np.int64), 2).astype(np.uint8)
+
+    # --- Mode JPEG-native ---
+    # Urutan komponen JFIF adalah Y, Cb, Cr
+    JPEG_COMPONENT = {"Y": 0, "Cb": 1, "Cr": 2}
+
+    def _jpeg_slots(self, jpeg) -> list:
+        """
+        Koefisien terkuantisasi yang membawa bit, per kanal target.
+
+        Returns:
+            list: (komponen, us, vs) untuk setiap kanal, urutan Y, Cr, Cb.
+        """
+        slots = []
+        for name in self.channels:
+            index = self.JPEG_COMPONENT[name]
+            if index >= len(jpeg.components):
+                raise ValueError(f"JPEG tidak memiliki kanal {name} (hanya {len(jpeg.components)} komponen).")
+            positions = self.channels[name].get("embed_positions", self.embed_positions)
+            us = np.array([u for u, _ in positions])
+            vs = np.array([v for _, v in positions])
+            if us.max() >= 8 or vs.max() >= 8:
+                raise ValueError("Posisi embed JPEG harus berada di dalam blok 8x8.")
+            slots.append((jpeg.components[index], us, vs))
+        return slots
+
+    def jpeg_capacity(self, jpeg_source) -> int:
+        """Kapasitas (bit) mode JPEG-native untuk sebuah file / bytes JPEG."""
+        jpeg = read_jpeg(jpeg_source)
+        return sum(comp.blocks_y * comp.blocks_x * len(us) for comp, us, _ in self._jpeg_slots(jpeg))
+
+    def embed_jpeg(self, cover_jpeg, secret_message: str, output_path: str | None = None) -> tuple:
+        """
+        Menyisipkan pesan langsung pada koefisien DCT terkuantisasi sebuah JPEG
+        baseline (paritas, aturan yang sama dengan mode piksel) tanpa decode /
+        encode di domain piksel. Langkah kuantisasi adalah tabel DQT milik file
+        itu sendiri, jadi quant_factor tidak dipakai di mode ini.
+
+        Args:
+            cover_jpeg (str | bytes): Path atau isi file JPEG cover.
+            secret_message (str): Pesan rahasia.
+            output_path (str | None): Jika diisi, JPEG stego juga ditulis ke sini.
+
+        Returns:
+            tuple: (stego_jpeg (bytes), bit_length (int))
+        """
+        jpeg = read_jpeg(cover_jpeg)
+        bits = message_to_bit_array(secret_message)
+        bit_length = int(bits.size)
+
+        slots = self._jpeg_slots(jpeg)
+        capacities = [comp.blocks_y * comp.blocks_x * len(us) for comp, us, _ in slots]
+        if bit_length > sum(capacities):
+            raise ValueError(f"Pesan terlalu panjang! Kapasitas: {sum(capacities)} bit, Dibutuhkan: {bit_length} bit.")
+
+        for (comp, us, vs), (start, stop) in zip(slots, self._split_bits(bit_length, None, capacities)):
+            count = stop - start
+            if count == 0:
+                continue
+            blocks = comp.blocks.reshape(-1, 8, 8)
+            block_count = -(-count // len(us))
+            q = blocks[:block_count, us, vs].reshape(-1)[:count]
+
+            # Paritas: geser menjauhi nol; jika keluar rentang baseline, geser ke arah nol
+            step = np.where(q >= 0, 1, -1)
+            limit = np.where(np.tile((us == 0) & (vs == 0), block_count)[:count], DC_LIMIT, AC_LIMIT)
+            moved = np.where(np.abs(q + step) > limit, q - step, q + step)
+            q = np.where((q % 2) != bits[start:stop], moved, q)
+
+            flat = blocks[:block_count, us, vs].reshape(-1)
+            flat[:count] = q
+            blocks[:block_count, us, vs] = flat.reshape(block_count, len(us))
+            comp.coefs[:comp.blocks_y, :comp.blocks_x] = blocks.reshape(comp.blocks.shape)
+
+        return write_jpeg(jpeg, output_path), bit_length
+
+    def extract_jpeg(self, stego_jpeg, bit_length: int) -> str:
+        """Mengekstrak pesan dari JPEG hasil embed_jpeg (path atau bytes)."""
+        jpeg = read_jpeg(stego_jpeg)
+        slots = self._jpeg_slots(jpeg)
+        capacities = [comp.blocks_y * comp.blocks_x * len(us) for comp, us, _ in slots]
+        bit_length = min(bit_length, sum(capacities))
+
+        parts = []
+        for (comp, us, vs), (start, stop) in zip(slots, self._split_bits(bit_length, None, capacities)):
+            count = stop - start
+            block_count = -(-count // len(us))
+            q = comp.blocks.reshape(-1, 8, 8)[:block_count, us, vs].reshape(-1)[:count]
+            parts.append(np.mod(q, 2).astype(np.uint8))
+        return bit_array_to_message(np.concatenate(parts))
+
 
-        # Konversi ke YCrCb untuk ekstraksi (WAJIB untuk metode ini)
-        ycrcb = cv2.cvtColor(stego_image, cv2.COLOR_RGB2YCrCb)
-        y_channel = ycrcb[:, :, 0].astype(np.float32)
-        height, width = y_channel.shape
-        bit_buffer = ""
-        bits_extracted = 0
-
-        for i in range(height // self.block_size):
-            for j in range(width // self.block_size):
-                if bits_extracted >= bit_length: break
-
-                row_start, col_start = i * self.block_size, j * self.block_size
-                block = y_channel[row_start:row_start+self.block_size, col_start:col_start+self.block_size]
-                dct_block = self._dct2d(block - 128.0)
-
-                for u, v in self.embed_positions:
-                    if bits_extracted >= bit_length: break
-
-                    quant_step = self.quant_factor * self.jpeg_quant_table[u, v] / 50.0
-                    quant_coef = np.round(dct_block[u, v] / quant_step)
-                    bit_buffer += str(int(quant_coef) % 2)
-                    bits_extracted += 1
-            if bits_extracted >= bit_length: break
-
-        final_binary_string = bit_buffer[:bit_length]
-        return binary_to_message(final_binary_string)
-    
 DCT_POSITION_MID_LOW = [(1, 1), (2, 0), (0, 2), (3, 0), (0, 3)]
 DCT_POSITION_MID = [(2, 1), (1, 2), (2, 2), (3, 1), (1, 3)]
 DCT_POSITION_HIGH = [(4, 4), (5, 3), (3, 5), (6, 2), (2, 6)]
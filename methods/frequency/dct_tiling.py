@@ -0,0 +1,57 @@
+import numpy as np
+from methods.frequency.dct import DCTSteganography
+from methods.spatial.streaming import StreamingSpatialEngine
+
+
+class TiledDCTExecutor(StreamingSpatialEngine):
+    """
+    Block-aligned tiled DCT pipeline with parallel workers.
+
+    Blok 8x8 saling independen, jadi bidang Y dibagi menjadi pita baris yang
+    sejajar dengan blok. Setiap pita dikonversi ke YCrCb, ditransformasi,
+    dikuantisasi, di-inverse dan dikonversi kembali ke RGB di worker-nya
+    sendiri. Bit dibagikan secara deterministik dalam urutan blok (prefix sum
+    dari kapasitas tiap pita), sehingga hasilnya identik dengan
+    `DCTSteganography.embed`.
+
+    Mendukung:
+    - embed / extract pada array di memori (thread atau process pool),
+    - embed_file / extract_file yang membaca cover dari TIFF / .npy / memmap
+      per pita dan menulis hasil langsung ke disk.
+    """
+    SUPPORTED = (DCTSteganography,)
+    # Konversi RGB -> YCrCb -> RGB juga mengubah piksel di luar blok yang disisipi
+    TOUCHES_ALL_BANDS = True
+    # Pita uint8 + kanal YCrCb + Y float32 + blok DCT float64
+    WORKING_BYTES_PER_SAMPLE = 24
+
+    def __init__(self, method, band_blocks: int = 32, workers: int | None = None,
+                 executor: str = "thread", tile_budget_mb: float = 256):
+        """
+        Args:
+            method (DCTSteganography): Instance DCT yang dipakai.
+            band_blocks (int): Tinggi pita dalam baris blok (untuk embed / extract di memori).
+            workers (int | None): Jumlah worker; None = os.cpu_count().
+            executor (str): "thread" atau "process" untuk embed / extract di memori.
+            tile_budget_mb (float): Batas memori pita untuk embed_file / extract_file.
+        """
+        super().__init__(method, tile_budget_mb=tile_budget_mb, workers=workers, executor=executor)
+        if len(method.channels) != 1:
+            # Bit dibagi antar kanal sebanding kapasitas seluruh gambar, jadi tidak bisa dipecah per pita
+            raise ValueError("TiledDCTExecutor only supports single-channel DCT (one entry in `channels`).")
+        self.band_rows = self._align(band_blocks * method.block_size)
+
+    def _align(self, rows: int) -> int:
+        """Membulatkan tinggi pita ke kelipatan block_size."""
+        block_size = self.method.block_size
+        return max(block_size, rows - rows % block_size)
+
+    def _fit_band_rows(self, width: int):
+        super()._fit_band_rows(width)
+        self.band_rows = self._align(self.band_rows)
+
+    def band_capacities(self, image, bit_length: int | None = None) -> np.ndarray:
+        """Kapasitas bit setiap pita: jumlah blok penuh x jumlah posisi (pita sejajar blok)."""
+        height, width = image.shape[:2]
+        return np.array([self.method._calculate_capacity((r1 - r0, width)) for r0, r1 in self.bands(height)],
+                        dtype=np.int64)
@@ -1,9 +1,14 @@
+import os
 import numpy as np
 import cv2
 import pywt
-from helpers.message_binary import message_to_binary, binary_to_message
+from helpers.message_binary import message_to_binary, bits_to_binary_string, bit_array_to_message
+from helpers.batching import BatchEmbeddingMixin, stack_cvt_color
+from helpers.position_sampler import select_positions
+from helpers.embedding_plan import EmbeddingPlan
+from helpers.tiled_io import map_tiles
 
-class DWTSteganography:
+class DWTSteganography(BatchEmbeddingMixin):
     """
     Steganografi dalam domain DWT dengan penyisipan QIM (paritas) menggunakan bit_length logic.
 
@@ -16,7 +21,8 @@ class DWTSteganography:
     """
     def __init__(self, wavelet='haar', level=1, band='HL', delta: float | None = None,
                  embed_level=1, robust_mode=True, header_reps=5, payload_reps=3,
-                 interleave_seed=1337, min_delta=5.0):
+                 interleave_seed=1337, min_delta=5.0, position_key=None,
+                 tile_size=None, workers=None):
         """
         Inisialisasi objek DWTSteganography.
 
@@ -31,6 +37,11 @@ class DWTSteganography:
             payload_reps (int): Jumlah repetisi untuk setiap bit payload (jika robust_mode True).
             interleave_seed (int): Seed untuk proses interleaving acak (jika robust_mode True).
             min_delta (float): Nilai delta minimum yang diizinkan saat dihitung secara adaptif.
+            position_key (int | None): Kunci pemilihan koefisien acak-semu di sub-band.
+                                       None = koefisien diisi berurutan dari awal.
+            tile_size (int | None): None = satu DWT untuk seluruh bidang Y. Jika diisi,
+                                    DWT + QIM dilakukan per tile (tile_size x tile_size).
+            workers (int | None): Jumlah thread untuk mode tile (None = os.cpu_count()).
         """
         # --- Parameter Transformasi ---
         self.wavelet = wavelet
@@ -45,6 +56,12 @@ class DWTSteganography:
         self.payload_reps = int(payload_reps)
         self.interleave_seed = int(interleave_seed)
         self.min_delta = float(min_delta)
+        self.position_key = position_key
+
+        # --- Parameter Mode Tile ---
+        self.tile_size = None if tile_size is None else int(tile_size)
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self._tile_plans = {}
 
         # --- Validasi Input ---
         if self.band not in ['LL', 'LH', 'HL', 'HH']:
@@ -52,6 +69,8 @@ class DWTSteganography:
         if self.level < 1 or self.embed_level < 1 or self.embed_level > self.level:
             raise ValueError(f"Level tidak valid: level={self.level}, embed_level={self.embed_level}. Syarat: 1 <= embed_level <= level.")
         pywt.Wavelet(self.wavelet) # Akan error jika wavelet tidak valid
+        if self.tile_size is not None and self.tile_size < 2 ** self.level:
+            raise ValueError(f"tile_size harus minimal 2**level = {2 ** self.level}.")
 
     def _repeat_bits(self, s: str, r: int) -> str:
         if r <= 1: return s
@@ -72,11 +91,30 @@ class DWTSteganography:
         arr = np.empty_like(idx, dtype='<U1'); arr[idx] = list(s)
         return ''.join(arr)
 
-    def _calculate_adaptive_delta(self, coeffs_flat: np.ndarray) -> float:
+    def _calculate_adaptive_delta(self, coeffs_flat: np.ndarray):
+        # Dihitung di sumbu terakhir: (S,) -> float, (N, S) -> array per gambar
         coeffs_abs = np.abs(coeffs_flat)
-        std = float(np.std(coeffs_abs))
-        mean = float(np.mean(coeffs_abs))
-        return float(np.clip(0.15 * std + 0.05 * mean, 2.0, 20.0))
+        std = np.std(coeffs_abs, axis=-1)
+        mean = np.mean(coeffs_abs, axis=-1)
+        return np.clip(0.15 * std + 0.05 * mean, 2.0, 20.0)
+
+    def _used_delta(self, sub_flat: np.ndarray) -> np.ndarray:
+        """Delta per gambar untuk sub-band (N, S)."""
+        if self.delta is None:
+            used_delta = self._calculate_adaptive_delta(sub_flat)
+        else:
+            used_delta = np.full(sub_flat.shape[0], self.delta)
+        return np.maximum(used_delta, self.min_delta)
+
+    def _decompose(self, image_stack: np.ndarray):
+        """YCrCb + wavedec2 untuk stack (N, H, W, 3) sekaligus."""
+        ycrcb = stack_cvt_color(image_stack, cv2.COLOR_RGB2YCrCb)
+        y = ycrcb[..., 0].astype(np.float32)
+        return ycrcb, y, self._wavedec(y)
+
+    def _wavedec(self, y: np.ndarray):
+        """wavedec2 untuk bidang Y float32 (N, H, W) yang sudah dikonversi."""
+        return pywt.wavedec2(y, self.wavelet, mode='symmetric', level=self.level, axes=(-2, -1))
 
     def _get_subband_ref(self, coeffs):
         if self.band == 'LL':
@@ -91,72 +129,231 @@ class DWTSteganography:
                 coeffs[-self.embed_level] = tuple(lst)
         return subband, setter
 
+    def _subband_size(self, image_shape) -> int:
+        """Jumlah koefisien sub-band target tanpa menghitung DWT (hanya dari ukuran)."""
+        shapes = pywt.wavedecn_shapes(tuple(image_shape[:2]), self.wavelet, level=self.level)
+        sub_shape = shapes[0] if self.band == 'LL' else shapes[-self.embed_level]['dd']
+        return int(np.prod(sub_shape))
+
+    def _coef_index(self, image_shape, count: int, plan=None) -> np.ndarray:
+        """Indeks `count` koefisien pertama di sub-band, dari plan jika ada."""
+        if plan is not None:
+            plan.check(self, image_shape)
+            return plan.take('coef_index', count)
+        return select_positions(self._subband_size(image_shape), count, self.position_key)
+
+    def _build_plan(self, image_shape, max_bits=None) -> EmbeddingPlan:
+        """
+        Menyiapkan indeks koefisien sub-band untuk gambar berukuran `image_shape`
+        (lihat methods.registry.compile_plan). Pada mode tile, plan berisi satu
+        sub-plan untuk setiap ukuran tile yang berbeda.
+        """
+        reps = self.payload_reps if self.robust_mode else 1
+        if self.tile_size is not None:
+            tiles = self._tile_grid(image_shape)
+            tile_shapes = sorted({self._tile_shape(tile) for tile in tiles})
+            size = sum(self._subband_size(self._tile_shape(tile)) for tile in tiles)
+            max_bits = size // reps if max_bits is None else min(max_bits, size // reps)
+            return EmbeddingPlan(self, image_shape, max_bits,
+                                 parts=tuple(self._tile_plan(shape) for shape in tile_shapes),
+                                 meta={'tile_shapes': tile_shapes})
+        size = self._subband_size(image_shape)
+        max_bits = size // reps if max_bits is None else min(max_bits, size // reps)
+        coef_index = self._coef_index(image_shape, max_bits * reps)
+        return EmbeddingPlan(self, image_shape, max_bits, {'coef_index': coef_index})
+
+    # --- Mode Tile ---
+    def _tile_grid(self, image_shape) -> list:
+        """
+        Batas (y0, y1, x0, x1) setiap tile dalam urutan raster. Sisa baris / kolom
+        di tepi digabung ke tile terakhir, jadi seluruh gambar tercakup dan setiap
+        tile berukuran antara tile_size dan 2*tile_size-1.
+        """
+        def edges(length):
+            count = max(1, length // self.tile_size)
+            starts = [i * self.tile_size for i in range(count)]
+            return list(zip(starts, starts[1:] + [length]))
+        height, width = image_shape[:2]
+        return [(y0, y1, x0, x1) for y0, y1 in edges(height) for x0, x1 in edges(width)]
+
+    @staticmethod
+    def _tile_shape(tile) -> tuple:
+        y0, y1, x0, x1 = tile
+        return (y1 - y0, x1 - x0, 3)
+
+    def _tile_plan(self, tile_shape, plan=None) -> EmbeddingPlan:
+        """Indeks koefisien untuk satu ukuran tile, dari plan atau cache instance."""
+        if plan is not None:
+            return plan.parts[plan.meta['tile_shapes'].index(tile_shape)]
+        tile_plan = self._tile_plans.get(tile_shape)
+        if tile_plan is None:
+            size = self._subband_size(tile_shape)
+            tile_plan = EmbeddingPlan(self, tile_shape, size,
+                                      {'coef_index': select_positions(size, size, self.position_key)})
+            self._tile_plans[tile_shape] = tile_plan
+        return tile_plan
+
+    def tile_capacities(self, image_shape) -> np.ndarray:
+        """
+        Kapasitas (jumlah koefisien sub-band) setiap tile sebagai grid
+        (tiles_y, tiles_x), hanya dihitung dari ukuran gambar.
+        """
+        if self.tile_size is None:
+            return np.array([[self._subband_size(image_shape)]])
+        tiles = self._tile_grid(image_shape)
+        tiles_x = len({tile[2] for tile in tiles})
+        sizes = [self._subband_size(self._tile_shape(tile)) for tile in tiles]
+        return np.array(sizes).reshape(-1, tiles_x)
+
+    def _tile_segments(self, image_shape, count: int) -> list:
+        """(tile, start, stop): potongan bitstream untuk setiap tile yang membawa bit."""
+        segments, offset = [], 0
+        for tile in self._tile_grid(image_shape):
+            size = self._subband_size(self._tile_shape(tile))
+            if offset < count:
+                segments.append((tile, offset, min(offset + size, count)))
+            offset += size
+        return segments
+
+    def _embed_tiles(self, cover_stack: np.ndarray, bitstream: np.ndarray, plan=None) -> np.ndarray:
+        """
+        Mode tile dari _embed_stack: bitstream mengisi tile secara berurutan,
+        setiap tile didekomposisi (ekstensi simetris di batas tile), diberi QIM
+        dan direkonstruksi di worker-nya sendiri. Tile tanpa bit tidak disentuh.
+        """
+        stego_stack = cover_stack.copy()
+
+        def process(segment):
+            (y0, y1, x0, x1), start, stop = segment
+            tile = cover_stack[:, y0:y1, x0:x1]
+            ycrcb, y, coeffs = self._decompose(tile)
+            sub, setter = self._get_subband_ref(coeffs)
+            sub_flat = sub.astype(np.float64).reshape(len(tile), -1)
+            idx = self._coef_index(tile.shape[1:], stop - start, self._tile_plan(tile.shape[1:], plan))
+            self._qim_embed(sub_flat, idx, bitstream[start:stop])
+            setter(sub_flat.reshape(sub.shape))
+            stego_stack[:, y0:y1, x0:x1] = self._reconstruct(ycrcb, y, coeffs)
+
+        map_tiles(process, self._tile_segments(cover_stack.shape[1:], len(bitstream)), self.workers)
+        return stego_stack
+
+    def _read_tiles(self, stego_stack: np.ndarray, count: int, plan=None) -> np.ndarray:
+        """Mode tile dari pembacaan paritas QIM: (N, count) bit int64."""
+        def process(segment):
+            (y0, y1, x0, x1), start, stop = segment
+            tile = stego_stack[:, y0:y1, x0:x1]
+            _, _, coeffs = self._decompose(tile)
+            sub, _ = self._get_subband_ref(coeffs)
+            idx = self._coef_index(tile.shape[1:], stop - start, self._tile_plan(tile.shape[1:], plan))
+            return self._qim_read(sub.astype(np.float64).reshape(len(tile), -1), idx)
+
+        parts = map_tiles(process, self._tile_segments(stego_stack.shape[1:], count), self.workers)
+        return np.concatenate(parts, axis=1) if parts else np.zeros((len(stego_stack), 0), dtype=np.int64)
+
+    # --- QIM ---
+    def _qim_embed(self, sub_flat: np.ndarray, idx: np.ndarray, bitstream: np.ndarray):
+        """QIM paritas pada koefisien `idx` dari sub-band (N, S), langsung di sub_flat."""
+        used_delta = self._used_delta(sub_flat)[:, None]
+        q = np.round(sub_flat[:, idx] / used_delta)
+        mismatch = (q.astype(np.int64) & 1) != bitstream
+        q = np.where(mismatch, q + np.where(q >= 0, 1.0, -1.0), q)
+        sub_flat[:, idx] = q * used_delta
+
+    def _qim_read(self, sub_flat: np.ndarray, idx: np.ndarray) -> np.ndarray:
+        """Paritas kuantisasi koefisien `idx` dari sub-band (N, S)."""
+        used_delta = self._used_delta(sub_flat)[:, None]
+        return np.round(sub_flat[:, idx] / used_delta).astype(np.int64) & 1
+
+    def _reconstruct(self, ycrcb: np.ndarray, y: np.ndarray, coeffs) -> np.ndarray:
+        """waverec2 + kembali ke RGB untuk stack (N, H, W, 3)."""
+        y_rec = pywt.waverec2(coeffs, self.wavelet, mode='symmetric', axes=(-2, -1))[:, :y.shape[1], :y.shape[2]]
+        ycrcb[..., 0] = np.clip(y_rec, 0, 255).astype(np.uint8)
+        return stack_cvt_color(ycrcb, cv2.COLOR_YCrCb2RGB)
+
     def calculate_capacity_bits(self, image_rgb: np.ndarray) -> int:
-        ycrcb = cv2.cvtColor(image_rgb, cv2.COLOR_RGB2YCrCb)
-        coeffs = pywt.wavedec2(ycrcb[:, :, 0].astype(np.float32), self.wavelet, level=self.level)
+        if self.tile_size is not None:
+            return int(self.tile_capacities(image_rgb.shape).sum())
+        _, _, coeffs = self._decompose(image_rgb[None])
         sub, _ = self._get_subband_ref(coeffs)
-        return max(0, sub.size)
+        return max(0, sub[0].size)
+
+    def embed(self, cover_image: np.ndarray, secret_message: str, plan=None):
+        stego_stack, bit_length = self._embed_stack(cover_image[None], secret_message, plan)
+        return stego_stack[0], bit_length
+
+    def extract(self, stego_image: np.ndarray, bit_length: int, plan=None):
+        return self._extract_stack(stego_image[None], bit_length, plan)[0]
 
-    def embed(self, cover_image: np.ndarray, secret_message: str):
+    def _embed_stack(self, cover_stack: np.ndarray, secret_message: str, plan=None):
         # Convert message to binary
         binary_message = message_to_binary(secret_message)
         bit_length = len(binary_message)
 
-        if bit_length > self.calculate_capacity_bits(cover_image):
-            raise ValueError(f"Pesan terlalu panjang! Kapasitas: {self.calculate_capacity_bits(cover_image)} bit, Dibutuhkan: {bit_length} bit.")
-
-        ycrcb = cv2.cvtColor(cover_image, cv2.COLOR_RGB2YCrCb)
-        y = ycrcb[:, :, 0].astype(np.float32)
-        coeffs = pywt.wavedec2(y, self.wavelet, level=self.level)
-        sub, setter = self._get_subband_ref(coeffs)
-        sub_flat = sub.astype(np.float64).ravel()
-
-        used_delta = self._calculate_adaptive_delta(sub_flat) if self.delta is None else self.delta
-        used_delta = max(used_delta, self.min_delta)
-
         if self.robust_mode:
             data_bits = self._interleave(self._repeat_bits(binary_message, self.payload_reps), self.interleave_seed)
         else:
             data_bits = binary_message
-
         bitstream = np.fromiter(data_bits, dtype=np.int8)
-        q = np.round(sub_flat[:len(bitstream)] / used_delta)
-        mismatch = (q.astype(np.int64) & 1) != bitstream
-        q[mismatch] += np.where(q[mismatch] >= 0, 1.0, -1.0)
-        sub_flat[:len(bitstream)] = q * used_delta
 
-        setter(sub_flat.reshape(sub.shape))
-        y_rec = pywt.waverec2(coeffs, self.wavelet)[:y.shape[0], :y.shape[1]]
-        ycrcb[:, :, 0] = np.clip(y_rec, 0, 255).astype(np.uint8)
-        return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2RGB), bit_length
-
-    def extract(self, stego_image: np.ndarray, bit_length: int):
-        ycrcb = cv2.cvtColor(stego_image, cv2.COLOR_RGB2YCrCb)
-        y = ycrcb[:, :, 0].astype(np.float32)
-        coeffs = pywt.wavedec2(y, self.wavelet, level=self.level)
-        sub, _ = self._get_subband_ref(coeffs)
-        sub_flat = sub.astype(np.float64).ravel()
+        if self.tile_size is not None:
+            if plan is not None:
+                plan.check(self, cover_stack.shape[1:])
+            capacity = int(self.tile_capacities(cover_stack.shape[1:]).sum())
+            if len(bitstream) > capacity:
+                raise ValueError(f"Pesan terlalu panjang! Kapasitas: {capacity} bit, Dibutuhkan: {len(bitstream)} bit.")
+            return self._embed_tiles(cover_stack, bitstream, plan), bit_length
+
+        ycrcb, y, coeffs = self._decompose(cover_stack)
+        sub, setter = self._get_subband_ref(coeffs)
+        sub_flat = sub.astype(np.float64).reshape(len(cover_stack), -1)
+
+        if bit_length > sub_flat.shape[1]:
+            raise ValueError(f"Pesan terlalu panjang! Kapasitas: {sub_flat.shape[1]} bit, Dibutuhkan: {bit_length} bit.")
+
+        idx = self._coef_index(cover_stack.shape[1:], len(bitstream), plan)
+        self._qim_embed(sub_flat, idx, bitstream)
 
-        if sub_flat.size < bit_length:
-            return ""
+        setter(sub_flat.reshape(sub.shape))
+        return self._reconstruct(ycrcb, y, coeffs), bit_length
 
-        used_delta = self._calculate_adaptive_delta(sub_flat) if self.delta is None else self.delta
-        used_delta = max(used_delta, self.min_delta)
+    def _extract_stack(self, stego_stack: np.ndarray, bit_length: int, plan=None):
+        return [bit_array_to_message(bits) for bits in self._extract_bits_stack(stego_stack, bit_length, plan)]
 
+    def _extract_bits_stack(self, stego_stack: np.ndarray, bit_length: int, plan=None) -> list:
+        """
+        Reads the first `bit_length` message bits of every image (robust mode
+        decoded), one uint8 array per image; empty when capacity is too small.
+        """
         # Calculate the effective number of bits to extract based on robust mode
         effective_bit_length = bit_length * (self.payload_reps if self.robust_mode else 1)
 
-        qa = np.round(sub_flat[:effective_bit_length] / used_delta).astype(np.int64)
-        bits_payload = ''.join(map(str, qa & 1))
+        if self.tile_size is not None:
+            if plan is not None:
+                plan.check(self, stego_stack.shape[1:])
+            capacity = int(self.tile_capacities(stego_stack.shape[1:]).sum())
+            if capacity < bit_length:
+                return [np.zeros(0, dtype=np.uint8) for _ in range(len(stego_stack))]
+            parity = self._read_tiles(stego_stack, min(effective_bit_length, capacity), plan)
+        else:
+            _, _, coeffs = self._decompose(stego_stack)
+            sub, _ = self._get_subband_ref(coeffs)
+            sub_flat = sub.astype(np.float64).reshape(len(stego_stack), -1)
 
-        if self.robust_mode:
-            bits_payload = self._deinterleave(bits_payload, self.interleave_seed)
-            bits_payload = self._majority_decode(bits_payload, self.payload_reps)
+            if sub_flat.shape[1] < bit_length:
+                return [np.zeros(0, dtype=np.uint8) for _ in range(len(stego_stack))]
+
+            idx = self._coef_index(stego_stack.shape[1:], min(effective_bit_length, sub_flat.shape[1]), plan)
+            parity = self._qim_read(sub_flat, idx)
 
-        # Trim the extracted bits to the exact original length
-        final_binary_string = bits_payload[:bit_length]
+        if not self.robust_mode:
+            # Trim the extracted bits to the exact original length
+            return [np.asarray(row[:bit_length], dtype=np.uint8) for row in parity]
 
-        # Convert binary string to message
-        return binary_to_message(final_binary_string)
+        bit_rows = []
+        for row in parity:
+            bits_payload = self._deinterleave(bits_to_binary_string(row), self.interleave_seed)
+            bits_payload = self._majority_decode(bits_payload, self.payload_reps)[:bit_length]
+            bit_rows.append(np.frombuffer(bits_payload.encode('ascii'), dtype=np.uint8) - ord('0'))
+        return bit_rows
     
 DWT_DEFAULT_PARAM = {'wavelet': 'haar', 'level': 3, 'band': 'HH', 'embed_level': 3, 'delta': 25.0, 'robust_mode': False} # Added robust_mode=False
\ No newline at end of file
@@ -1,13 +1,18 @@
+import os
 import zlib
 from typing import Tuple, List
 import numpy as np
 import cv2  # cv2 IS REQUIRED for YCrCb color space conversion
 from numpy.fft import fft2, ifft2
-from helpers.message_binary import message_to_binary, binary_to_message
+from helpers.message_binary import message_to_bit_array, binary_to_message, bits_to_binary_string
+from helpers.batching import BatchEmbeddingMixin, stack_cvt_color
+from helpers.position_sampler import select_positions
+from helpers.embedding_plan import EmbeddingPlan
+from helpers.tiled_io import map_tiles
 
 # Assumes message_to_binary() and binary_to_message() exist
 
-class FFTSteganography:
+class FFTSteganography(BatchEmbeddingMixin):
     """
     QIM on phase (4-bin) - RGB-Only Version.
     This class assumes all inputs are 3-channel NumPy arrays.
@@ -19,6 +24,7 @@ class FFTSteganography:
     HDR_LEN_BITS   = 32
     HDR_CRC_BITS   = 32
     HDR_BITS = HDR_VER_BITS + HDR_SEED_BITS + HDR_LEN_BITS + HDR_CRC_BITS
+    PLANE_NAMES = ("Y", "Cr", "Cb")
 
     def __init__(self,
                  r_in: float = 0.30,
@@ -29,7 +35,10 @@ class FFTSteganography:
                  color_order: str = "RGB",
                  header_channel: str = "Y",
                  payload_channel: str = "Cb",
-                 mag_min_boost: float = 3.0):
+                 mag_min_boost: float = 3.0,
+                 position_key: int | None = None,
+                 tile_size: int | None = None,
+                 workers: int | None = None):
         if phase_levels != 4:
             raise ValueError("phase_levels is locked to 4.")
         if header_repeat % 2 == 0:
@@ -48,6 +57,14 @@ class FFTSteganography:
         self.header_channel  = header_channel
         self.payload_channel = payload_channel
         self.mag_min_boost = float(mag_min_boost)
+        # None = annulus positions in (radius, angle) order; int = keyed order
+        self.position_key = position_key
+        # None = one global FFT per plane; int = local FFT per (tile_size x tile_size) tile
+        if tile_size is not None and int(tile_size) < 8:
+            raise ValueError("tile_size must be at least 8.")
+        self.tile_size = None if tile_size is None else int(tile_size)
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self._tile_plans = {}
 
     # ----- Internal utils (static methods remain the same) -----
     @staticmethod
@@ -64,10 +81,11 @@ class FFTSteganography:
     def _wrap_to_pi(a: float) -> float:
         return ((a + np.pi) % (2*np.pi)) - np.pi
     @staticmethod
-    def _phase_to_bit(phase: float, phase_levels: int) -> int:
+    def _phase_to_bit(phase, phase_levels: int):
+        # Works element-wise on scalars and arrays
         phase_mod = phase % (2*np.pi)
         bin_size = 2*np.pi / phase_levels
-        bin_idx = int(np.floor(phase_mod / bin_size)) % phase_levels
+        bin_idx = np.floor(phase_mod / bin_size).astype(np.int64) % phase_levels
         return bin_idx & 1
     @staticmethod
     def _conj_partner(y, x, H, W):
@@ -75,54 +93,226 @@ class FFTSteganography:
         return (2*cy - y) % H, (2*cx - x) % W
     # -----------------------------------------------------------
 
-    def _annulus_positions(self, H: int, W: int) -> List[Tuple[int,int]]:
+    def _annulus_positions(self, H: int, W: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Upper-half annulus positions sorted by (rounded radius, angle, y, x).
+
+        Returns:
+            tuple: (ys, xs) int arrays of equal length.
+        """
         cy, cx = H//2, W//2
         Y, X = np.ogrid[:H, :W]
         dist = np.sqrt((Y-cy)**2 + (X-cx)**2)
         R = min(H,W)/2.0
-        mask = (dist >= self.r_in*R) & (dist <= self.r_out*R)
+        mask = (dist >= self.r_in*R) & (dist <= self.r_out*R) & (Y < cy) & (X != cx)
         ys, xs = np.where(mask)
-        items = []
-        for y, x in zip(ys, xs):
-            if y >= cy or x == cx:
-                continue
-            r_int = int(round(dist[y,x]))
-            ang = float(np.arctan2(y-cy, x-cx))
-            items.append((r_int, ang, int(y), int(x)))
-        items.sort(key=lambda t: (t[0], t[1], t[2], t[3]))
-        return [(y,x) for _,_,y,x in items]
+        r_int = np.round(dist[ys, xs]).astype(np.int64)
+        ang = np.arctan2(ys - cy, xs - cx)
+        order = np.lexsort((xs, ys, ang, r_int))
+        return ys[order], xs[order]
+
+    def _select_annulus_positions(self, positions: Tuple[np.ndarray, np.ndarray], need: int) -> Tuple[np.ndarray, np.ndarray]:
+        """First `need` annulus positions, in raw or keyed order."""
+        ys, xs = positions
+        order = select_positions(len(ys), need, self.position_key)
+        return ys[order], xs[order]
+
+    def _annulus_maps(self, H: int, W: int, need: int, plan=None):
+        """
+        First `need` selected annulus positions and their conjugate partners.
+
+        Returns:
+            tuple: (available, maps) where maps is (ys, xs, partner_ys, partner_xs),
+                   or None when fewer than `need` positions are available.
+        """
+        if plan is not None:
+            available = plan.meta['annulus_size']
+            if need > available:
+                return available, None
+            return available, tuple(plan.take(name, need) for name in ('ys', 'xs', 'partner_ys', 'partner_xs'))
+        positions = self._annulus_positions(H, W)
+        available = len(positions[0])
+        if need > available:
+            return available, None
+        ys, xs = self._select_annulus_positions(positions, need)
+        return available, (ys, xs) + self._conj_partner(ys, xs, H, W)
+
+    def _build_plan(self, shape, max_bits: int | None = None) -> EmbeddingPlan:
+        """
+        Precomputes the annulus order and conjugate map for images of `shape`
+        (see methods.registry.compile_plan). Header and payload planes share it.
+        In tile mode the plan wraps the single annulus plan shared by all tiles.
+        """
+        if self.tile_size is None:
+            return self._build_annulus_plan(shape, max_bits)
+        tile_shape, origins = self._tile_grid(*shape[:2])
+        tile_plan = self._tile_plan(tile_shape)
+        capacity = len(origins) * (tile_plan.meta['annulus_size'] // self.PAY_R)
+        max_bits = capacity if max_bits is None else min(max_bits, capacity)
+        return EmbeddingPlan(self, shape, max_bits, parts=(tile_plan,),
+                             meta={'tile_shape': tile_shape, 'tiles': len(origins)})
+
+    def _build_annulus_plan(self, shape, max_bits: int | None = None) -> EmbeddingPlan:
+        """Annulus order and conjugate map of one FFT plane of `shape`."""
+        H, W = shape[:2]
+        annulus_size = len(self._annulus_positions(H, W)[0])
+        capacity = annulus_size // self.PAY_R
+        max_bits = capacity if max_bits is None else min(max_bits, capacity)
+        need = min(annulus_size, max(max_bits * self.PAY_R, self.HDR_BITS * self.HDR_R))
+        _, (ys, xs, ps, pxs) = self._annulus_maps(H, W, need)
+        return EmbeddingPlan(self, shape, max_bits,
+                             {'ys': ys, 'xs': xs, 'partner_ys': ps, 'partner_xs': pxs},
+                             meta={'annulus_size': annulus_size})
+
+    # ----- Tile mode -----
+    def _tile_grid(self, H: int, W: int):
+        """
+        Tile shape and the (y, x) origins of all full tiles, in raster order.
+        Images smaller than tile_size become a single tile (= global mode).
+        """
+        th, tw = min(self.tile_size, H), min(self.tile_size, W)
+        origins = [(y, x) for y in range(0, H - th + 1, th) for x in range(0, W - tw + 1, tw)]
+        return (th, tw), origins
+
+    def _tile_plan(self, tile_shape: tuple, plan=None) -> EmbeddingPlan:
+        """Annulus plan shared by every tile, from `plan` or the per-instance cache."""
+        if plan is not None:
+            return plan.parts[0]
+        tile_plan = self._tile_plans.get(tile_shape)
+        if tile_plan is None:
+            tile_plan = self._tile_plans[tile_shape] = self._build_annulus_plan(tile_shape + (3,))
+        return tile_plan
+
+    @staticmethod
+    def _tile_segments(bit_count: int, per_tile: int, tiles: int) -> list:
+        """(start, stop) bit range of every tile when tiles are filled in order."""
+        return [(min(i * per_tile, bit_count), min((i + 1) * per_tile, bit_count)) for i in range(tiles)]
+
+    def _payload_capacity(self, H: int, W: int, plan=None) -> int:
+        """Payload capacity in bits of an (H, W) image."""
+        if self.tile_size is None:
+            pos_count = plan.meta['annulus_size'] if plan is not None else len(self._annulus_positions(H, W)[0])
+            return pos_count // self.PAY_R
+        tile_shape, origins = self._tile_grid(H, W)
+        return len(origins) * (self._tile_plan(tile_shape, plan).meta['annulus_size'] // self.PAY_R)
+
+    def _embed_tiles(self, cover_stack: np.ndarray, header_bits: np.ndarray, pay_bits: np.ndarray, plan=None) -> np.ndarray:
+        """
+        Tile mode of _embed_stack: header and payload bits fill the tiles in
+        raster order, each tile gets its own local FFT. Only tiles that carry
+        bits are touched, so memory per worker is bounded by the tile size.
+        """
+        H, W = cover_stack.shape[1:3]
+        tile_shape, origins = self._tile_grid(H, W)
+        tile_plan = self._tile_plan(tile_shape, plan)
+        annulus_size = tile_plan.meta['annulus_size']
+        header_segments = self._tile_segments(header_bits.shape[1], annulus_size // self.HDR_R, len(origins))
+        payload_segments = self._tile_segments(pay_bits.shape[1], annulus_size // self.PAY_R, len(origins))
+        if not origins or header_segments[-1][1] < header_bits.shape[1]:
+            raise ValueError(f"Tile capacity insufficient for the {self.HDR_BITS}-bit header; use a larger tile_size.")
+
+        th, tw = tile_shape
+        stego_stack = cover_stack.copy()
+
+        def process(task):
+            (y, x), (h0, h1), (p0, p1) = task
+            planes = dict(zip(self.PLANE_NAMES, self._split_ycrcb(cover_stack[:, y:y+th, x:x+tw])))
+            if p1 > p0:
+                payload_new = self._write_grouped_bits(planes[self.payload_channel], pay_bits[:, p0:p1],
+                                                       repeat=self.PAY_R, allow_boost=True, plan=tile_plan)
+                planes[self.payload_channel] = payload_new.astype(np.float64)
+            if h1 > h0:
+                header_new = self._write_grouped_bits(planes[self.header_channel], header_bits[:, h0:h1],
+                                                      repeat=self.HDR_R, allow_boost=False, plan=tile_plan)
+                planes[self.header_channel] = header_new.astype(np.float64)
+            stego_stack[:, y:y+th, x:x+tw] = self._merge_ycrcb(planes["Y"].astype(np.uint8), planes["Cr"], planes["Cb"])
+
+        tasks = [task for task in zip(origins, header_segments, payload_segments)
+                 if task[1][1] > task[1][0] or task[2][1] > task[2][0]]
+        map_tiles(process, tasks, self.workers)
+        return stego_stack
+
+    def _read_tiled_bits(self, stack: np.ndarray, channel: str, bit_count: int, repeat: int, plan=None) -> np.ndarray:
+        """
+        Tile mode of _read_grouped_bits, reading only the tiles that carry bits.
+
+        Returns:
+            np.ndarray: (N, bit_count) uint8 bits.
+        """
+        H, W = stack.shape[1:3]
+        tile_shape, origins = self._tile_grid(H, W)
+        tile_plan = self._tile_plan(tile_shape, plan)
+        segments = self._tile_segments(bit_count, tile_plan.meta['annulus_size'] // repeat, len(origins))
+        if bit_count and (not origins or segments[-1][1] < bit_count):
+            raise ValueError("Payload larger than capacity.")
+
+        th, tw = tile_shape
+        channel_index = self.PLANE_NAMES.index(channel)
+
+        def process(task):
+            (y, x), (a, b) = task
+            plane = self._split_ycrcb(stack[:, y:y+th, x:x+tw])[channel_index]
+            return self._read_grouped_bits(self._plane_phase(plane.astype(np.uint8)), b - a, repeat, tile_plan)
+
+        tasks = [task for task in zip(origins, segments) if task[1][1] > task[1][0]]
+        results = map_tiles(process, tasks, self.workers)
+        return np.concatenate(results, axis=1) if results else np.zeros((len(stack), 0), dtype=np.uint8)
+    # -----------------------------------------------------------
 
     def _split_ycrcb(self, img: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """
         MODIFIED: Removed grayscale check. Assumes 3-channel input.
+        Accepts a single image (H, W, 3) or a stack (N, H, W, 3).
         """
+        stack = img if img.ndim == 4 else img[None]
         if self.color_order == "RGB":
-            ycrcb = cv2.cvtColor(img, cv2.COLOR_RGB2YCrCb)
+            ycrcb = stack_cvt_color(stack, cv2.COLOR_RGB2YCrCb)
         else:
-            ycrcb = cv2.cvtColor(img, cv2.COLOR_BGR2YCrCb)
-        y, cr, cb = cv2.split(ycrcb)
-        return y.astype(np.float64), cr.astype(np.float64), cb.astype(np.float64)
+            ycrcb = stack_cvt_color(stack, cv2.COLOR_BGR2YCrCb)
+        if img.ndim == 3:
+            ycrcb = ycrcb[0]
+        return tuple(ycrcb[..., i].astype(np.float64) for i in range(3))
 
     def _merge_ycrcb(self, y_u8: np.ndarray, cr_f: np.ndarray, cb_f: np.ndarray) -> np.ndarray:
         """
         MODIFIED: Removed grayscale check.
+        Accepts planes of shape (H, W) or (N, H, W).
         """
-        ycrcb = cv2.merge([y_u8, cr_f.astype(np.uint8), cb_f.astype(np.uint8)])
+        ycrcb = np.stack([y_u8, cr_f.astype(np.uint8), cb_f.astype(np.uint8)], axis=-1)
+        stack = ycrcb if ycrcb.ndim == 4 else ycrcb[None]
         if self.color_order == "RGB":
-            return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2RGB)
+            out = stack_cvt_color(stack, cv2.COLOR_YCrCb2RGB)
         else:
-            return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2BGR)
+            out = stack_cvt_color(stack, cv2.COLOR_YCrCb2BGR)
+        return out if ycrcb.ndim == 4 else out[0]
 
-    def _write_grouped_bits(self, plane_f64: np.ndarray, bits: str, repeat: int, allow_boost: bool):
-        # (This method's logic remains unchanged)
-        H, W = plane_f64.shape
-        F = np.fft.fftshift(fft2(plane_f64))
-        mag, phase = np.abs(F), np.angle(F)
-        positions = self._annulus_positions(H, W)
-        need = len(bits) * repeat
-        if need > len(positions):
-            raise ValueError(f"Plane capacity insufficient: need {need}, have {len(positions)}.")
-        groups = [ positions[i*repeat:(i+1)*repeat] for i in range(len(bits)) ]
+    def _write_grouped_bits(self, planes_f64: np.ndarray, bits: np.ndarray, repeat: int, allow_boost: bool, plan=None):
+        """
+        Writes bits into the annulus phase of a (N, H, W) stack of planes.
+
+        Args:
+            planes_f64 (np.ndarray): Planes (N, H, W), float64.
+            bits (np.ndarray): (N, bit_count) 0/1 values, one row per plane.
+            repeat (int): Number of positions per bit.
+            allow_boost (bool): Raise small magnitudes to mag_min_boost.
+            plan (EmbeddingPlan | None): Precompiled annulus maps.
+        """
+        F = np.fft.fftshift(fft2(planes_f64), axes=(-2, -1))
+        return self._write_phase_bits(np.abs(F), np.angle(F), bits, repeat, allow_boost, plan)
+
+    def _write_phase_bits(self, mag: np.ndarray, phase: np.ndarray, bits: np.ndarray, repeat: int, allow_boost: bool, plan=None):
+        """
+        Same as _write_grouped_bits, starting from the centered magnitude and
+        phase (N, H, W) of the planes; both are modified in place. Lets the
+        forward FFT be cached (see methods.strength_tuner).
+        """
+        _, H, W = mag.shape
+        need = bits.shape[1] * repeat
+        available, maps = self._annulus_maps(H, W, need, plan)
+        if maps is None:
+            raise ValueError(f"Plane capacity insufficient: need {need}, have {available}.")
+        ys, xs, ps, pxs = maps
+        pos_bits = np.repeat(bits, repeat, axis=1)
 
         bin_size = 2*np.pi / self.phase_levels
         centers = np.array([(k+0.5)*bin_size for k in range(self.phase_levels)], dtype=np.float64)
@@ -130,157 +320,206 @@ class FFTSteganography:
 
         def ang_dist(a, b):
             d = (a - b + np.pi) % (2*np.pi) - np.pi
-            return abs(d)
-
-        def write_bit_at(yx, bit):
-            y0, x0 = yx
-            if allow_boost and mag[y0, x0] < mag_floor:
-                mag[y0, x0] = mag_floor
-            ph = phase[y0, x0]
-            cand = [0,2] if bit==0 else [1,3]
-            norm = ph if ph >= 0 else ph + 2*np.pi
-            target = min((centers[j] for j in cand), key=lambda c: ang_dist(norm, c))
-            phase[y0, x0] = self._wrap_to_pi(target)
-            ys, xs = self._conj_partner(y0, x0, H, W)
-            if 0<=ys<H and 0<=xs<W and (ys!=y0 or xs!=x0):
-                if allow_boost and mag[ys, xs] < mag_floor:
-                    mag[ys, xs] = mag_floor
-                phase[ys, xs] = -phase[y0, x0]
-
-        for i, grp in enumerate(groups):
-            b = int(bits[i])
-            for yx in grp:
-                write_bit_at(yx, b)
+            return np.abs(d)
+
+        # Annulus positions all lie in the upper half and their conjugate
+        # partners in the lower half, so primaries and partners never overlap
+        # and every position can be written in one vectorized step.
+        if allow_boost:
+            mag[:, ys, xs] = np.where(mag[:, ys, xs] < mag_floor, mag_floor, mag[:, ys, xs])
+        ph = phase[:, ys, xs]
+        norm = np.where(ph >= 0, ph, ph + 2*np.pi)
+        first = np.where(pos_bits == 0, centers[0], centers[1])
+        second = np.where(pos_bits == 0, centers[2], centers[3])
+        target = np.where(ang_dist(norm, second) < ang_dist(norm, first), second, first)
+        new_phase = self._wrap_to_pi(target)
+        phase[:, ys, xs] = new_phase
+
+        valid = (ps != ys) | (pxs != xs)
+        ps, pxs = ps[valid], pxs[valid]
+        if allow_boost:
+            mag[:, ps, pxs] = np.where(mag[:, ps, pxs] < mag_floor, mag_floor, mag[:, ps, pxs])
+        phase[:, ps, pxs] = -new_phase[:, valid]
 
         F_new = (mag * np.exp(1j*phase))
-        plane_new = np.real(ifft2(np.fft.ifftshift(F_new)))
+        plane_new = np.real(ifft2(np.fft.ifftshift(F_new, axes=(-2, -1))))
         return np.clip(plane_new, 0, 255).astype(np.uint8)
 
-    def _read_grouped_bits(self, plane_u8: np.ndarray, bit_count: int, repeat: int) -> str:
-        # (This method's logic remains unchanged)
-        plane_f64 = plane_u8.astype(np.float64)
-        H, W = plane_f64.shape
-        F = np.fft.fftshift(fft2(plane_f64))
-        phase = np.angle(F)
-        positions = self._annulus_positions(H, W)
+    def _plane_phase(self, planes_u8: np.ndarray) -> np.ndarray:
+        """Centered FFT phase of a (N, H, W) stack of uint8 planes."""
+        F = np.fft.fftshift(fft2(planes_u8.astype(np.float64)), axes=(-2, -1))
+        return np.angle(F)
+
+    def _read_grouped_bits(self, phase: np.ndarray, bit_count: int, repeat: int, plan=None) -> np.ndarray:
+        """
+        Majority-votes `bit_count` bits from a (N, H, W) phase stack.
+
+        Returns:
+            np.ndarray: (N, bit_count) uint8 bits.
+        """
+        _, H, W = phase.shape
         need = bit_count * repeat
-        if need > len(positions):
+        _, maps = self._annulus_maps(H, W, need, plan)
+        if maps is None:
             raise ValueError("Payload larger than capacity.")
-        groups = [ positions[i*repeat:(i+1)*repeat] for i in range(bit_count) ]
-        out = []
-        for grp in groups:
-            votes = sum(self._phase_to_bit(phase[y,x], self.phase_levels) for y,x in grp)
-            out.append('1' if votes > (len(grp)//2) else '0')
-        return ''.join(out)
-
-    def embed(self, cover_image: np.ndarray, secret_message: str):
+        ys, xs = maps[:2]
+        votes = self._phase_to_bit(phase[:, ys, xs], self.phase_levels)
+        votes = votes.reshape(phase.shape[0], bit_count, repeat).sum(axis=-1)
+        return (votes > (repeat//2)).astype(np.uint8)
+
+    def embed(self, cover_image: np.ndarray, secret_message: str, plan=None):
         """Embeds a secret message into a cover image using FFT."""
         # Assumes cover_image is 3-channel (RGB or BGR per self.color_order)
-        y_f, cr_f, cb_f = self._split_ycrcb(cover_image)
-        H, W = y_f.shape
-        pos_count = len(self._annulus_positions(H, W))
-        payload_capacity_bits = pos_count // self.PAY_R
+        stego_stack, bit_length = self._embed_stack(cover_image[None], secret_message, plan)
+        return stego_stack[0], bit_length
+
+    def extract(self, stego_image: np.ndarray, bit_length: int = None, plan=None) -> str | None:
+        """Extracts a secret message using predefined bit length or from header."""
+        # Assumes stego_image is 3-channel
+        return self._extract_stack(stego_image[None], bit_length, plan)[0]
 
-        pay_bits = message_to_binary(secret_message)
-        bit_length = len(pay_bits)
+    def _header_bits(self, seed: int, bit_length: int, crc: int) -> str:
+        return (self._int_to_bits(self.VERSION, self.HDR_VER_BITS) +
+                self._int_to_bits(seed, self.HDR_SEED_BITS) +
+                self._int_to_bits(bit_length, self.HDR_LEN_BITS) +
+                self._int_to_bits(crc, self.HDR_CRC_BITS))
 
-        if bit_length > payload_capacity_bits:
-            raise ValueError(f"Message too long. Capacity: {payload_capacity_bits} bits, Needed: {bit_length} bits.")
+    def _parse_header(self, hbits):
+        """
+        Parses header bits (0/1 array or string).
 
-        seed = int(np.random.default_rng().integers(0, 2**32-1, dtype=np.uint32))
+        Returns:
+            tuple | None: (seed, bit_length, crc) or None for an unknown version.
+        """
+        if not isinstance(hbits, str):
+            hbits = bits_to_binary_string(hbits)
+        try:
+            v0 = int(hbits[0:self.HDR_VER_BITS], 2)
+            seed = int(hbits[self.HDR_VER_BITS:self.HDR_VER_BITS+self.HDR_SEED_BITS], 2)
+            length_bits = int(hbits[self.HDR_VER_BITS+self.HDR_SEED_BITS:self.HDR_VER_BITS+self.HDR_SEED_BITS+self.HDR_LEN_BITS], 2)
+            crc_expected = int(hbits[-self.HDR_CRC_BITS:], 2)
+        except Exception:
+            return None
+        if v0 != self.VERSION:
+            return None
+        return seed, length_bits, crc_expected
+
+    @staticmethod
+    def _unpermute(bits_perm: np.ndarray, seed: int) -> str:
+        """Inverts the seeded payload permutation; returns a bit string."""
+        rng = np.random.default_rng(int(seed))
+        perm = rng.permutation(len(bits_perm))
+        inv_perm = np.zeros_like(perm)
+        inv_perm[perm] = np.arange(len(perm))
+        return bits_to_binary_string(bits_perm[inv_perm])
+
+    def _message_bits(self, secret_message: str, pay_bits: np.ndarray, count: int):
+        """
+        Header and permuted payload bits for `count` images.
+
+        Returns:
+            tuple: (header_bits (count, HDR_BITS), pay_bits_perm (count, bit_length)).
+        """
+        bit_length = int(pay_bits.size)
+        # Every image gets its own permutation seed, stored in its header
+        seeds = [int(s) for s in np.random.default_rng().integers(0, 2**32-1, size=count, dtype=np.uint32)]
         payload = secret_message.encode('utf-8')
         crc = zlib.crc32(payload) & 0xFFFFFFFF
 
-        header_bits = (self._int_to_bits(self.VERSION, self.HDR_VER_BITS) +
-                       self._int_to_bits(seed, self.HDR_SEED_BITS) +
-                       self._int_to_bits(bit_length, self.HDR_LEN_BITS) +
-                       self._int_to_bits(crc, self.HDR_CRC_BITS))
+        header_bits = np.array([np.frombuffer(self._header_bits(seed, bit_length, crc).encode('ascii'), dtype=np.uint8) - ord('0')
+                                for seed in seeds])
+        pay_bits_perm = np.array([pay_bits[np.random.default_rng(seed).permutation(bit_length)] for seed in seeds])
+        return header_bits, pay_bits_perm
 
-        rng = np.random.default_rng(int(seed))
-        perm = rng.permutation(len(pay_bits))
-        pay_bits_perm = ''.join(pay_bits[i] for i in perm)
-
-        def get_plane(name):
-            # MODIFIED: Removed grayscale checks
-            if name == "Y": return y_f
-            if name == "Cr": return cr_f
-            if name == "Cb": return cb_f
-            raise ValueError(f"Unknown channel name: {name}")
-
-        def set_plane(name, new_u8):
-            # MODIFIED: Removed grayscale checks
-            nonlocal y_f, cr_f, cb_f
-            if name == "Y": y_f = new_u8.astype(np.float64)
-            elif name == "Cr": cr_f = new_u8.astype(np.float64)
-            elif name == "Cb": cb_f = new_u8.astype(np.float64)
+    def _embed_stack(self, cover_stack: np.ndarray, secret_message: str, plan=None):
+        """Embeds the same message into every image of a (N, H, W, 3) stack."""
+        if plan is not None:
+            plan.check(self, cover_stack.shape[1:])
+        count, H, W = cover_stack.shape[:3]
+        payload_capacity_bits = self._payload_capacity(H, W, plan)
 
-        # Embed payload first
-        payload_plane = get_plane(self.payload_channel)
-        payload_new = self._write_grouped_bits(payload_plane, pay_bits_perm, repeat=self.PAY_R, allow_boost=True)
-        set_plane(self.payload_channel, payload_new)
+        pay_bits = message_to_bit_array(secret_message)
+        bit_length = int(pay_bits.size)
 
-        # Embed header last
-        header_new = self._write_grouped_bits(get_plane(self.header_channel), header_bits, repeat=self.HDR_R, allow_boost=False)
-        set_plane(self.header_channel, header_new)
+        if bit_length > payload_capacity_bits:
+            raise ValueError(f"Message too long. Capacity: {payload_capacity_bits} bits, Needed: {bit_length} bits.")
 
-        return self._merge_ycrcb(y_f.astype(np.uint8), cr_f, cb_f), bit_length
+        header_bits, pay_bits_perm = self._message_bits(secret_message, pay_bits, count)
 
-    def extract(self, stego_image: np.ndarray, bit_length: int = None) -> str | None:
-        """Extracts a secret message using predefined bit length or from header."""
-        # Assumes stego_image is 3-channel
-        y_f, cr_f, cb_f = self._split_ycrcb(stego_image)
+        for name in (self.payload_channel, self.header_channel):
+            if name not in self.PLANE_NAMES:
+                raise ValueError(f"Unknown channel name: {name}")
 
-        def get_u8(name):
-            # MODIFIED: Removed grayscale checks
-            if name == "Y": return y_f.astype(np.uint8)
-            if name == "Cr": return cr_f.astype(np.uint8)
-            if name == "Cb": return cb_f.astype(np.uint8)
-            raise ValueError(f"Unknown channel name: {name}")
+        if self.tile_size is not None:
+            return self._embed_tiles(cover_stack, header_bits, pay_bits_perm, plan), bit_length
 
-        # Read header
-        hp = get_u8(self.header_channel)
-        hbits = self._read_grouped_bits(hp, self.HDR_BITS, self.HDR_R)
-        try:
-            v0 = int(hbits[0:self.HDR_VER_BITS], 2)
-            seed = int(hbits[self.HDR_VER_BITS:self.HDR_VER_BITS+self.HDR_SEED_BITS], 2)
-            length_bits = int(hbits[self.HDR_VER_BITS+self.HDR_SEED_BITS:self.HDR_VER_BITS+self.HDR_SEED_BITS+self.HDR_LEN_BITS], 2)
-            crc_expected = int(hbits[-self.HDR_CRC_BITS:], 2)
-        except Exception:
-            return ""
-        if v0 != self.VERSION:
-            return ""
+        planes = dict(zip(self.PLANE_NAMES, self._split_ycrcb(cover_stack)))
 
-        if bit_length is None:
-            bit_length = length_bits
-        elif bit_length != length_bits:
-            print(f"Warning: Provided bit_length ({bit_length}) doesn't match header ({length_bits}). Using header value.")
-            bit_length = length_bits
+        # Embed payload first
+        payload_new = self._write_grouped_bits(planes[self.payload_channel], pay_bits_perm, repeat=self.PAY_R, allow_boost=True, plan=plan)
+        planes[self.payload_channel] = payload_new.astype(np.float64)
 
-        if bit_length == 0:
-            return "" # Handle empty message case
+        # Embed header last
+        header_new = self._write_grouped_bits(planes[self.header_channel], header_bits, repeat=self.HDR_R, allow_boost=False, plan=plan)
+        planes[self.header_channel] = header_new.astype(np.float64)
 
-        # Read payload
-        pp = get_u8(self.payload_channel)
-        bits_perm = self._read_grouped_bits(pp, bit_length, self.PAY_R)
+        return self._merge_ycrcb(planes["Y"].astype(np.uint8), planes["Cr"], planes["Cb"]), bit_length
 
-        # Invert permutation
-        rng = np.random.default_rng(int(seed))
-        perm = rng.permutation(bit_length)
-        inv_perm = np.zeros_like(perm)
-        inv_perm[perm] = np.arange(len(perm))
+    def _extract_stack(self, stego_stack: np.ndarray, bit_length: int = None, plan=None) -> list:
+        """Extracts the message of every image of a (N, H, W, 3) stack."""
+        if plan is not None:
+            plan.check(self, stego_stack.shape[1:])
+        for name in (self.header_channel, self.payload_channel):
+            if name not in self.PLANE_NAMES:
+                raise ValueError(f"Unknown channel name: {name}")
 
-        bits_arr = np.array(list(bits_perm))
-        bits = ''.join(bits_arr[inv_perm])
+        # Read header
+        if self.tile_size is not None:
+            header_rows = self._read_tiled_bits(stego_stack, self.header_channel, self.HDR_BITS, self.HDR_R, plan)
+        else:
+            planes = dict(zip(self.PLANE_NAMES, self._split_ycrcb(stego_stack)))
+            header_phase = self._plane_phase(planes[self.header_channel].astype(np.uint8))
+            header_rows = self._read_grouped_bits(header_phase, self.HDR_BITS, self.HDR_R, plan)
+        payload_phase = None
+
+        messages = []
+        for index, hbits in enumerate(header_rows):
+            header = self._parse_header(hbits)
+            if header is None:
+                messages.append("")
+                continue
+            seed, length_bits, crc_expected = header
 
-        # Verify CRC
-        payload = self._bits_to_bytes(bits)
-        crc_actual = zlib.crc32(payload) & 0xFFFFFFFF
-        if crc_actual != crc_expected:
-            print(f"CRC mismatch: expected {crc_expected}, got {crc_actual}")
-            
-            return binary_to_message(bits)
+            image_bit_length = bit_length
+            if image_bit_length is None:
+                image_bit_length = length_bits
+            elif image_bit_length != length_bits:
+                print(f"Warning: Provided bit_length ({image_bit_length}) doesn't match header ({length_bits}). Using header value.")
+                image_bit_length = length_bits
+
+            if image_bit_length == 0:
+                messages.append("") # Handle empty message case
+                continue
 
-        return binary_to_message(bits)
+            # Read payload (the payload FFT is shared by the whole stack)
+            if self.tile_size is not None:
+                bits_perm = self._read_tiled_bits(stego_stack[index:index+1], self.payload_channel,
+                                                  image_bit_length, self.PAY_R, plan)[0]
+            else:
+                if payload_phase is None:
+                    payload_phase = self._plane_phase(planes[self.payload_channel].astype(np.uint8))
+                bits_perm = self._read_grouped_bits(payload_phase[index:index+1], image_bit_length, self.PAY_R, plan)[0]
+
+            bits = self._unpermute(bits_perm, seed)
+
+            # Verify CRC
+            payload = self._bits_to_bytes(bits)
+            crc_actual = zlib.crc32(payload) & 0xFFFFFFFF
+            if crc_actual != crc_expected:
+                print(f"CRC mismatch: expected {crc_expected}, got {crc_actual}")
+
+            messages.append(binary_to_message(bits))
+        return messages
         
 FFT_DEFAULT_PARAM = {
     'r_in': 0.1,
@@ -1,9 +1,11 @@
 from methods.frequency.dct import DCTSteganography
 from methods.spatial.emd import EMDSteganography
 from helpers.message_binary import message_to_binary, binary_to_message
+from helpers.batching import BatchEmbeddingMixin
+from helpers.embedding_plan import EmbeddingPlan, plan_parts
 from methods.frequency.dct import DCT_POSITION_MID
 
-class DCTEMDHybrid:
+class DCTEMDHybrid(BatchEmbeddingMixin):
     """
     Menggabungkan steganografi DCT dan EMD.
     """
@@ -20,8 +22,25 @@ class DCTEMDHybrid:
         self.dct_steganography = DCTSteganography(**(dct_params or {}))
         self.emd_steganography = EMDSteganography(**(emd_params or {}))
 
-    def embed(self, cover_image, secret_message):
+    def _build_plan(self, shape, max_bits=None):
+        """Plan gabungan: sub-plan DCT lalu sub-plan EMD (lihat methods.registry.compile_plan)."""
+        parts = (self.dct_steganography._build_plan(shape, max_bits),
+                 self.emd_steganography._build_plan(shape, max_bits))
+        total_bits = sum(part.max_bits for part in parts) if max_bits is None else max_bits
+        return EmbeddingPlan(self, shape, total_bits, parts=parts)
+
+    def embed(self, cover_image, secret_message, plan=None):
         """Menyisipkan pesan rahasia menggunakan metode hibrida DCT-EMD."""
+        final_stack, bit_lengths = self._embed_stack(cover_image[None], secret_message, plan)
+        return final_stack[0], bit_lengths
+
+    def extract(self, stego_image, bit_lengths, plan=None):
+        """Mengekstrak pesan rahasia (EMD dulu, baru DCT)."""
+        return self._extract_stack(stego_image[None], bit_lengths, plan)[0]
+
+    def _embed_stack(self, cover_stack, secret_message, plan=None):
+        """Versi stack (N, H, W, 3) dari embed()."""
+        dct_plan, emd_plan = plan_parts(plan, self, cover_stack.shape[1:])
 
         # 1. Bagi pesan
         full_binary_message = message_to_binary(secret_message)
@@ -32,32 +51,33 @@ class DCTEMDHybrid:
 
         # 2. Sisipkan DCT (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(full_binary_message[:split_point])} bit via DCT...")
-        intermediate_stego, dct_bit_length = self.dct_steganography.embed(
-            cover_image.copy(), dct_message_part
+        intermediate_stack, dct_bit_length = self.dct_steganography._embed_stack(
+            cover_stack.copy(), dct_message_part, dct_plan
         )
 
         # 3. Sisipkan EMD (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(full_binary_message[split_point:])} bit via EMD...")
-        final_stego, emd_bit_length = self.emd_steganography.embed(
-            intermediate_stego, emd_message_part
+        final_stack, emd_bit_length = self.emd_steganography._embed_stack(
+            intermediate_stack, emd_message_part, emd_plan
         )
 
-        return final_stego, (dct_bit_length, emd_bit_length)
+        return final_stack, (dct_bit_length, emd_bit_length)
 
-    def extract(self, stego_image, bit_lengths):
-        """Mengekstrak pesan rahasia (EMD dulu, baru DCT)."""
+    def _extract_stack(self, stego_stack, bit_lengths, plan=None):
+        """Versi stack (N, H, W, 3) dari extract(); mengembalikan list pesan."""
+        dct_plan, emd_plan = plan_parts(plan, self, stego_stack.shape[1:])
         dct_bit_length, emd_bit_length = bit_lengths
 
         # 1. Ekstrak EMD
         print(f"Hybrid: Mengekstrak {emd_bit_length} bit via EMD...")
-        emd_message_part = self.emd_steganography.extract(stego_image, emd_bit_length)
+        emd_message_parts = self.emd_steganography._extract_stack(stego_stack, emd_bit_length, emd_plan)
 
         # 2. Ekstrak DCT
         print(f"Hybrid: Mengekstrak {dct_bit_length} bit via DCT...")
-        dct_message_part = self.dct_steganography.extract(stego_image, dct_bit_length)
+        dct_message_parts = self.dct_steganography._extract_stack(stego_stack, dct_bit_length, dct_plan)
+
+        return [first + second for first, second in zip(dct_message_parts, emd_message_parts)]
 
-        return dct_message_part + emd_message_part
-    
 DCT_EMD_DEFAULT_PARAM = {
     'dct_emd_ratio': (0.5, 0.5),  # 50% DCT, 50% EMD
     'dct_params': {'quant_factor': 70, 'embed_positions': DCT_POSITION_MID},
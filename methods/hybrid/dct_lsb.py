@@ -1,9 +1,11 @@
 from methods.frequency.dct import DCTSteganography
 from methods.spatial.lsb import LSBSteganography
 from helpers.message_binary import message_to_binary, binary_to_message
+from helpers.batching import BatchEmbeddingMixin
+from helpers.embedding_plan import EmbeddingPlan, plan_parts
 from methods.frequency.dct import DCT_POSITION_MID
 
-class DCTLSBHybrid:
+class DCTLSBHybrid(BatchEmbeddingMixin):
     """
     Menggabungkan steganografi DCT dan LSB.
 
@@ -25,8 +27,25 @@ class DCTLSBHybrid:
         self.dct_steganography = DCTSteganography(**(dct_params or {}))
         self.lsb_steganography = LSBSteganography(**(lsb_params or {}))
 
-    def embed(self, cover_image, secret_message):
+    def _build_plan(self, shape, max_bits=None):
+        """Plan gabungan: sub-plan DCT lalu sub-plan LSB (lihat methods.registry.compile_plan)."""
+        parts = (self.dct_steganography._build_plan(shape, max_bits),
+                 self.lsb_steganography._build_plan(shape, max_bits))
+        total_bits = sum(part.max_bits for part in parts) if max_bits is None else max_bits
+        return EmbeddingPlan(self, shape, total_bits, parts=parts)
+
+    def embed(self, cover_image, secret_message, plan=None):
         """Menyisipkan pesan rahasia menggunakan metode hibrida."""
+        final_stack, bit_lengths = self._embed_stack(cover_image[None], secret_message, plan)
+        return final_stack[0], bit_lengths
+
+    def extract(self, stego_image, bit_lengths, plan=None):
+        """Mengekstrak pesan rahasia (LSB dulu, baru DCT)."""
+        return self._extract_stack(stego_image[None], bit_lengths, plan)[0]
+
+    def _embed_stack(self, cover_stack, secret_message, plan=None):
+        """Versi stack (N, H, W, 3) dari embed()."""
+        dct_plan, lsb_plan = plan_parts(plan, self, cover_stack.shape[1:])
 
         # 1. Ubah seluruh pesan menjadi biner dan bagi sesuai rasio
         full_binary_message = message_to_binary(secret_message)
@@ -42,37 +61,38 @@ class DCTLSBHybrid:
         # 2. Lakukan penyisipan DCT terlebih dahulu
         # (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(dct_binary_part)} bit via DCT...")
-        intermediate_stego, dct_bit_length = self.dct_steganography.embed(
-            cover_image.copy(), dct_message_part
+        intermediate_stack, dct_bit_length = self.dct_steganography._embed_stack(
+            cover_stack.copy(), dct_message_part, dct_plan
         )
 
         # 3. Gunakan gambar hasil DCT sebagai cover untuk penyisipan LSB
         # (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(lsb_binary_part)} bit via LSB...")
-        final_stego, lsb_bit_length = self.lsb_steganography.embed(
-            intermediate_stego, lsb_message_part
+        final_stack, lsb_bit_length = self.lsb_steganography._embed_stack(
+            intermediate_stack, lsb_message_part, lsb_plan
         )
 
         # 4. Kembalikan gambar akhir dan tuple berisi panjang bit
-        return final_stego, (dct_bit_length, lsb_bit_length)
+        return final_stack, (dct_bit_length, lsb_bit_length)
 
-    def extract(self, stego_image, bit_lengths):
-        """Mengekstrak pesan rahasia (LSB dulu, baru DCT)."""
+    def _extract_stack(self, stego_stack, bit_lengths, plan=None):
+        """Versi stack (N, H, W, 3) dari extract(); mengembalikan list pesan."""
+        dct_plan, lsb_plan = plan_parts(plan, self, stego_stack.shape[1:])
         dct_bit_length, lsb_bit_length = bit_lengths
 
         # 1. Ekstrak bagian LSB terlebih dahulu dari gambar stego akhir
         print(f"Hybrid: Mengekstrak {lsb_bit_length} bit via LSB...")
-        lsb_message_part = self.lsb_steganography.extract(stego_image, lsb_bit_length)
+        lsb_message_parts = self.lsb_steganography._extract_stack(stego_stack, lsb_bit_length, lsb_plan)
 
         # 2. Ekstrak bagian DCT dari gambar stego yang sama
         #    Ini adalah poin penting: Ekstraksi LSB tidak (seharusnya)
         #    merusak data DCT secara signifikan.
         print(f"Hybrid: Mengekstrak {dct_bit_length} bit via DCT...")
-        dct_message_part = self.dct_steganography.extract(stego_image, dct_bit_length)
+        dct_message_parts = self.dct_steganography._extract_stack(stego_stack, dct_bit_length, dct_plan)
 
         # 3. Gabungkan kembali kedua bagian pesan
-        return dct_message_part + lsb_message_part
-    
+        return [first + second for first, second in zip(dct_message_parts, lsb_message_parts)]
+
 DCT_LSB_DEFAULT_PARAM = {
     'dct_lsb_ratio': (0.5, 0.5),
     'dct_params': {'quant_factor': 70, 'embed_positions': DCT_POSITION_MID},
@@ -1,9 +1,11 @@
 from methods.frequency.dct import DCTSteganography
 from methods.spatial.pvd import PVDSteganography
 from helpers.message_binary import message_to_binary, binary_to_message
+from helpers.batching import BatchEmbeddingMixin
+from helpers.embedding_plan import EmbeddingPlan, plan_parts
 from methods.frequency.dct import DCT_POSITION_MID
 
-class DCTPVDHybrid:
+class DCTPVDHybrid(BatchEmbeddingMixin):
     """
     Menggabungkan steganografi DCT dan PVD.
     """
@@ -21,8 +23,25 @@ class DCTPVDHybrid:
         self.dct_steganography = DCTSteganography(**(dct_params or {}))
         self.pvd_steganography = PVDSteganography(**(pvd_params or {}))
 
-    def embed(self, cover_image, secret_message):
+    def _build_plan(self, shape, max_bits=None):
+        """Plan gabungan: sub-plan DCT lalu sub-plan PVD (lihat methods.registry.compile_plan)."""
+        parts = (self.dct_steganography._build_plan(shape, max_bits),
+                 self.pvd_steganography._build_plan(shape, max_bits))
+        total_bits = sum(part.max_bits for part in parts) if max_bits is None else max_bits
+        return EmbeddingPlan(self, shape, total_bits, parts=parts)
+
+    def embed(self, cover_image, secret_message, plan=None):
         """Menyisipkan pesan rahasia menggunakan metode hibrida DCT-PVD."""
+        final_stack, bit_lengths = self._embed_stack(cover_image[None], secret_message, plan)
+        return final_stack[0], bit_lengths
+
+    def extract(self, stego_image, bit_lengths, plan=None):
+        """Mengekstrak pesan rahasia (PVD dulu, baru DCT)."""
+        return self._extract_stack(stego_image[None], bit_lengths, plan)[0]
+
+    def _embed_stack(self, cover_stack, secret_message, plan=None):
+        """Versi stack (N, H, W, 3) dari embed()."""
+        dct_plan, pvd_plan = plan_parts(plan, self, cover_stack.shape[1:])
 
         # 1. Bagi pesan
         full_binary_message = message_to_binary(secret_message)
@@ -37,33 +56,34 @@ class DCTPVDHybrid:
 
         # 2. Sisipkan DCT (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(dct_binary_part)} bit via DCT...")
-        intermediate_stego, dct_bit_length = self.dct_steganography.embed(
-            cover_image.copy(), dct_message_part
+        intermediate_stack, dct_bit_length = self.dct_steganography._embed_stack(
+            cover_stack.copy(), dct_message_part, dct_plan
         )
 
         # 3. Sisipkan PVD (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(pvd_binary_part)} bit via PVD...")
-        final_stego, pvd_bit_length = self.pvd_steganography.embed(
-            intermediate_stego, pvd_message_part
+        final_stack, pvd_bit_length = self.pvd_steganography._embed_stack(
+            intermediate_stack, pvd_message_part, pvd_plan
         )
 
-        return final_stego, (dct_bit_length, pvd_bit_length)
+        return final_stack, (dct_bit_length, pvd_bit_length)
 
-    def extract(self, stego_image, bit_lengths):
-        """Mengekstrak pesan rahasia (PVD dulu, baru DCT)."""
+    def _extract_stack(self, stego_stack, bit_lengths, plan=None):
+        """Versi stack (N, H, W, 3) dari extract(); mengembalikan list pesan."""
+        dct_plan, pvd_plan = plan_parts(plan, self, stego_stack.shape[1:])
         dct_bit_length, pvd_bit_length = bit_lengths
 
         # 1. Ekstrak PVD
         print(f"Hybrid: Mengekstrak {pvd_bit_length} bit via PVD...")
-        pvd_message_part = self.pvd_steganography.extract(stego_image, pvd_bit_length)
+        pvd_message_parts = self.pvd_steganography._extract_stack(stego_stack, pvd_bit_length, pvd_plan)
 
         # 2. Ekstrak DCT
         print(f"Hybrid: Mengekstrak {dct_bit_length} bit via DCT...")
-        dct_message_part = self.dct_steganography.extract(stego_image, dct_bit_length)
+        dct_message_parts = self.dct_steganography._extract_stack(stego_stack, dct_bit_length, dct_plan)
 
         # 3. Gabungkan
-        return dct_message_part + pvd_message_part
-    
+        return [first + second for first, second in zip(dct_message_parts, pvd_message_parts)]
+
 DCT_PVD_DEFAULT_PARAM = {
     'dct_pvd_ratio': (0.5, 0.5),
     'dct_params': {'quant_factor': 70, 'embed_positions': DCT_POSITION_MID},
@@ -1,8 +1,10 @@
 from methods.frequency.dwt import DWTSteganography
 from methods.spatial.emd import EMDSteganography
 from helpers.message_binary import message_to_binary, binary_to_message
+from helpers.batching import BatchEmbeddingMixin
+from helpers.embedding_plan import EmbeddingPlan, plan_parts
 
-class DWTEmdHybrid:
+class DWTEmdHybrid(BatchEmbeddingMixin):
     """
     Menggabungkan steganografi DWT dan EMD.
     """
@@ -19,8 +21,25 @@ class DWTEmdHybrid:
         self.dwt_steganography = DWTSteganography(**(dwt_params or {}))
         self.emd_steganography = EMDSteganography(**(emd_params or {}))
 
-    def embed(self, cover_image, secret_message):
+    def _build_plan(self, shape, max_bits=None):
+        """Plan gabungan: sub-plan DWT lalu sub-plan EMD (lihat methods.registry.compile_plan)."""
+        parts = (self.dwt_steganography._build_plan(shape, max_bits),
+                 self.emd_steganography._build_plan(shape, max_bits))
+        total_bits = sum(part.max_bits for part in parts) if max_bits is None else max_bits
+        return EmbeddingPlan(self, shape, total_bits, parts=parts)
+
+    def embed(self, cover_image, secret_message, plan=None):
         """Menyisipkan pesan rahasia menggunakan metode hibrida DWT-EMD."""
+        final_stack, bit_lengths = self._embed_stack(cover_image[None], secret_message, plan)
+        return final_stack[0], bit_lengths
+
+    def extract(self, stego_image, bit_lengths, plan=None):
+        """Mengekstrak pesan rahasia (EMD dulu, baru DWT)."""
+        return self._extract_stack(stego_image[None], bit_lengths, plan)[0]
+
+    def _embed_stack(self, cover_stack, secret_message, plan=None):
+        """Versi stack (N, H, W, 3) dari embed()."""
+        dwt_plan, emd_plan = plan_parts(plan, self, cover_stack.shape[1:])
 
         # 1. Bagi pesan
         full_binary_message = message_to_binary(secret_message)
@@ -31,32 +50,33 @@ class DWTEmdHybrid:
 
         # 2. Sisipkan DWT (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(full_binary_message[:split_point])} bit via DWT...")
-        intermediate_stego, dwt_bit_length = self.dwt_steganography.embed(
-            cover_image.copy(), dwt_message_part
+        intermediate_stack, dwt_bit_length = self.dwt_steganography._embed_stack(
+            cover_stack.copy(), dwt_message_part, dwt_plan
         )
 
         # 3. Sisipkan EMD (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(full_binary_message[split_point:])} bit via EMD...")
-        final_stego, emd_bit_length = self.emd_steganography.embed(
-            intermediate_stego, emd_message_part
+        final_stack, emd_bit_length = self.emd_steganography._embed_stack(
+            intermediate_stack, emd_message_part, emd_plan
         )
 
-        return final_stego, (dwt_bit_length, emd_bit_length)
+        return final_stack, (dwt_bit_length, emd_bit_length)
 
-    def extract(self, stego_image, bit_lengths):
-        """Mengekstrak pesan rahasia (EMD dulu, baru DWT)."""
+    def _extract_stack(self, stego_stack, bit_lengths, plan=None):
+        """Versi stack (N, H, W, 3) dari extract(); mengembalikan list pesan."""
+        dwt_plan, emd_plan = plan_parts(plan, self, stego_stack.shape[1:])
         dwt_bit_length, emd_bit_length = bit_lengths
 
         # 1. Ekstrak EMD
         print(f"Hybrid: Mengekstrak {emd_bit_length} bit via EMD...")
-        emd_message_part = self.emd_steganography.extract(stego_image, emd_bit_length)
+        emd_message_parts = self.emd_steganography._extract_stack(stego_stack, emd_bit_length, emd_plan)
 
         # 2. Ekstrak DWT
         print(f"Hybrid: Mengekstrak {dwt_bit_length} bit via DWT...")
-        dwt_message_part = self.dwt_steganography.extract(stego_image, dwt_bit_length)
+        dwt_message_parts = self.dwt_steganography._extract_stack(stego_stack, dwt_bit_length, dwt_plan)
+
+        return [first + second for first, second in zip(dwt_message_parts, emd_message_parts)]
 
-        return dwt_message_part + emd_message_part
-    
 DWT_EMD_DEFAULT_PARAM = {
     'dwt_emd_ratio': (0.5, 0.5),
     'dwt_params': {'wavelet': 'haar', 'level': 3, 'band': 'HH', 'embed_level': 3, 'delta': 25.0, 'robust_mode': False},
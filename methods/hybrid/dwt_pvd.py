@@ -1,8 +1,10 @@
 from methods.frequency.dwt import DWTSteganography
 from methods.spatial.pvd import PVDSteganography
 from helpers.message_binary import message_to_binary, binary_to_message
+from helpers.batching import BatchEmbeddingMixin
+from helpers.embedding_plan import EmbeddingPlan, plan_parts
 
-class DWTPVDHybrid:
+class DWTPVDHybrid(BatchEmbeddingMixin):
     """
     Menggabungkan steganografi DWT dan PVD.
     """
@@ -19,8 +21,25 @@ class DWTPVDHybrid:
         self.dwt_steganography = DWTSteganography(**(dwt_params or {}))
         self.pvd_steganography = PVDSteganography(**(pvd_params or {}))
 
-    def embed(self, cover_image, secret_message):
+    def _build_plan(self, shape, max_bits=None):
+        """Plan gabungan: sub-plan DWT lalu sub-plan PVD (lihat methods.registry.compile_plan)."""
+        parts = (self.dwt_steganography._build_plan(shape, max_bits),
+                 self.pvd_steganography._build_plan(shape, max_bits))
+        total_bits = sum(part.max_bits for part in parts) if max_bits is None else max_bits
+        return EmbeddingPlan(self, shape, total_bits, parts=parts)
+
+    def embed(self, cover_image, secret_message, plan=None):
         """Menyisipkan pesan rahasia menggunakan metode hibrida DWT-PVD."""
+        final_stack, bit_lengths = self._embed_stack(cover_image[None], secret_message, plan)
+        return final_stack[0], bit_lengths
+
+    def extract(self, stego_image, bit_lengths, plan=None):
+        """Mengekstrak pesan rahasia (PVD dulu, baru DWT)."""
+        return self._extract_stack(stego_image[None], bit_lengths, plan)[0]
+
+    def _embed_stack(self, cover_stack, secret_message, plan=None):
+        """Versi stack (N, H, W, 3) dari embed()."""
+        dwt_plan, pvd_plan = plan_parts(plan, self, cover_stack.shape[1:])
 
         # 1. Bagi pesan
         full_binary_message = message_to_binary(secret_message)
@@ -31,32 +50,33 @@ class DWTPVDHybrid:
 
         # 2. Sisipkan DWT (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(full_binary_message[:split_point])} bit via DWT...")
-        intermediate_stego, dwt_bit_length = self.dwt_steganography.embed(
-            cover_image.copy(), dwt_message_part
+        intermediate_stack, dwt_bit_length = self.dwt_steganography._embed_stack(
+            cover_stack.copy(), dwt_message_part, dwt_plan
         )
 
         # 3. Sisipkan PVD (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(full_binary_message[split_point:])} bit via PVD...")
-        final_stego, pvd_bit_length = self.pvd_steganography.embed(
-            intermediate_stego, pvd_message_part
+        final_stack, pvd_bit_length = self.pvd_steganography._embed_stack(
+            intermediate_stack, pvd_message_part, pvd_plan
         )
 
-        return final_stego, (dwt_bit_length, pvd_bit_length)
+        return final_stack, (dwt_bit_length, pvd_bit_length)
 
-    def extract(self, stego_image, bit_lengths):
-        """Mengekstrak pesan rahasia (PVD dulu, baru DWT)."""
+    def _extract_stack(self, stego_stack, bit_lengths, plan=None):
+        """Versi stack (N, H, W, 3) dari extract(); mengembalikan list pesan."""
+        dwt_plan, pvd_plan = plan_parts(plan, self, stego_stack.shape[1:])
         dwt_bit_length, pvd_bit_length = bit_lengths
 
         # 1. Ekstrak PVD
         print(f"Hybrid: Mengekstrak {pvd_bit_length} bit via PVD...")
-        pvd_message_part = self.pvd_steganography.extract(stego_image, pvd_bit_length)
+        pvd_message_parts = self.pvd_steganography._extract_stack(stego_stack, pvd_bit_length, pvd_plan)
 
         # 2. Ekstrak DWT
         print(f"Hybrid: Mengekstrak {dwt_bit_length} bit via DWT...")
-        dwt_message_part = self.dwt_steganography.extract(stego_image, dwt_bit_length)
+        dwt_message_parts = self.dwt_steganography._extract_stack(stego_stack, dwt_bit_length, dwt_plan)
+
+        return [first + second for first, second in zip(dwt_message_parts, pvd_message_parts)]
 
-        return dwt_message_part + pvd_message_part
-    
 DWT_PVD_DEFAULT_PARAM = {
     'dwt_pvd_ratio': (0.5, 0.5),
     'dwt_params': {'wavelet': 'haar', 'level': 3, 'band': 'HH', 'embed_level': 3, 'delta': 25.0, 'robust_mode': False},
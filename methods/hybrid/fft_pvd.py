@@ -1,8 +1,10 @@
 from methods.frequency.fft import FFTSteganography
 from methods.spatial.pvd import PVDSteganography
 from helpers.message_binary import message_to_binary, binary_to_message
+from helpers.batching import BatchEmbeddingMixin
+from helpers.embedding_plan import EmbeddingPlan, plan_parts
 
-class FFTPVDHybrid:
+class FFTPVDHybrid(BatchEmbeddingMixin):
     """
     Menggabungkan steganografi FFT dan PVD.
     """
@@ -19,8 +21,25 @@ class FFTPVDHybrid:
         self.fft_steganography = FFTSteganography(**(fft_params or {}))
         self.pvd_steganography = PVDSteganography(**(pvd_params or {}))
 
-    def embed(self, cover_image, secret_message):
+    def _build_plan(self, shape, max_bits=None):
+        """Plan gabungan: sub-plan FFT lalu sub-plan PVD (lihat methods.registry.compile_plan)."""
+        parts = (self.fft_steganography._build_plan(shape, max_bits),
+                 self.pvd_steganography._build_plan(shape, max_bits))
+        total_bits = sum(part.max_bits for part in parts) if max_bits is None else max_bits
+        return EmbeddingPlan(self, shape, total_bits, parts=parts)
+
+    def embed(self, cover_image, secret_message, plan=None):
         """Menyisipkan pesan rahasia menggunakan metode hibrida FFT-PVD."""
+        final_stack, bit_lengths = self._embed_stack(cover_image[None], secret_message, plan)
+        return final_stack[0], bit_lengths
+
+    def extract(self, stego_image, bit_lengths, plan=None):
+        """Mengekstrak pesan rahasia (PVD dulu, baru FFT)."""
+        return self._extract_stack(stego_image[None], bit_lengths, plan)[0]
+
+    def _embed_stack(self, cover_stack, secret_message, plan=None):
+        """Versi stack (N, H, W, 3) dari embed()."""
+        fft_plan, pvd_plan = plan_parts(plan, self, cover_stack.shape[1:])
 
         # 1. Bagi pesan
         full_binary_message = message_to_binary(secret_message)
@@ -31,37 +50,37 @@ class FFTPVDHybrid:
 
         # 2. Sisipkan FFT (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(full_binary_message[:split_point])} bit via FFT...")
-        intermediate_stego, fft_bit_length = self.fft_steganography.embed(
-            cover_image.copy(), fft_message_part
+        intermediate_stack, fft_bit_length = self.fft_steganography._embed_stack(
+            cover_stack.copy(), fft_message_part, fft_plan
         )
 
         # 3. Sisipkan PVD (Input: RGB, Output: RGB)
         print(f"Hybrid: Menyisipkan {len(full_binary_message[split_point:])} bit via PVD...")
-        final_stego, pvd_bit_length = self.pvd_steganography.embed(
-            intermediate_stego, pvd_message_part
+        final_stack, pvd_bit_length = self.pvd_steganography._embed_stack(
+            intermediate_stack, pvd_message_part, pvd_plan
         )
 
-        return final_stego, (fft_bit_length, pvd_bit_length)
+        return final_stack, (fft_bit_length, pvd_bit_length)
 
-    def extract(self, stego_image, bit_lengths):
-        """Mengekstrak pesan rahasia (PVD dulu, baru FFT)."""
+    def _extract_stack(self, stego_stack, bit_lengths, plan=None):
+        """Versi stack (N, H, W, 3) dari extract(); mengembalikan list pesan."""
+        fft_plan, pvd_plan = plan_parts(plan, self, stego_stack.shape[1:])
         fft_bit_length, pvd_bit_length = bit_lengths
 
         # 1. Ekstrak PVD
         print(f"Hybrid: Mengekstrak {pvd_bit_length} bit via PVD...")
-        pvd_message_part = self.pvd_steganography.extract(stego_image, pvd_bit_length)
+        pvd_message_parts = self.pvd_steganography._extract_stack(stego_stack, pvd_bit_length, pvd_plan)
 
         # 2. Ekstrak FFT
         print(f"Hybrid: Mengekstrak {fft_bit_length} bit via FFT...")
-        fft_message_part = self.fft_steganography.extract(stego_image, fft_bit_length)
+        fft_message_parts = self.fft_steganography._extract_stack(stego_stack, fft_bit_length, fft_plan)
 
-        if fft_message_part is None:
+        if any(part is None for part in fft_message_parts):
             print("Peringatan: Ekstraksi FFT gagal, pesan mungkin tidak lengkap.")
-            fft_message_part = ""
+            fft_message_parts = [part or "" for part in fft_message_parts]
+
+        return [first + second for first, second in zip(fft_message_parts, pvd_message_parts)]
 
-        return fft_message_part + pvd_message_part
-        
-        
 FFT_PVD_DEFAULT_PARAM = {
     'fft_pvd_ratio': (0.5, 0.5),
     'fft_params': {
@@ -0,0 +1,117 @@
+import threading
+from collections import OrderedDict
+
+from constants import (
+    METHOD_LSB, METHOD_PVD, METHOD_EMD,
+    METHOD_DCT, METHOD_DWT, METHOD_FFT,
+    METHOD_DCT_LSB, METHOD_DCT_PVD, METHOD_DCT_EMD,
+    METHOD_DWT_LSB, METHOD_DWT_PVD, METHOD_DWT_EMD,
+    METHOD_FFT_LSB, METHOD_FFT_PVD, METHOD_FFT_EMD,
+)
+from methods.spatial.lsb import LSBSteganography, LSB_DEFAULT_PARAM
+from methods.spatial.pvd import PVDSteganography, PVD_DEFAULT_PARAM
+from methods.spatial.emd import EMDSteganography, EMD_DEFAULT_PARAM
+from methods.frequency.dct import DCTSteganography, DCT_DEFAULT_PARAM
+from methods.frequency.dwt import DWTSteganography, DWT_DEFAULT_PARAM
+from methods.frequency.fft import FFTSteganography, FFT_DEFAULT_PARAM
+from methods.hybrid.dct_lsb import DCTLSBHybrid, DCT_LSB_DEFAULT_PARAM
+from methods.hybrid.dct_pvd import DCTPVDHybrid, DCT_PVD_DEFAULT_PARAM
+from methods.hybrid.dct_emd import DCTEMDHybrid, DCT_EMD_DEFAULT_PARAM
+from methods.hybrid.dwt_lsb import DWTLSBHybrid, DWT_LSB_DEFAULT_PARAM
+from methods.hybrid.dwt_pvd import DWTPVDHybrid, DWT_PVD_DEFAULT_PARAM
+from methods.hybrid.dwt_emd import DWTEmdHybrid, DWT_EMD_DEFAULT_PARAM
+from methods.hybrid.fft_lsb import FFTLSBHybrid, FFT_LSB_DEFAULT_PARAM
+from methods.hybrid.fft_pvd import FFTPVDHybrid, FFT_PVD_DEFAULT_PARAM
+from methods.hybrid.fft_emd import FFTEMDHybrid, FFT_EMD_DEFAULT_PARAM
+
+# Nama metode (constants.METHOD_*) -> (kelas, parameter default)
+METHOD_REGISTRY = {
+    METHOD_LSB: (LSBSteganography, LSB_DEFAULT_PARAM),
+    METHOD_PVD: (PVDSteganography, PVD_DEFAULT_PARAM),
+    METHOD_EMD: (EMDSteganography, EMD_DEFAULT_PARAM),
+    METHOD_DCT: (DCTSteganography, DCT_DEFAULT_PARAM),
+    METHOD_DWT: (DWTSteganography, DWT_DEFAULT_PARAM),
+    METHOD_FFT: (FFTSteganography, FFT_DEFAULT_PARAM),
+    METHOD_DCT_LSB: (DCTLSBHybrid, DCT_LSB_DEFAULT_PARAM),
+    METHOD_DCT_PVD: (DCTPVDHybrid, DCT_PVD_DEFAULT_PARAM),
+    METHOD_DCT_EMD: (DCTEMDHybrid, DCT_EMD_DEFAULT_PARAM),
+    METHOD_DWT_LSB: (DWTLSBHybrid, DWT_LSB_DEFAULT_PARAM),
+    METHOD_DWT_PVD: (DWTPVDHybrid, DWT_PVD_DEFAULT_PARAM),
+    METHOD_DWT_EMD: (DWTEmdHybrid, DWT_EMD_DEFAULT_PARAM),
+    METHOD_FFT_LSB: (FFTLSBHybrid, FFT_LSB_DEFAULT_PARAM),
+    METHOD_FFT_PVD: (FFTPVDHybrid, FFT_PVD_DEFAULT_PARAM),
+    METHOD_FFT_EMD: (FFTEMDHybrid, FFT_EMD_DEFAULT_PARAM),
+}
+
+PLAN_CACHE_SIZE = 32
+
+_plan_cache = OrderedDict()
+_plan_cache_lock = threading.Lock()
+
+
+def create_method(method: str, params: dict | None = None):
+    """
+    Membuat instance metode dari namanya.
+
+    Args:
+        method (str): Salah satu constants.METHOD_*.
+        params (dict | None): Parameter konstruktor; None = parameter default.
+    """
+    if method not in METHOD_REGISTRY:
+        raise ValueError(f"Metode tidak dikenal: {method}")
+    method_class, default_params = METHOD_REGISTRY[method]
+    return method_class(**(default_params if params is None else params))
+
+
+def _freeze(value):
+    """Mengubah parameter (dict/list bersarang) menjadi kunci cache yang hashable."""
+    if isinstance(value, dict):
+        return tuple(sorted((k, _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def compile_plan(method: str, params: dict | None, shape, max_bits: int | None = None):
+    """
+    Menyiapkan (dan menyimpan di cache LRU) plan penyisipan untuk satu
+    kombinasi metode, parameter, dan ukuran gambar.
+
+    Plan berisi semua indeks yang tidak bergantung pada isi gambar (offset
+    sampel LSB, susunan grup EMD, pasangan PVD, blok/posisi DCT, koefisien
+    sub-band DWT, annulus dan pasangan konjugat FFT) sebagai array int32.
+    Berikan plan ke `embed` / `extract` / `embed_many` / `extract_many` dari
+    instance dengan parameter yang sama agar pekerjaan itu dilewati.
+
+    Args:
+        method (str): Salah satu constants.METHOD_*.
+        params (dict | None): Parameter konstruktor; None = parameter default.
+        shape (tuple): Ukuran gambar (H, W, 3).
+        max_bits (int | None): Panjang pesan maksimum yang dilayani plan.
+                               None = kapasitas penuh (plan lebih besar).
+
+    Returns:
+        EmbeddingPlan: Plan yang bisa dipakai bersama (read-only).
+    """
+    shape = tuple(int(s) for s in shape)
+    key = (method, _freeze(params), shape, max_bits)
+    with _plan_cache_lock:
+        plan = _plan_cache.get(key)
+        if plan is not None:
+            _plan_cache.move_to_end(key)
+            return plan
+
+    plan = create_method(method, params)._build_plan(shape, max_bits)
+
+    with _plan_cache_lock:
+        _plan_cache[key] = plan
+        _plan_cache.move_to_end(key)
+        while len(_plan_cache) > PLAN_CACHE_SIZE:
+            _plan_cache.popitem(last=False)
+    return plan
+
+
+def clear_plan_cache():
+    """Mengosongkan cache plan."""
+    with _plan_cache_lock:
+        _plan_cache.clear()
@@ -1,15 +1,36 @@
 import numpy as np
-from helpers.message_binary import message_to_binary, binary_to_message
-
-class EMDSteganography:
+from helpers.message_binary import message_to_bit_array, bit_array_to_message
+from helpers.position_sampler import select_positions
+from helpers.batching import BatchEmbeddingMixin
+from helpers.embedding_plan import EmbeddingPlan
+from helpers.changed_region import ChangedRegion
+from methods.spatial import kernels
+
+class EMDSteganography(BatchEmbeddingMixin):
     """
     EMD Steganography - RGB-Only Version.
     Assumes all input images are 3-channel (H, W, 3) NumPy arrays.
     """
-    def __init__(self, n=2):
+    def __init__(self, n=2, position_key=None, radix_chunk_bits=None):
+        """
+        Args:
+            n (int): Number of pixels in a group; digits are base 2n+1.
+            position_key (int | None): None = raster order, int = keyed pseudo-random order.
+            radix_chunk_bits (int | None): None stores 2 bits per digit (digits
+                                           2n..2n+1 unused). 1..64 converts every
+                                           chunk of that many bits to
+                                           ceil(chunk / log2(2n+1)) base-(2n+1)
+                                           digits, using the full digit range.
+        """
         self.n = n  # Number of pixels in a group (e.g., 2 for base-5)
+        self.position_key = position_key  # None = raster order, int = keyed pseudo-random order
         self.base = 2 * self.n + 1
-        print(f"EMD Steganography initialized with n={n} (base-{self.base})")
+        if radix_chunk_bits is not None and not 1 <= radix_chunk_bits <= 64:
+            raise ValueError("radix_chunk_bits must be None or between 1 and 64.")
+        self.radix_chunk_bits = radix_chunk_bits
+        self.last_changed_region = None  # ChangedRegion of the last embed()
+        mode = "" if radix_chunk_bits is None else f", radix chunks of {radix_chunk_bits} bits"
+        print(f"EMD Steganography initialized with n={n} (base-{self.base}{mode})")
 
     def _calculate_capacity(self, image: np.ndarray) -> int:
         """Calculates the max number of base-5 digits for an RGB image."""
@@ -22,115 +43,196 @@ class EMDSteganography:
         groups_per_channel = height * (width // self.n)
         return groups_per_channel * 3 # Explicitly use 3 channels
 
-    def _extraction_function(self, pixels: list) -> int:
-        """Extraction function for EMD: f(p1, ..., pn) = Σ(i * pi) mod (2n+1)"""
-        return sum((i + 1) * int(pixels[i]) for i in range(self.n)) % self.base
-
-    def _embed_digit(self, pixels: list, digit: int) -> list:
-        """Embeds a single digit into a pixel group using a minimal distortion search."""
-        current_digit = self._extraction_function(pixels)
-        if current_digit == digit:
-            return pixels.copy()
-
-        # Search for a modification with the smallest change (+1 or -1)
-        for i in range(self.n):
-            for delta in [1, -1]:
-                modified_pixels = pixels.copy()
-                new_value = modified_pixels[i] + delta
-                if 0 <= new_value <= 255:
-                    modified_pixels[i] = new_value
-                    if self._extraction_function(modified_pixels) == digit:
-                        return modified_pixels
-
-        # Try a slightly larger jump if +/- 1 fails
-        for i in range(self.n):
-            for delta in [2, -2]:
-                 modified_pixels = pixels.copy()
-                 new_value = modified_pixels[i] + delta
-                 if 0 <= new_value <= 255:
-                    modified_pixels[i] = new_value
-                    if self._extraction_function(modified_pixels) == digit:
-                        return modified_pixels
-
-        # If still no solution, return the original pixels.
-        # This will cause a BER error, but avoids a massive performance hit.
-        return pixels
-
-    def embed(self, cover_image: np.ndarray, secret_message: str) -> tuple:
+    def _extraction_function(self, groups: np.ndarray) -> np.ndarray:
+        """Extraction function for EMD: f(p1, ..., pn) = Σ(i * pi) mod (2n+1), over the last axis."""
+        weights = np.arange(1, self.n + 1, dtype=np.int64)
+        return (groups.astype(np.int64) @ weights) % self.base
+
+    def _embed_digits(self, groups: np.ndarray, digits: np.ndarray) -> np.ndarray:
+        """
+        Embeds one digit per pixel group using a minimal distortion search.
+
+        Candidates are tried in the same order as the scalar search: pixel i
+        with +1 then -1, and only if that fails, +2 then -2. Groups with no
+        solution are left unchanged (caught later by BER).
+        """
+        return kernels.emd_embed_groups(groups, digits, self.n, self.base)
+
+    def _digits_for_bits(self, bits: int) -> int:
+        """Smallest number of base-(2n+1) digits that can hold every `bits`-bit value."""
+        digits, span = 0, 1
+        while span < 1 << bits:
+            digits, span = digits + 1, span * self.base
+        return digits
+
+    def _digit_count(self, bit_length: int) -> int:
+        """Number of digits (= pixel groups) that carry `bit_length` message bits."""
+        chunk = self.radix_chunk_bits
+        if chunk is None:
+            return -(-bit_length // 2)
+        if bit_length <= 0:
+            return 0
+        full, last = divmod(bit_length - 1, chunk)
+        return full * self._digits_for_bits(chunk) + self._digits_for_bits(last + 1)
+
+    def _bits_capacity(self, groups: int) -> int:
+        """Largest message length in bits that fits in `groups` digits (inverse of _digit_count)."""
+        chunk = self.radix_chunk_bits
+        if chunk is None:
+            return 2 * groups
+        full, rest = divmod(groups, self._digits_for_bits(chunk))
+        last = 0
+        while last < chunk and self._digits_for_bits(last + 1) <= rest:
+            last += 1
+        return full * chunk + last
+
+    def _chunk_layout(self, bit_length: int) -> tuple:
+        """(chunk count, bits in the last chunk, digits per full chunk) of a radix-packed message."""
+        chunk = self.radix_chunk_bits
+        count = -(-bit_length // chunk)
+        return count, bit_length - (count - 1) * chunk, self._digits_for_bits(chunk)
+
+    def _bits_to_digits(self, bits: np.ndarray) -> np.ndarray:
+        """
+        Converts a 0/1 bit array to base-(2n+1) digits.
+
+        Legacy mode packs 2 bits per digit. Radix mode reads the bits as
+        big-endian words of radix_chunk_bits bits (the last word holds only
+        the remaining bits) and writes every word as its digits, least
+        significant first; a short last word gets only the digits it needs.
+        Every step is a vectorized uint64 operation over all words, so the
+        cost is linear in the message length.
+        """
+        bit_length = int(bits.size)
+        if self.radix_chunk_bits is None:
+            padded = np.zeros(-(-bit_length // 2) * 2, dtype=np.int64)
+            padded[:bit_length] = bits  # Pad last chunk
+            return padded[0::2] * 2 + padded[1::2]  # Values will be in {0, 1, 2, 3}
+        if bit_length == 0:
+            return np.zeros(0, dtype=np.int64)
+
+        chunk = self.radix_chunk_bits
+        count, last, per_chunk = self._chunk_layout(bit_length)
+        padded = np.zeros(count * chunk, dtype=np.uint64)
+        padded[:bit_length] = bits
+        shifts = np.arange(chunk - 1, -1, -1, dtype=np.uint64)
+        words = (padded.reshape(count, chunk) << shifts).sum(axis=1, dtype=np.uint64)
+        words[-1] >>= np.uint64(chunk - last)  # The last word's value is its `last` bits only
+
+        base = np.uint64(self.base)
+        digits = np.empty((count, per_chunk), dtype=np.uint64)
+        for position in range(per_chunk):
+            digits[:, position] = words % base
+            words //= base
+        return digits.reshape(-1)[:self._digit_count(bit_length)].astype(np.int64)
+
+    def _digits_to_bits(self, digits: np.ndarray, bit_length: int) -> np.ndarray:
+        """Inverse of _bits_to_digits for a (N, digits) array; returns (N, bit_length) uint8 bits."""
+        if self.radix_chunk_bits is None:
+            # Only digits 0-3 were used for embedding. Digit 4 (unused) is an
+            # error; '00' is used as a placeholder to be caught by BER.
+            digits = np.where(digits < 4, digits, 0)
+            bits = np.stack([(digits >> 1) & 1, digits & 1], axis=-1).reshape(len(digits), -1)
+            return bits[:, :bit_length].astype(np.uint8)
+
+        rows = len(digits)
+        if bit_length <= 0:
+            return np.zeros((rows, 0), dtype=np.uint8)
+        chunk = self.radix_chunk_bits
+        count, last, per_chunk = self._chunk_layout(bit_length)
+        padded = np.zeros((rows, count * per_chunk), dtype=np.uint64)
+        padded[:, :digits.shape[1]] = digits
+        padded = padded.reshape(rows, count, per_chunk)
+
+        # Horner from the most significant digit; a damaged word may wrap, which only garbles that word
+        base = np.uint64(self.base)
+        words = np.zeros((rows, count), dtype=np.uint64)
+        for position in range(per_chunk - 1, -1, -1):
+            words = words * base + padded[..., position]
+        words[:, -1] <<= np.uint64(chunk - last)
+
+        shifts = np.arange(chunk - 1, -1, -1, dtype=np.uint64)
+        bits = (words[..., None] >> shifts) & np.uint64(1)
+        return bits.reshape(rows, -1)[:, :bit_length].astype(np.uint8)
+
+    def _group_coordinates(self, group_ids: np.ndarray, height: int, width: int) -> tuple:
+        """Maps group indices (channel-major, then row, then column) to (channel, row, first col)."""
+        groups_per_row = width // self.n
+        groups_per_channel = height * groups_per_row
+        channel = group_ids // groups_per_channel
+        rem = group_ids % groups_per_channel
+        return channel, rem // groups_per_row, (rem % groups_per_row) * self.n
+
+    def _group_index(self, shape: tuple, count: int, plan=None) -> tuple:
+        """Fancy index (stack, row, cols, channel) of the first `count` groups, from the plan if given."""
+        if plan is not None:
+            plan.check(self, shape)
+            channel, row, col = (plan.take(name, count) for name in ('channel', 'row', 'col'))
+        else:
+            capacity = shape[0] * (shape[1] // self.n) * 3
+            group_ids = select_positions(capacity, count, self.position_key)
+            channel, row, col = self._group_coordinates(group_ids, shape[0], shape[1])
+        return (slice(None), row[:, None], col[:, None] + np.arange(self.n), channel[:, None])
+
+    def _build_plan(self, shape: tuple, max_bits: int | None = None) -> EmbeddingPlan:
+        """Precomputes the group layout for images of `shape` (see methods.registry.compile_plan)."""
+        capacity = shape[0] * (shape[1] // self.n) * 3
+        bit_capacity = self._bits_capacity(capacity)
+        max_bits = bit_capacity if max_bits is None else min(max_bits, bit_capacity)
+        group_ids = select_positions(capacity, self._digit_count(max_bits), self.position_key)
+        channel, row, col = self._group_coordinates(group_ids, shape[0], shape[1])
+        return EmbeddingPlan(self, shape, max_bits, {'channel': channel, 'row': row, 'col': col})
+
+    def changed_region(self, shape: tuple, bit_length: int, plan=None) -> ChangedRegion:
+        """Rows holding the pixel groups that carry the first `bit_length` bits."""
+        _, row, _, _ = self._group_index(shape, self._digit_count(bit_length), plan)
+        return ChangedRegion.from_rows(row.ravel(), shape[0])
+
+    def embed(self, cover_image: np.ndarray, secret_message: str, plan=None) -> tuple:
         """Embeds a secret message into an RGB cover image using EMD."""
         # No grayscale check needed, assume (H, W, 3)
+        stego_stack, bit_length = self._embed_stack(cover_image[None], secret_message, plan)
+        self.last_changed_region = self.changed_region(cover_image.shape, bit_length, plan)
+        return stego_stack[0], bit_length
+
+    def extract(self, stego_image: np.ndarray, bit_length: int, plan=None) -> str:
+        """Extracts a secret message from an RGB stego image."""
+        # No grayscale check needed, assume (H, W, 3)
+        return self._extract_stack(stego_image[None], bit_length, plan)[0]
 
-        stego_image = cover_image.copy().astype(np.int16)
-        binary_message = message_to_binary(secret_message)
-        bit_length = len(binary_message)
+    def _embed_stack(self, cover_stack: np.ndarray, secret_message: str, plan=None) -> tuple:
+        """Embeds the same message into every image of a (N, H, W, 3) stack."""
+        bits = message_to_bit_array(secret_message)
+        return self._embed_bits_stack(cover_stack, bits, plan), int(bits.size)
 
-        # Convert binary message to base-n digits.
-        # For n=2, base=5. We can store 2 bits (0-3) per digit.
-        num_bits_per_digit = 2
-        digits = []
-        for i in range(0, len(binary_message), num_bits_per_digit):
-            bits = binary_message[i:i + num_bits_per_digit]
-            bits = bits.ljust(num_bits_per_digit, '0') # Pad last chunk
-            digits.append(int(bits, 2)) # Values will be in {0, 1, 2, 3}
+    def _embed_bits_stack(self, cover_stack: np.ndarray, bits: np.ndarray, plan=None) -> np.ndarray:
+        """Embeds a 0/1 bit array into every image of a (N, H, W, 3) stack."""
+        stego_stack = cover_stack.astype(np.int16)
 
-        max_capacity_digits = self._calculate_capacity(stego_image)
+        # Convert binary message to base-(2n+1) digits (see _bits_to_digits)
+        digits = self._bits_to_digits(bits)
+
+        max_capacity_digits = self._calculate_capacity(stego_stack[0])
         if len(digits) > max_capacity_digits:
             raise ValueError(f"Message too long! Needs {len(digits)} groups, but capacity is {max_capacity_digits}.")
 
-        height, width, _ = stego_image.shape
-        digit_index = 0
-
-        # Explicitly loop over 3 channels (R, G, B)
-        for channel in range(3):
-            for row in range(height):
-                for col in range(0, width - self.n + 1, self.n):
-                    if digit_index >= len(digits): break
+        # Explicitly use 3 channels (R, G, B); raster order is channel, row, group
+        index = self._group_index(stego_stack.shape[1:], len(digits), plan)
+        stego_stack[index] = self._embed_digits(stego_stack[index], digits)
 
-                    pixel_group = [stego_image[row, col + i, channel] for i in range(self.n)]
-                    new_pixel_group = self._embed_digit(pixel_group, digits[digit_index])
+        return np.clip(stego_stack, 0, 255).astype(np.uint8)
 
-                    for i in range(self.n):
-                        stego_image[row, col + i, channel] = new_pixel_group[i]
-                    digit_index += 1
-                if digit_index >= len(digits): break
-            if digit_index >= len(digits): break
+    def _extract_stack(self, stego_stack: np.ndarray, bit_length: int, plan=None) -> list:
+        """Extracts `bit_length` bits from every image of a (N, H, W, 3) stack."""
+        return [bit_array_to_message(row) for row in self._extract_bits_stack(stego_stack, bit_length, plan)]
 
-        final_stego_image = np.clip(stego_image, 0, 255).astype(np.uint8)
-        return final_stego_image, bit_length
+    def _extract_bits_stack(self, stego_stack: np.ndarray, bit_length: int, plan=None) -> np.ndarray:
+        """Reads the first `bit_length` bits of every image, as a (N, bits) uint8 array."""
+        capacity = self._calculate_capacity(stego_stack[0])
+        digits_needed = min(self._digit_count(bit_length), capacity)
 
-    def extract(self, stego_image: np.ndarray, bit_length: int) -> str:
-        """Extracts a secret message from an RGB stego image."""
-        # No grayscale check needed, assume (H, W, 3)
+        index = self._group_index(stego_stack.shape[1:], digits_needed, plan)
+        extracted_digits = self._extraction_function(stego_stack[index])
+        return self._digits_to_bits(extracted_digits, bit_length)
 
-        height, width, _ = stego_image.shape
-        num_bits_per_digit = 2 # Must match embed
-        extracted_bits = ""
-
-        digits_needed = (bit_length + num_bits_per_digit - 1) // num_bits_per_digit
-
-        digit_count = 0
-        # Explicitly loop over 3 channels (R, G, B)
-        for channel in range(3):
-            for row in range(height):
-                for col in range(0, width - self.n + 1, self.n):
-                    if digit_count >= digits_needed: break
-
-                    pixel_group = [stego_image[row, col + i, channel] for i in range(self.n)]
-                    extracted_digit = self._extraction_function(pixel_group)
-
-                    # Only digits 0-3 were used for embedding
-                    if extracted_digit < 4:
-                        extracted_bits += format(extracted_digit, f'0{num_bits_per_digit}b')
-                    else:
-                        # Digit is 4, which was unused. This is an error.
-                        # Add '00' as a placeholder to be caught by BER.
-                        extracted_bits += "00"
-
-                    digit_count += 1
-                if digit_count >= digits_needed: break
-            if digit_count >= digits_needed: break
-
-        final_binary_string = extracted_bits[:bit_length]
-        return binary_to_message(final_binary_string)
-    
 EMD_DEFAULT_PARAM = {'n': 2}
\ No newline at end of file
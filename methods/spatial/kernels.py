@@ -0,0 +1,326 @@
+"""
+Per-pair / per-group kernels of the spatial methods, with two backends:
+
+- "numpy": vectorized NumPy (always available),
+- "numba": the same kernels as compiled loops, selected automatically when
+  `numba` is importable. They work pair by pair / group by group, so the
+  sequential parts (PVD overflow fix-up chain, EMD candidate search) need no
+  temporaries and scale to large `n`. Compiled with nogil=True, so thread
+  pools (TiledSpatialEngine, map_tiles) run them in parallel.
+
+Both backends are bit-exact; `cross_check()` compares them on random
+inputs and `warmup()` compiles the Numba kernels (and falls back to NumPy if
+the check fails). Pools call `warmup` as their worker initializer so the
+first request does not pay the JIT latency.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:  # Optional dependency
+    numba = None
+
+NUMBA_AVAILABLE = numba is not None
+BACKENDS = ("numpy", "numba")
+
+_backend = "numba" if NUMBA_AVAILABLE else "numpy"
+_warmed_up = False
+
+
+def get_backend() -> str:
+    """Name of the active backend."""
+    return _backend
+
+
+def set_backend(name: str):
+    """Selects the backend ("numpy" or "numba")."""
+    global _backend
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown backend: {name}. Choose from {BACKENDS}.")
+    if name == "numba" and not NUMBA_AVAILABLE:
+        raise ValueError("The 'numba' backend requires the numba package.")
+    _backend = name
+
+
+# ----- NumPy backend -----
+def _pvd_embed_pairs_numpy(p1, p2, capacity, bits_needed, bits):
+    max_capacity = int(capacity.max(initial=0))
+    starts = np.cumsum(capacity, axis=1) - capacity
+    offsets = np.arange(max_capacity)
+    valid = offsets < bits_needed[..., None]
+    padded_bits = np.concatenate((bits, np.zeros(offsets.size, dtype=np.int64)))
+    segment_bits = np.where(valid, padded_bits[np.minimum(starts[..., None] + offsets, padded_bits.size - 1)], 0)
+    weights = np.where(valid, 1 << np.clip(bits_needed[..., None] - 1 - offsets, 0, None), 0)
+    embed_value = (segment_bits * weights).sum(axis=-1)
+
+    diff = p2 - p1
+    extracted_value = np.abs(diff) % (1 << capacity)
+    remainder = np.abs(diff) - extracted_value
+    new_diff_val = remainder + embed_value
+    new_diff = np.where(diff >= 0, new_diff_val, -new_diff_val)
+
+    adjustment = new_diff - diff
+    adj1 = adjustment // 2
+    adj2 = adjustment - adj1
+    p1_new, p2_new = p1 - adj1, p2 + adj2
+
+    # Underflow / overflow fix-up (same order as the scalar version)
+    low = p1_new < 0
+    p2_new = np.where(low, p2_new + p1_new, p2_new)
+    p1_new = np.where(low, 0, p1_new)
+    high = p1_new > 255
+    p2_new = np.where(high, p2_new - (p1_new - 255), p2_new)
+    p1_new = np.where(high, 255, p1_new)
+
+    low = p2_new < 0
+    p1_new = np.where(low, p1_new + p2_new, p1_new)
+    p2_new = np.where(low, 0, p2_new)
+    high = p2_new > 255
+    p1_new = np.where(high, p1_new - (p2_new - 255), p1_new)
+    p2_new = np.where(high, 255, p2_new)
+
+    # Failsafe clip; unused pairs keep their values
+    active = bits_needed > 0
+    return (np.where(active, np.clip(p1_new, 0, 255), p1).astype(np.uint8),
+            np.where(active, np.clip(p2_new, 0, 255), p2).astype(np.uint8))
+
+
+def _pvd_extract_pairs_numpy(p1, p2, capacity, bits_to_take, bit_length):
+    extracted_value = np.abs(p2 - p1) % (1 << capacity)
+
+    # The last pair only contributes the remaining bits. Its value is
+    # formatted to 'bits_to_take' digits (not 'capacity'), as in the scalar
+    # version, so the width can exceed bits_to_take when the value is large.
+    value_bits = np.where(extracted_value > 0, np.floor(np.log2(np.maximum(extracted_value, 1))) + 1, 0).astype(np.int64)
+    partial = (bits_to_take > 0) & (bits_to_take < capacity)
+    widths = np.where(partial, np.maximum(bits_to_take, value_bits), capacity)
+
+    offsets = np.arange(int(capacity.max(initial=0)))
+    shifts = np.clip(widths[..., None] - 1 - offsets, 0, None)
+    bit_matrix = (extracted_value[..., None] >> shifts) & 1
+    taken = offsets < bits_to_take[..., None]
+    return [bit_matrix[i][taken[i]][:bit_length].astype(np.uint8) for i in range(len(p1))]
+
+
+def _emd_embed_groups_numpy(groups, digits, n, base):
+    weights = np.arange(1, n + 1, dtype=np.int64)
+    current = (groups @ weights) % base
+    result = groups.copy()
+    done = current == digits
+
+    for deltas in ((1, -1), (2, -2)):
+        for i in range(n):
+            for delta in deltas:
+                new_value = groups[..., i] + delta
+                hit = (~done
+                       & (new_value >= 0) & (new_value <= 255)
+                       & ((current + delta * (i + 1)) % base == digits))
+                result[..., i] = np.where(hit, new_value, result[..., i])
+                done |= hit
+    return result
+
+
+# ----- Numba backend -----
+if NUMBA_AVAILABLE:
+    @numba.njit(cache=True, nogil=True)
+    def _pvd_embed_pairs_numba(p1, p2, capacity, bits_needed, bits):
+        count, pairs = p1.shape
+        out1 = np.empty((count, pairs), dtype=np.uint8)
+        out2 = np.empty((count, pairs), dtype=np.uint8)
+        for i in range(count):
+            start = 0
+            for k in range(pairs):
+                a, b, cap, need = p1[i, k], p2[i, k], capacity[i, k], bits_needed[i, k]
+                if need <= 0:
+                    out1[i, k], out2[i, k] = a, b
+                    start += cap
+                    continue
+                value = 0
+                for o in range(need):
+                    value = value * 2 + bits[start + o]
+                start += cap
+
+                diff = b - a
+                abs_diff = abs(diff)
+                new_diff = abs_diff - abs_diff % (1 << cap) + value
+                if diff < 0:
+                    new_diff = -new_diff
+                adjustment = new_diff - diff
+                adj1 = adjustment // 2
+                a_new, b_new = a - adj1, b + (adjustment - adj1)
+
+                if a_new < 0:
+                    b_new += a_new
+                    a_new = 0
+                if a_new > 255:
+                    b_new -= a_new - 255
+                    a_new = 255
+                if b_new < 0:
+                    a_new += b_new
+                    b_new = 0
+                if b_new > 255:
+                    a_new -= b_new - 255
+                    b_new = 255
+                out1[i, k] = min(max(a_new, 0), 255)
+                out2[i, k] = min(max(b_new, 0), 255)
+        return out1, out2
+
+    @numba.njit(cache=True, nogil=True)
+    def _pvd_extract_pairs_numba(p1, p2, capacity, bits_to_take, bit_length):
+        count, pairs = p1.shape
+        out = np.zeros((count, bit_length), dtype=np.uint8)
+        filled = np.zeros(count, dtype=np.int64)
+        for i in range(count):
+            position = 0
+            for k in range(pairs):
+                take, cap = bits_to_take[i, k], capacity[i, k]
+                if take <= 0:
+                    continue
+                value = abs(p2[i, k] - p1[i, k]) % (1 << cap)
+                width = cap
+                if take < cap:
+                    value_bits = 0
+                    while (value >> value_bits) > 0:
+                        value_bits += 1
+                    width = max(take, value_bits)
+                for o in range(take):
+                    if position < bit_length:
+                        out[i, position] = (value >> (width - 1 - o)) & 1
+                        position += 1
+            filled[i] = position
+        return out, filled
+
+    @numba.njit(cache=True, nogil=True)
+    def _emd_embed_groups_numba(groups, digits, n, base):
+        result = groups.copy()
+        for g in range(groups.shape[0]):
+            current = 0
+            for i in range(n):
+                current += (i + 1) * groups[g, i]
+            current %= base
+            if current == digits[g]:
+                continue
+            found = False
+            for magnitude in (1, 2):
+                for i in range(n):
+                    for delta in (magnitude, -magnitude):
+                        new_value = groups[g, i] + delta
+                        if 0 <= new_value <= 255 and (current + delta * (i + 1)) % base == digits[g]:
+                            result[g, i] = new_value
+                            found = True
+                            break
+                    if found:
+                        break
+                if found:
+                    break
+        return result
+
+
+# ----- Dispatch -----
+def pvd_embed_pairs(p1, p2, capacity, bits_needed, bits) -> tuple:
+    """
+    PVD embedding of (N, K) pixel pairs.
+
+    Args:
+        p1, p2, capacity, bits_needed: (N, K) int64 arrays (see PVDSteganography._select_pairs).
+        bits: Message bits (0/1).
+
+    Returns:
+        tuple: (p1_new, p2_new) as (N, K) uint8; pairs with bits_needed == 0 are unchanged.
+    """
+    args = [np.ascontiguousarray(a, dtype=np.int64) for a in (p1, p2, capacity, bits_needed, bits)]
+    if _backend == "numba":
+        return _pvd_embed_pairs_numba(*args)
+    return _pvd_embed_pairs_numpy(*args)
+
+
+def pvd_extract_pairs(p1, p2, capacity, bits_to_take, bit_length: int) -> list:
+    """
+    Reads PVD bits from (N, K) pixel pairs.
+
+    Returns:
+        list: One uint8 array per image (shorter than bit_length if the pairs run out).
+    """
+    args = [np.ascontiguousarray(a, dtype=np.int64) for a in (p1, p2, capacity, bits_to_take)]
+    if _backend == "numba":
+        out, filled = _pvd_extract_pairs_numba(*args, int(bit_length))
+        return [out[i, :filled[i]] for i in range(len(out))]
+    return _pvd_extract_pairs_numpy(*args, int(bit_length))
+
+
+def emd_embed_groups(groups, digits, n: int, base: int) -> np.ndarray:
+    """
+    EMD minimal-distortion search for (..., n) pixel groups and one digit per group.
+
+    Candidates are tried in the scalar order: pixel i with +1 then -1, and
+    only if that fails, +2 then -2. Groups with no solution are unchanged.
+    """
+    if _backend == "numba":
+        flat = np.ascontiguousarray(groups.reshape(-1, n), dtype=np.int64)
+        # Writable copy: a read-only view would compile a second specialization
+        flat_digits = np.empty(groups.shape[:-1], dtype=np.int64)
+        flat_digits[...] = digits
+        flat_digits = flat_digits.reshape(-1)
+        return _emd_embed_groups_numba(flat, flat_digits, int(n), int(base)).reshape(groups.shape).astype(groups.dtype)
+    return _emd_embed_groups_numpy(groups.astype(np.int64), np.asarray(digits, dtype=np.int64), n, base).astype(groups.dtype)
+
+
+# ----- Verification / warmup -----
+def cross_check(seed: int = 0, size: int = 4096) -> bool:
+    """
+    Runs every kernel on both backends with random inputs (including pairs
+    that hit the overflow fix-up) and reports whether the outputs are identical.
+    """
+    if not NUMBA_AVAILABLE:
+        return True
+    global _backend
+    rng = np.random.default_rng(seed)
+    # Values near 0 / 255 exercise the underflow / overflow chain
+    p1 = rng.choice(np.r_[0:8, 120:136, 248:256], size=(2, size)).astype(np.int64)
+    p2 = rng.choice(np.r_[0:8, 120:136, 248:256], size=(2, size)).astype(np.int64)
+    table = np.array([3] * 16 + [4] * 16 + [5] * 32 + [6] * 64 + [7] * 128, dtype=np.int64)
+    capacity = table[np.abs(p2 - p1)]
+    bit_length = int(capacity[0].sum()) - 5
+    starts = np.cumsum(capacity, axis=1) - capacity
+    bits_needed = np.clip(bit_length - starts, 0, capacity)
+    bits = rng.integers(0, 2, bit_length)
+    groups = rng.choice(np.r_[0:4, 252:256, 100:104], size=(2, size, 5)).astype(np.int16)
+    digits = rng.integers(0, 11, size)
+
+    previous = _backend
+    results = []
+    try:
+        for name in BACKENDS:
+            _backend = name
+            results.append((pvd_embed_pairs(p1, p2, capacity, bits_needed, bits),
+                            pvd_extract_pairs(p1, p2, capacity, bits_needed, bit_length),
+                            emd_embed_groups(groups, digits, 5, 11),
+                            emd_embed_groups(groups[..., :2], digits % 5, 2, 5)))
+    finally:
+        _backend = previous
+    (embed_np, extract_np, emd5_np, emd2_np), (embed_nb, extract_nb, emd5_nb, emd2_nb) = results
+    return (all(np.array_equal(a, b) for a, b in zip(embed_np, embed_nb))
+            and all(np.array_equal(a, b) for a, b in zip(extract_np, extract_nb))
+            and np.array_equal(emd5_np, emd5_nb) and np.array_equal(emd2_np, emd2_nb))
+
+
+def warmup():
+    """
+    Compiles the Numba kernels for the argument types used by the methods
+    and cross-checks them against NumPy; on a mismatch the NumPy backend is
+    selected. Cheap after the first call (and after the first process, via
+    Numba's on-disk cache). Suitable as a pool `initializer`.
+    """
+    global _warmed_up
+    if _warmed_up or _backend != "numba":
+        return
+    _warmed_up = True
+    if not cross_check(size=256):
+        print("Warning: numba kernels differ from NumPy; using the NumPy backend.")
+        set_backend("numpy")
+
+
+def init_worker(backend: str):
+    """Pool initializer: uses the parent's backend and compiles it up front."""
+    set_backend(backend)
+    warmup()
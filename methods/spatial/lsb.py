@@ -1,39 +1,103 @@
 import numpy as np
-from helpers.message_binary import message_to_binary, binary_to_message
+from helpers.message_binary import message_to_bit_array, bit_array_to_message
+from helpers.position_sampler import select_positions
+from helpers.batching import BatchEmbeddingMixin
+from helpers.embedding_plan import EmbeddingPlan
+from helpers.changed_region import ChangedRegion
 
 
-class LSBSteganography:
-    def __init__(self, bits_per_channel=1):
+class LSBSteganography(BatchEmbeddingMixin):
+    def __init__(self, bits_per_channel=1, position_key=None):
         """
         Initializes the LSB steganography tool.
 
         Args:
             bits_per_channel (int): Number of LSBs to use in each color
                                     channel (1-4).
+            position_key (int | None): Secret key for a pseudo-random
+                                       embedding order. None keeps the
+                                       raster (row, col, channel) order.
         """
         # Ensure bits_per_channel is within a reasonable range (1-4)
         self.bits_per_channel = max(1, min(bits_per_channel, 4))
+        self.position_key = position_key
+        self.last_changed_region = None  # ChangedRegion of the last embed()
         print(f"LSB Steganography initialized to use {self.bits_per_channel} bit(s) per channel.")
 
-    def embed(self, cover_image: np.ndarray, secret_message: str) -> tuple:
+    def _slot_values(self, bits: np.ndarray) -> np.ndarray:
+        """Packs a bit array into one integer per channel sample (last chunk zero-padded)."""
+        bpc = self.bits_per_channel
+        n_slots = -(-bits.size // bpc)
+        padded = np.zeros(n_slots * bpc, dtype=np.uint8)
+        padded[:bits.size] = bits
+        weights = (1 << np.arange(bpc - 1, -1, -1)).astype(np.uint8)
+        return (padded.reshape(n_slots, bpc) * weights).sum(axis=1).astype(np.uint8)
+
+    def _slot_index(self, shape: tuple, n_slots: int, plan=None) -> tuple:
+        """(pixel index, channel) of the first `n_slots` channel samples, from the plan if given."""
+        if plan is not None:
+            plan.check(self, shape)
+            return plan.take('pixel', n_slots), plan.take('channel', n_slots)
+        height, width = shape[:2]
+        slots = select_positions(height * width * 3, n_slots, self.position_key)
+        return slots // 3, slots % 3
+
+    def _build_plan(self, shape: tuple, max_bits: int | None = None) -> EmbeddingPlan:
+        """Precomputes the sample offsets for images of `shape` (see methods.registry.compile_plan)."""
+        height, width = shape[:2]
+        capacity = height * width * 3 * self.bits_per_channel
+        max_bits = capacity if max_bits is None else min(max_bits, capacity)
+        pixel, channel = self._slot_index(shape, -(-max_bits // self.bits_per_channel))
+        return EmbeddingPlan(self, shape, max_bits, {'pixel': pixel, 'channel': channel})
+
+    def changed_region(self, shape: tuple, bit_length: int, plan=None) -> ChangedRegion:
+        """Rows holding the samples that carry the first `bit_length` bits."""
+        pixel, _ = self._slot_index(shape, -(-bit_length // self.bits_per_channel), plan)
+        return ChangedRegion.from_rows(pixel // shape[1], shape[0])
+
+    def embed(self, cover_image: np.ndarray, secret_message: str, plan=None) -> tuple:
         """
         Embeds a secret message into an RGB image.
 
         Args:
             cover_image (np.ndarray): The original RGB image (H, W, 3).
             secret_message (str): The string message to embed.
+            plan (EmbeddingPlan | None): Precompiled plan for this image shape.
 
         Returns:
             tuple: (stego_image (np.ndarray), bit_length (int))
         """
         # We assume cover_image is already a 3-channel RGB ndarray
-        stego_image = cover_image.copy()
+        stego_stack, bit_length = self._embed_stack(cover_image[None], secret_message, plan)
+        self.last_changed_region = self.changed_region(cover_image.shape, bit_length, plan)
+        return stego_stack[0], bit_length
 
-        # Use the robust function to convert the message
-        binary_message = message_to_binary(secret_message)
-        bit_length = len(binary_message)
+    def extract(self, stego_image: np.ndarray, bit_length: int, plan=None) -> str:
+        """
+        Extracts a secret message from an RGB stego image.
 
-        height, width, channels = stego_image.shape
+        Args:
+            stego_image (np.ndarray): The stego image (H, W, 3).
+            bit_length (int): The exact number of bits to extract.
+            plan (EmbeddingPlan | None): Precompiled plan for this image shape.
+
+        Returns:
+            str: The extracted secret message.
+        """
+        # We assume stego_image is a 3-channel RGB ndarray
+        return self._extract_stack(stego_image[None], bit_length, plan)[0]
+
+    def _embed_stack(self, cover_stack: np.ndarray, secret_message: str, plan=None) -> tuple:
+        """Embeds the same message into every image of a (N, H, W, 3) stack."""
+        bits = message_to_bit_array(secret_message)
+        return self._embed_bits_stack(cover_stack, bits, plan), int(bits.size)
+
+    def _embed_bits_stack(self, cover_stack: np.ndarray, bits: np.ndarray, plan=None) -> np.ndarray:
+        """Embeds a 0/1 bit array into every image of a (N, H, W, 3) stack."""
+        stego_stack = cover_stack.copy()
+        bit_length = int(bits.size)
+
+        count, height, width, channels = stego_stack.shape
 
         # We explicitly use 3 channels (RGB) for capacity calculation
         max_capacity = height * width * 3 * self.bits_per_channel
@@ -43,86 +107,43 @@ class LSBSteganography:
                 f"Message too long! Needs {bit_length} bits, but capacity is {max_capacity}."
             )
 
-        binary_index = 0
         # Create a mask to clear the LSBs that we will modify
         # e.g., for 1 bit: 255 - 1 = 254 (11111110)
         # e.g., for 2 bits: 255 - 3 = 252 (11111100)
         clear_mask = 255 - (2**self.bits_per_channel - 1)
 
-        for row in range(height):
-            for col in range(width):
-                # Only iterate over the 3 RGB channels
-                for channel in range(3):
-                    if binary_index >= bit_length:
-                        # Break all loops if message is fully embedded
-                        return stego_image, bit_length
-
-                    pixel_value = int(stego_image[row, col, channel])
-
-                    # 1. Clear the target LSBs of the pixel
-                    pixel_value &= clear_mask
-
-                    # 2. Get the next chunk of bits from the message
-                    # Ensure we don't read past the end of the message
-                    end_chunk_index = min(binary_index + self.bits_per_channel, bit_length)
-                    bits_to_embed_str = binary_message[binary_index : end_chunk_index]
-
-                    # Pad the chunk if it's at the very end and is shorter
-                    bits_to_embed_str = bits_to_embed_str.ljust(self.bits_per_channel, '0')
-                    embed_value = int(bits_to_embed_str, 2)
+        # One slot = one RGB channel sample; raster order is (row, col, channel)
+        embed_values = self._slot_values(bits)
+        rows, chans = self._slot_index(stego_stack.shape[1:], embed_values.size, plan)
+        pixels = stego_stack.reshape(count, -1, channels)
+        pixels[:, rows, chans] = (pixels[:, rows, chans] & clear_mask) | embed_values
 
-                    # 3. Combine the cleared pixel with the message bits
-                    stego_image[row, col, channel] = pixel_value | embed_value
+        return stego_stack
 
-                    binary_index += self.bits_per_channel
+    def _extract_stack(self, stego_stack: np.ndarray, bit_length: int, plan=None) -> list:
+        """Extracts `bit_length` bits from every image of a (N, H, W, 3) stack."""
+        return [bit_array_to_message(row) for row in self._extract_bits_stack(stego_stack, bit_length, plan)]
 
-        return stego_image, bit_length
-
-    def extract(self, stego_image: np.ndarray, bit_length: int) -> str:
-        """
-        Extracts a secret message from an RGB stego image.
-
-        Args:
-            stego_image (np.ndarray): The stego image (H, W, 3).
-            bit_length (int): The exact number of bits to extract.
-
-        Returns:
-            str: The extracted secret message.
-        """
-        # We assume stego_image is a 3-channel RGB ndarray
-        height, width, channels = stego_image.shape
+    def _extract_bits_stack(self, stego_stack: np.ndarray, bit_length: int, plan=None) -> np.ndarray:
+        """Reads the first `bit_length` bits of every image, as a (N, bits) uint8 array."""
+        count, height, width, channels = stego_stack.shape
 
         # Create a mask to isolate the LSBs
         # e.g., for 1 bit: 1 (00000001)
         # e.g., for 2 bits: 3 (00000011)
         extract_mask = (2**self.bits_per_channel - 1)
 
-        extracted_bits = ""
-        bits_to_extract = bit_length
-
-        for row in range(height):
-            for col in range(width):
-                # Only iterate over the 3 RGB channels
-                for channel in range(3):
-                    if len(extracted_bits) >= bits_to_extract:
-                        # Break all loops once all bits are extracted
-                        # Slice to the exact bit_length before decoding
-                        final_binary_string = extracted_bits[:bits_to_extract]
-                        return binary_to_message(final_binary_string)
-
-                    pixel_value = int(stego_image[row, col, channel])
-
-                    # 1. Isolate the LSBs
-                    extracted_chunk_val = pixel_value & extract_mask
-
-                    # 2. Format as a binary string, padding with leading zeros
-                    extracted_chunk_str = format(extracted_chunk_val, f'0{self.bits_per_channel}b')
+        # Only touch the slots that actually carry message bits
+        total_slots = height * width * 3
+        n_slots = min(-(-bit_length // self.bits_per_channel), total_slots)
+        rows, chans = self._slot_index(stego_stack.shape[1:], n_slots, plan)
+        pixels = np.ascontiguousarray(stego_stack).reshape(count, -1, channels)
+        values = pixels[:, rows, chans] & extract_mask
 
-                    extracted_bits += extracted_chunk_str
+        shifts = np.arange(self.bits_per_channel - 1, -1, -1)
+        extracted_bits = ((values[..., None] >> shifts) & 1).astype(np.uint8).reshape(count, -1)
 
-        # Final processing after loops (in case bit_length was exact)
-        final_binary_string = extracted_bits[:bits_to_extract]
-        return binary_to_message(final_binary_string)
+        return extracted_bits[:, :bit_length]
     
 # Image.fromarray(stego_image).save(save_path)
 
@@ -1,35 +1,114 @@
 import numpy as np
-from helpers.message_binary import message_to_binary, binary_to_message
-
-class PVDSteganography:
+from helpers.message_binary import message_to_bit_array, bit_array_to_message
+from helpers.position_sampler import select_positions
+from helpers.batching import BatchEmbeddingMixin
+from helpers.embedding_plan import EmbeddingPlan
+from helpers.changed_region import ChangedRegion
+from methods.spatial import kernels
+
+class PVDSteganography(BatchEmbeddingMixin):
     """
     Implementasi PVD Steganography
     Versi ini DISEDERHANAKAN: hanya untuk gambar RGB (3-channel).
     """
-    def __init__(self):
+    def __init__(self, position_key=None):
+        """
+        Args:
+            position_key (int | None): Kunci urutan penyisipan acak-semu.
+                                       None = urutan raster.
+        """
+        self.position_key = position_key
+        self.last_changed_region = None  # ChangedRegion dari embed() terakhir
         self.ranges = [
             [0, 7, 3], [8, 15, 3], [16, 31, 4],
             [32, 63, 5], [64, 127, 6], [128, 255, 7]
         ]
 
+        # Tabel kapasitas per |diff| (0..255) untuk lookup vektor
+        self._capacity_table = np.array(
+            [self.get_range_and_capacity(d)[1] for d in range(256)], dtype=np.int64
+        )
+        self._min_capacity = min(r[2] for r in self.ranges)
+
     # _prepare_image method is REMOVED.
 
+    def _pair_coordinates(self, pair_ids: np.ndarray, width: int) -> tuple:
+        """
+        Memetakan indeks pasangan (urutan raster: baris, pasangan kolom, channel)
+        ke (row, col kiri, channel).
+        """
+        pairs_per_row = width // 2
+        row = pair_ids // (pairs_per_row * 3)
+        rem = pair_ids % (pairs_per_row * 3)
+        return row, (rem // 3) * 2, rem % 3
+
+    def _pair_count(self, image: np.ndarray) -> int:
+        height, width = image.shape[-3:-1]
+        return height * (width // 2) * 3
+
+    def _pair_index(self, shape: tuple, count: int, plan=None) -> tuple:
+        """(row, col kiri, channel) untuk `count` pasangan pertama, dari plan jika ada."""
+        if plan is not None:
+            plan.check(self, shape)
+            return tuple(plan.take(name, count) for name in ('row', 'col', 'channel'))
+        total_pairs = shape[0] * (shape[1] // 2) * 3
+        pair_ids = select_positions(total_pairs, count, self.position_key)
+        return self._pair_coordinates(pair_ids, shape[1])
+
+    def _build_plan(self, shape: tuple, max_bits: int | None = None) -> EmbeddingPlan:
+        """
+        Menyiapkan koordinat pasangan untuk gambar berukuran `shape`
+        (lihat methods.registry.compile_plan).
+        """
+        total_pairs = shape[0] * (shape[1] // 2) * 3
+        max_capacity = total_pairs * int(self._capacity_table.max())
+        max_bits = max_capacity if max_bits is None else min(max_bits, max_capacity)
+        candidates = min(total_pairs, -(-max_bits // self._min_capacity))
+        row, col, channel = self._pair_index(shape, candidates)
+        return EmbeddingPlan(self, shape, max_bits, {'row': row, 'col': col, 'channel': channel})
+
+    def changed_region(self, shape: tuple, bit_length: int, plan=None) -> ChangedRegion:
+        """
+        Baris yang memuat pasangan kandidat untuk `bit_length` bit (sama seperti
+        _select_pairs); pasangan di luar kandidat tidak pernah diubah.
+        """
+        total_pairs = shape[0] * (shape[1] // 2) * 3
+        candidates = min(total_pairs, -(-bit_length // self._min_capacity)) if bit_length else 0
+        row, _, _ = self._pair_index(shape, candidates, plan)
+        return ChangedRegion.from_rows(row, shape[0])
+
+    def _select_pairs(self, image_stack: np.ndarray, bit_length: int, plan=None) -> tuple:
+        """
+        Memilih pasangan piksel yang dibutuhkan untuk bit_length bit, per gambar.
+
+        Setiap pasangan memuat minimal 3 bit, jadi ceil(bit_length / 3) kandidat
+        pertama (urutan raster atau urutan berkunci) selalu cukup.
+
+        Returns:
+            tuple: (row, col, channel, p1, p2, capacity, bits_to_take) dengan
+                   p1/p2/capacity/bits_to_take berukuran (N, kandidat).
+                   Pasangan yang tidak terpakai memiliki bits_to_take = 0.
+        """
+        total_pairs = self._pair_count(image_stack)
+        candidates = min(total_pairs, -(-bit_length // self._min_capacity))
+        row, col, channel = self._pair_index(image_stack.shape[1:], candidates, plan)
+        p1 = image_stack[:, row, col, channel].astype(np.int64)
+        p2 = image_stack[:, row, col + 1, channel].astype(np.int64)
+        capacity = self._capacity_table[np.abs(p2 - p1)]
+        starts = np.cumsum(capacity, axis=1) - capacity
+        bits_to_take = np.clip(bit_length - starts, 0, capacity)
+        return row, col, channel, p1, p2, capacity, bits_to_take
+
     def _calculate_capacity(self, image: np.ndarray) -> int:
         """
         Menghitung kapasitas embedding untuk gambar RGB.
         """
-        # Asumsikan gambar adalah (H, W, 3)
-        height, width, _ = image.shape
-        total_capacity = 0
-        for row in range(height):
-            for col in range(0, width - 1, 2):
-                # Loop eksplisit 3 channel (R, G, B)
-                for channel in range(3):
-                    p1, p2 = int(image[row, col, channel]), int(image[row, col + 1, channel])
-                    diff = p2 - p1
-                    _, capacity, _, _ = self.get_range_and_capacity(diff)
-                    total_capacity += capacity
-        return total_capacity
+        # Asumsikan gambar adalah (H, W, 3); stack (N, H, W, 3) memberi kapasitas per gambar
+        width = image.shape[-2]
+        pairs = image[..., :(width // 2) * 2, :3].astype(np.int16)
+        diff = pairs[..., 1::2, :] - pairs[..., 0::2, :]
+        capacity = self._capacity_table[np.abs(diff)].sum(axis=(-3, -2, -1))
+        return int(capacity) if np.ndim(capacity) == 0 else capacity
 
     def get_range_and_capacity(self, diff: int) -> tuple:
         """
@@ -41,115 +120,64 @@ class PVDSteganography:
                 return i, capacity, lower, upper
         return 0, 0, 0, 0 # Jika di luar rentang
 
-    def embed(self, cover_image: np.ndarray, secret_message: str) -> tuple:
+    def embed(self, cover_image: np.ndarray, secret_message: str, plan=None) -> tuple:
         """
         Menyisipkan pesan ke dalam gambar RGB.
         """
         # Asumsikan cover_image adalah (H, W, 3) RGB
-        binary_message = message_to_binary(secret_message)
-        message_length = len(binary_message)
+        stego_stack, message_length = self._embed_stack(cover_image[None], secret_message, plan)
+        self.last_changed_region = self.changed_region(cover_image.shape, message_length, plan)
+        return stego_stack[0], message_length
 
-        max_capacity = self._calculate_capacity(cover_image)
+    def extract(self, stego_image: np.ndarray, bit_length: int, plan=None) -> str:
+        """
+        Mengekstrak pesan dari gambar stego RGB.
+        """
+        # Asumsikan stego_image adalah (H, W, 3) RGB
+        return self._extract_stack(stego_image[None], bit_length, plan)[0]
+
+    def _embed_stack(self, cover_stack: np.ndarray, secret_message: str, plan=None) -> tuple:
+        """Menyisipkan pesan yang sama ke setiap gambar dalam stack (N, H, W, 3)."""
+        bits = message_to_bit_array(secret_message)
+        return self._embed_bits_stack(cover_stack, bits, plan), int(bits.size)
+
+    def _embed_bits_stack(self, cover_stack: np.ndarray, bits: np.ndarray, plan=None) -> np.ndarray:
+        """Menyisipkan array bit 0/1 ke setiap gambar dalam stack (N, H, W, 3)."""
+        message_length = int(bits.size)
+
+        max_capacity = int(np.min(self._calculate_capacity(cover_stack)))
         if message_length > max_capacity:
             raise ValueError(f"Pesan terlalu panjang! Butuh {message_length} bits, kapasitas {max_capacity} bits.")
 
-        height, width, _ = cover_image.shape
-        stego_image = cover_image.copy().astype(np.float64)
-        binary_index = 0
-
-        for row in range(height):
-            for col in range(0, width - 1, 2):
-                if binary_index >= message_length: break
-                # Loop eksplisit 3 channel (R, G, B)
-                for channel in range(3):
-                    if binary_index >= message_length: break
-
-                    p1, p2 = int(stego_image[row, col, channel]), int(stego_image[row, col + 1, channel])
-                    diff = p2 - p1
-                    _, capacity, _, _ = self.get_range_and_capacity(diff)
-                    if capacity == 0: continue
-
-                    bits_needed = min(capacity, message_length - binary_index)
-                    if bits_needed == 0: continue
-
-                    message_segment = binary_message[binary_index : binary_index + bits_needed]
-                    embed_value = int(message_segment, 2)
-
-                    extracted_value = abs(diff) % (2**capacity)
-                    remainder = abs(diff) - extracted_value
-                    new_diff_val = remainder + embed_value
-                    new_diff = new_diff_val if diff >= 0 else -new_diff_val
-
-                    adjustment = new_diff - diff
-                    adj1, adj2 = adjustment // 2, adjustment - (adjustment // 2)
-                    p1_new, p2_new = p1 - adj1, p2 + adj2
-
-                    # Penanganan Underflow/Overflow
-                    if p1_new < 0:
-                        p2_new += p1_new
-                        p1_new = 0
-                    elif p1_new > 255:
-                        p2_new -= (p1_new - 255)
-                        p1_new = 255
-
-                    if p2_new < 0:
-                        p1_new += p2_new
-                        p2_new = 0
-                    elif p2_new > 255:
-                        p1_new -= (p2_new - 255)
-                        p2_new = 255
-
-                    # Failsafe clip
-                    if p1_new < 0: p1_new = 0
-                    if p1_new > 255: p1_new = 255
-                    if p2_new < 0: p2_new = 0
-                    if p2_new > 255: p2_new = 255
-
-                    stego_image[row, col, channel] = p1_new
-                    stego_image[row, col + 1, channel] = p2_new
-                    binary_index += bits_needed
-
-            final_stego_image = np.clip(stego_image, 0, 255).astype(np.uint8)
-            return final_stego_image, message_length
-
-    def extract(self, stego_image: np.ndarray, bit_length: int) -> str:
+        stego_stack = cover_stack.copy()
+        if message_length == 0:
+            return stego_stack
+
+        row, col, channel, p1, p2, capacity, bits_needed = self._select_pairs(cover_stack, message_length, plan)
+
+        # Kernel per pasangan (NumPy atau Numba, lihat methods.spatial.kernels)
+        p1_new, p2_new = kernels.pvd_embed_pairs(p1, p2, capacity, bits_needed, bits)
+        stego_stack[:, row, col, channel] = p1_new
+        stego_stack[:, row, col + 1, channel] = p2_new
+        return stego_stack
+
+    def _extract_stack(self, stego_stack: np.ndarray, bit_length: int, plan=None) -> list:
+        """Mengekstrak bit_length bit dari setiap gambar dalam stack (N, H, W, 3)."""
+        return [bit_array_to_message(row) for row in self._extract_bits_stack(stego_stack, bit_length, plan)]
+
+    def _extract_bits_stack(self, stego_stack: np.ndarray, bit_length: int, plan=None) -> list:
         """
-        Mengekstrak pesan dari gambar stego RGB.
+        Membaca bit_length bit pertama dari setiap gambar.
+
+        Returns:
+            list: Satu array uint8 per gambar (bisa lebih pendek dari
+                  bit_length jika kapasitas gambar tidak cukup).
         """
-        # Asumsikan stego_image adalah (H, W, 3) RGB
-        height, width, _ = stego_image.shape
-        bit_buffer = ""
-        bits_extracted = 0
-
-        for row in range(height):
-            for col in range(0, width - 1, 2):
-                if bits_extracted >= bit_length: break
-                # Loop eksplisit 3 channel (R, G, B)
-                for channel in range(3):
-                    if bits_extracted >= bit_length: break
-
-                    p1, p2 = int(stego_image[row, col, channel]), int(stego_image[row, col + 1, channel])
-                    diff = p2 - p1
-                    _, capacity, _, _ = self.get_range_and_capacity(diff)
-                    if capacity == 0: continue
-
-                    bits_to_take = min(capacity, bit_length - bits_extracted)
-                    if bits_to_take <= 0:
-                        # This can happen if bit_length is met exactly
-                        break
-
-                    extracted_value = abs(diff) % (2**capacity)
-
-                    # --- PERBAIKAN BUG KRUSIAL ---
-                    # Format nilai yang diekstrak ke 'bits_to_take' (bukan 'capacity')
-                    # untuk mendapatkan jumlah bit yang benar dan padding nol yang benar.
-                    extracted_bits = format(extracted_value, f'0{bits_to_take}b')
-                    # ---------------------------
-
-                    bit_buffer += extracted_bits
-                    bits_extracted += bits_to_take
-
-            # Kembalikan hanya bit yang diminta
-            return binary_to_message(bit_buffer[:bit_length])
+        count = stego_stack.shape[0]
+        if bit_length <= 0 or self._pair_count(stego_stack) == 0:
+            return [np.zeros(0, dtype=np.uint8) for _ in range(count)]
+
+        _, _, _, p1, p2, capacity, bits_to_take = self._select_pairs(stego_stack, bit_length, plan)
+        return kernels.pvd_extract_pairs(p1, p2, capacity, bits_to_take, bit_length)
         
 PVD_DEFAULT_PARAM = {}
\ No newline at end of file
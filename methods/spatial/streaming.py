@@ -0,0 +1,134 @@
+import numpy as np
+from helpers.message_binary import message_to_bit_array, bit_array_to_message
+from helpers.tiled_io import RowSource, write_rows, ordered_map
+from methods.spatial.pvd import PVDSteganography
+from methods.spatial.tiling import TiledSpatialEngine
+
+
+class StreamingSpatialEngine(TiledSpatialEngine):
+    """
+    Streaming (out-of-core) LSB / EMD / PVD for very large covers.
+
+    The cover is read band by band from a TIFF/BigTIFF file, a '.npy' file or
+    an np.memmap (see helpers.tiled_io.RowSource). Each stego band is written
+    straight to the output file, so peak memory is bounded by the tile budget
+    instead of by the image size. Bits are laid out exactly as in the
+    sequential raster order (see TiledSpatialEngine), so the written image
+    equals `method.embed(cover)`.
+    """
+    # Working memory per image sample while a band is processed: the band
+    # itself plus the int16 / int64 copies made by the method kernels.
+    WORKING_BYTES_PER_SAMPLE = 16
+
+    def __init__(self, method, tile_budget_mb: float = 256, workers: int | None = None, executor: str = "thread"):
+        """
+        Args:
+            method: An LSBSteganography, EMDSteganography or PVDSteganography instance.
+            tile_budget_mb (float): Memory budget for all bands in flight.
+            workers (int | None): Number of bands processed concurrently.
+            executor (str): Pool used by the in-memory embed / extract
+                            ("thread" or "process"); file streaming always
+                            uses threads.
+        """
+        super().__init__(method, workers=workers, executor=executor)
+        if self.sequential:
+            raise ValueError("Streaming mode requires the raster order (position_key=None, radix_chunk_bits=None).")
+        self.tile_budget_bytes = int(tile_budget_mb * 1024 * 1024)
+
+    def _fit_band_rows(self, width: int):
+        """Chooses the band height so that all bands in flight fit the budget."""
+        row_bytes = width * 3 * self.WORKING_BYTES_PER_SAMPLE
+        band_rows = self.tile_budget_bytes // ((self.workers + 1) * row_bytes)
+        # Multiples of 16 rows line up with TIFF tile rows and avoid regrouping copies
+        self.band_rows = max(1, band_rows - band_rows % 16 if band_rows >= 16 else band_rows)
+
+    def band_capacities(self, source, bit_length: int | None = None) -> np.ndarray:
+        """
+        Capacity in bits of every band. PVD reads the source one band at a
+        time and, given `bit_length`, stops once the message is covered (the
+        remaining bands are reported as 0 because they carry no bits).
+        """
+        if not isinstance(self.method, PVDSteganography):
+            return super().band_capacities(source)
+        bands = self.bands(source.shape[0])
+        capacities = np.zeros(len(bands), dtype=np.int64)
+        covered = 0
+        band_sums = ordered_map(lambda band: int(self._pvd_row_capacity(source.read(*band)).sum()), bands, self.workers)
+        try:
+            for index, capacity in enumerate(band_sums):
+                capacities[index] = capacity
+                covered += capacity
+                if bit_length is not None and covered >= bit_length:
+                    break
+        finally:
+            band_sums.close()
+        return capacities
+
+    def embed_file(self, cover, stego_path: str, secret_message: str, compression=None, tile: tuple = (256, 256)) -> int:
+        """
+        Embeds a message into a large cover and writes the stego image band by band.
+
+        Args:
+            cover: Path to a .tif/.tiff/.npy file, or an np.memmap / ndarray.
+            stego_path (str): Output path ('.tif' / '.tiff' or '.npy').
+            secret_message (str): The message to embed.
+            compression (str | None): TIFF compression of the output.
+            tile (tuple): TIFF tile shape of the output (multiples of 16).
+
+        Returns:
+            int: bit_length of the embedded message.
+        """
+        with RowSource(cover) as source:
+            height, width = source.shape[:2]
+            self._fit_band_rows(width)
+
+            bits = message_to_bit_array(secret_message)
+            bit_length = int(bits.size)
+            capacities = self.band_capacities(source, bit_length)
+            if bit_length > int(capacities.sum()):
+                raise ValueError(f"Message too long! Needs {bit_length} bits, but capacity is {int(capacities.sum())}.")
+            segments = self._segments(source, bit_length, capacities)
+
+            def process(task):
+                (r0, r1), band_segments = task
+                band = source.read(r0, r1)
+                band_bits = np.concatenate([bits[a:b] for a, b in band_segments])
+                if band_bits.size == 0 and not self.TOUCHES_ALL_BANDS:
+                    return band
+                return self.method._embed_bits_stack(band[None], band_bits)[0]
+
+            stego_bands = ordered_map(process, zip(self.bands(height), segments), self.workers)
+            write_rows(stego_path, source.shape, source.dtype, stego_bands, tile, compression)
+        return bit_length
+
+    def extract_file(self, stego, bit_length: int) -> str:
+        """
+        Extracts a message from a large stego image, reading only the bands
+        that carry message bits.
+
+        Args:
+            stego: Path to a .tif/.tiff/.npy file, or an np.memmap / ndarray.
+            bit_length (int): The exact number of bits to extract.
+        """
+        with RowSource(stego) as source:
+            self._fit_band_rows(source.shape[1])
+            capacities = self.band_capacities(source, bit_length)
+            segments = self._segments(source, bit_length, capacities)
+            tasks = [(band, band_segments)
+                     for band, band_segments in zip(self.bands(source.shape[0]), segments)
+                     if any(b > a for a, b in band_segments)]
+
+            def process(task):
+                (r0, r1), band_segments = task
+                bit_count = sum(b - a for a, b in band_segments)
+                return np.asarray(self.method._extract_bits_stack(source.read(r0, r1)[None], bit_count)[0], dtype=np.uint8)
+
+            bits = np.zeros(bit_length, dtype=np.uint8)
+            filled = 0
+            for (_, band_segments), band_bits in zip(tasks, ordered_map(process, tasks, self.workers)):
+                position = 0
+                for a, b in band_segments:
+                    bits[a:b] = band_bits[position:position + b - a]
+                    position += b - a
+                    filled = max(filled, b)
+        return bit_array_to_message(bits[:filled])
@@ -0,0 +1,242 @@
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+import numpy as np
+from helpers.message_binary import message_to_bit_array, bit_array_to_message
+from methods.spatial.lsb import LSBSteganography
+from methods.spatial.emd import EMDSteganography
+from methods.spatial.pvd import PVDSteganography
+from methods.spatial import kernels
+
+
+def _attach(spec):
+    """
+    Resolves an array spec: either an np.ndarray (thread mode) or a
+    (shm_name, shape, dtype) tuple pointing at shared memory (process mode).
+
+    Returns:
+        tuple: (array, shared_memory handle or None)
+    """
+    if isinstance(spec, np.ndarray):
+        return spec, None
+    name, shape, dtype = spec
+    shm = shared_memory.SharedMemory(name=name)
+    return np.ndarray(shape, dtype=dtype, buffer=shm.buf), shm
+
+
+def _embed_band(method, src_spec, dst_spec, r0: int, r1: int, band_bits: np.ndarray):
+    """Embeds `band_bits` into rows r0:r1 of src and writes the band into dst."""
+    src, src_shm = _attach(src_spec)
+    dst, dst_shm = _attach(dst_spec)
+    try:
+        dst[r0:r1] = method._embed_bits_stack(src[None, r0:r1], band_bits)[0]
+    finally:
+        for shm in (src_shm, dst_shm):
+            if shm is not None:
+                shm.close()
+
+
+def _extract_band(method, src_spec, r0: int, r1: int, bit_count: int) -> np.ndarray:
+    """Reads the first `bit_count` bits of rows r0:r1 (in the band's own order)."""
+    src, src_shm = _attach(src_spec)
+    try:
+        return np.asarray(method._extract_bits_stack(src[None, r0:r1], bit_count)[0], dtype=np.uint8)
+    finally:
+        if src_shm is not None:
+            src_shm.close()
+
+
+class TiledSpatialEngine:
+    """
+    Multi-core tiled execution for the spatial methods (LSB, EMD, PVD).
+
+    The image is split into horizontal row bands. Every band's capacity is
+    computed up front in one vectorized pass and a prefix sum over those
+    capacities gives the message bits each band carries, so the bands can be
+    embedded / extracted independently in a thread or process pool. Bits are
+    assigned exactly as in the sequential raster order, so the stego image is
+    byte-identical to `method.embed`.
+
+    EMD orders its groups channel-major (all of R, then G, then B), so a band
+    carries one slice of the message per channel; the three slices line up
+    with the band's own channel-major order.
+
+    A keyed (position_key) order is not band-contiguous, and EMD radix chunks
+    (radix_chunk_bits) can span bands, so such methods run sequentially.
+    """
+    SUPPORTED = (LSBSteganography, EMDSteganography, PVDSteganography)
+    # True when bands without message bits still have to go through the
+    # method (e.g. a colour-space round trip); False leaves them untouched.
+    TOUCHES_ALL_BANDS = False
+
+    def __init__(self, method, band_rows: int = 256, workers: int | None = None, executor: str = "thread"):
+        """
+        Args:
+            method: An LSBSteganography, EMDSteganography or PVDSteganography instance.
+            band_rows (int): Number of image rows per band.
+            workers (int | None): Pool size; None = os.cpu_count().
+            executor (str): "thread" (default) or "process". Process workers
+                            read and write the image through shared memory.
+        """
+        if not isinstance(method, self.SUPPORTED):
+            supported = ", ".join(cls.__name__ for cls in self.SUPPORTED)
+            raise ValueError(f"{type(self).__name__} only supports {supported}.")
+        if executor not in ("thread", "process"):
+            raise ValueError("executor must be 'thread' or 'process'.")
+        self.method = method
+        self.band_rows = max(1, int(band_rows))
+        self.workers = max(1, int(workers or os.cpu_count() or 1))
+        self.executor = executor
+
+    @property
+    def sequential(self) -> bool:
+        return (getattr(self.method, "position_key", None) is not None
+                or getattr(self.method, "radix_chunk_bits", None) is not None)
+
+    def bands(self, height: int) -> list:
+        """(r0, r1) row ranges of all bands."""
+        return [(r0, min(r0 + self.band_rows, height)) for r0 in range(0, height, self.band_rows)]
+
+    def band_capacities(self, image: np.ndarray) -> np.ndarray:
+        """Capacity in bits of every band, from a single vectorized pass."""
+        height, width = image.shape[:2]
+        bands = self.bands(height)
+        rows = np.array([r1 - r0 for r0, r1 in bands], dtype=np.int64)
+        method = self.method
+        if isinstance(method, LSBSteganography):
+            return rows * width * 3 * method.bits_per_channel
+        if isinstance(method, EMDSteganography):
+            return rows * (width // method.n) * 3 * 2
+        row_capacity = self._pvd_row_capacity(image)
+        return np.add.reduceat(row_capacity, [r0 for r0, _ in bands]) if height else rows
+
+    def _pvd_row_capacity(self, rows: np.ndarray) -> np.ndarray:
+        """PVD capacity in bits of every row of a (rows, W, 3) array."""
+        width = rows.shape[1]
+        pairs = rows[:, :(width // 2) * 2, :3].astype(np.int16)
+        return self.method._capacity_table[np.abs(pairs[:, 1::2] - pairs[:, 0::2])].sum(axis=(1, 2))
+
+    def _segments(self, image: np.ndarray, bit_length: int, capacities: np.ndarray | None = None) -> list:
+        """
+        Message bit ranges of every band, in the band's own bit order.
+
+        Args:
+            image (np.ndarray): The cover / stego image (only read for PVD).
+            bit_length (int): Message length in bits.
+            capacities (np.ndarray | None): Precomputed band_capacities(image).
+
+        Returns:
+            list: One list of (start, stop) ranges per band.
+        """
+        height, width = image.shape[:2]
+        bands = self.bands(height)
+        if isinstance(self.method, EMDSteganography):
+            groups_per_row = width // self.method.n
+            groups_per_channel = height * groups_per_row
+            segments = []
+            for r0, r1 in bands:
+                band = []
+                for channel in range(3):
+                    d0 = channel * groups_per_channel + r0 * groups_per_row
+                    d1 = channel * groups_per_channel + r1 * groups_per_row
+                    band.append((min(2 * d0, bit_length), min(2 * d1, bit_length)))
+                segments.append(band)
+            return segments
+
+        if capacities is None:
+            capacities = self.band_capacities(image)
+        offsets = np.cumsum(capacities) - capacities
+        return [[(int(min(o, bit_length)), int(min(o + c, bit_length)))] for o, c in zip(offsets, capacities)]
+
+    def _run(self, worker, tasks: list, arrays: dict) -> list:
+        """
+        Runs worker(method, *specs, *task) for every task.
+
+        Args:
+            worker (callable): _embed_band or _extract_band.
+            tasks (list): Per-band argument tuples.
+            arrays (dict): name -> np.ndarray; passed to the worker directly
+                           (threads) or through shared memory (processes).
+                           Arrays are copied back after the run.
+        """
+        if not tasks:
+            return []
+        if self.executor == "thread" or self.workers == 1:
+            specs = tuple(arrays.values())
+            if self.workers == 1 or len(tasks) == 1:
+                return [worker(self.method, *specs, *task) for task in tasks]
+            with ThreadPoolExecutor(max_workers=self.workers) as pool:
+                return list(pool.map(lambda task: worker(self.method, *specs, *task), tasks))
+
+        handles = {}
+        try:
+            for name, array in arrays.items():
+                shm = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)[...] = array
+                handles[name] = shm
+            specs = tuple((handles[name].name, array.shape, array.dtype.str) for name, array in arrays.items())
+            with ProcessPoolExecutor(max_workers=self.workers, initializer=kernels.init_worker,
+                                     initargs=(kernels.get_backend(),)) as pool:
+                futures = [pool.submit(worker, self.method, *specs, *task) for task in tasks]
+                results = [future.result() for future in futures]
+            for name, array in arrays.items():
+                array[...] = np.ndarray(array.shape, dtype=array.dtype, buffer=handles[name].buf)
+            return results
+        finally:
+            for shm in handles.values():
+                shm.close()
+                shm.unlink()
+
+    def embed(self, cover_image: np.ndarray, secret_message: str) -> tuple:
+        """
+        Embeds a secret message band by band.
+
+        Returns:
+            tuple: (stego_image (np.ndarray), bit_length (int)), identical to
+                   `method.embed(cover_image, secret_message)`.
+        """
+        if self.sequential:
+            return self.method.embed(cover_image, secret_message)
+
+        bits = message_to_bit_array(secret_message)
+        bit_length = int(bits.size)
+        capacities = self.band_capacities(cover_image)
+        if bit_length > int(capacities.sum()):
+            raise ValueError(f"Message too long! Needs {bit_length} bits, but capacity is {int(capacities.sum())}.")
+
+        tasks = []
+        segments_per_band = self._segments(cover_image, bit_length, capacities)
+        for (r0, r1), segments in zip(self.bands(cover_image.shape[0]), segments_per_band):
+            band_bits = np.concatenate([bits[a:b] for a, b in segments])
+            if band_bits.size or self.TOUCHES_ALL_BANDS:
+                tasks.append((r0, r1, band_bits))
+
+        cover = np.ascontiguousarray(cover_image)
+        stego_image = cover.copy()
+        self._run(_embed_band, tasks, {"cover": cover, "stego": stego_image})
+        return stego_image, bit_length
+
+    def extract(self, stego_image: np.ndarray, bit_length: int) -> str:
+        """Extracts `bit_length` bits band by band (same result as `method.extract`)."""
+        if self.sequential:
+            return self.method.extract(stego_image, bit_length)
+
+        bands, tasks = [], []
+        for (r0, r1), segments in zip(self.bands(stego_image.shape[0]), self._segments(stego_image, bit_length)):
+            bit_count = sum(b - a for a, b in segments)
+            if bit_count:
+                bands.append(segments)
+                tasks.append((r0, r1, bit_count))
+
+        results = self._run(_extract_band, tasks, {"stego": np.ascontiguousarray(stego_image)})
+
+        bits = np.zeros(bit_length, dtype=np.uint8)
+        filled = 0
+        for segments, band_bits in zip(bands, results):
+            position = 0
+            for a, b in segments:
+                bits[a:b] = band_bits[position:position + b - a]
+                position += b - a
+                filled = max(filled, b)
+        return bit_array_to_message(bits[:filled])
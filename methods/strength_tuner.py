@@ -0,0 +1,222 @@
+import copy
+import numpy as np
+import cv2
+from numpy.fft import fft2
+from helpers.batching import stack_cvt_color
+from helpers.message_binary import message_to_bit_array, message_to_binary
+from metrics.impercability import ReferenceImageStats, SteganographyMetrics
+from methods.frequency.dct import DCTSteganography
+from methods.frequency.dwt import DWTSteganography
+from methods.frequency.fft import FFTSteganography
+
+# Kelas metode -> (parameter kekuatan, rentang pencarian default, resolusi).
+# Rentang DCT / DWT sama dengan batas input di UI; boost FFT baru terasa di orde 1e4.
+STRENGTH_PARAMS = {
+    DCTSteganography: ('quant_factor', (1, 100), 1),
+    DWTSteganography: ('delta', (1.0, 100.0), 0.1),
+    FFTSteganography: ('mag_min_boost', (0.0, 100000.0), 1.0),
+}
+
+
+class _DCTRenderer:
+    """Cache: YCrCb cover + blok DCT kanal target. Per langkah: QIM + inverse DCT."""
+    def __init__(self, method: DCTSteganography, cover: np.ndarray, secret_message: str):
+        self.method = method
+        bits = message_to_bit_array(secret_message)
+        self.bit_length = int(bits.size)
+        capacity = method._calculate_capacity(cover.shape)
+        if self.bit_length > capacity:
+            raise ValueError(f"Pesan terlalu panjang! Kapasitas: {capacity} bit, Dibutuhkan: {self.bit_length} bit.")
+
+        ycrcb = stack_cvt_color(cover[None], cv2.COLOR_RGB2YCrCb)
+        # Blok diisi dalam urutan raster, jadi hanya `self.rows` baris pertama yang berubah;
+        # sisanya cukup hasil konversi bolak-balik YCrCb cover (dihitung sekali)
+        self.base_rgb = stack_cvt_color(ycrcb, cv2.COLOR_YCrCb2RGB)[0]
+        self.parts = []
+        self.rows = 0
+        for spec, (start, stop) in zip(method._channel_specs(), method._split_bits(self.bit_length, cover.shape)):
+            block_count = -(-(stop - start) // len(spec[2]))
+            rows, cols = method._block_index(block_count, cover.shape[1])
+            if block_count:
+                self.rows = max(self.rows, int(rows.max()) + 1)
+            plane = ycrcb[..., spec[0]].astype(np.float32)
+            self.parts.append((rows, cols, method._dct2d(plane[:, rows, cols] - 128.0), bits[start:stop]))
+        self.ycrcb = ycrcb[:, :self.rows]
+
+    def render(self, value) -> np.ndarray:
+        trial = copy.copy(self.method)
+        trial.quant_factor = value
+        ycrcb = self.ycrcb.copy()
+        # Override quant_factor per kanal (jika ada) tetap berlaku lewat _channel_specs
+        for (rows, cols, blocks, bits), spec in zip(self.parts, trial._channel_specs()):
+            stego_y = ycrcb[..., spec[0]].astype(np.float32)
+            trial._write_blocks(stego_y, blocks.copy(), rows, cols, bits, spec)
+            ycrcb[..., spec[0]] = stego_y.astype(np.uint8)
+        stego = self.base_rgb.copy()
+        stego[:self.rows] = stack_cvt_color(ycrcb, cv2.COLOR_YCrCb2RGB)[0]
+        return stego
+
+
+class _DWTRenderer:
+    """Cache: wavedec2 bidang Y + indeks koefisien. Per langkah: QIM + waverec2."""
+    def __init__(self, method: DWTSteganography, cover: np.ndarray, secret_message: str):
+        if method.tile_size is not None:
+            raise ValueError("StrengthTuner belum mendukung DWT mode tile.")
+        self.method = method
+        binary_message = message_to_binary(secret_message)
+        self.bit_length = len(binary_message)
+        if method.robust_mode:
+            binary_message = method._interleave(method._repeat_bits(binary_message, method.payload_reps), method.interleave_seed)
+        self.bitstream = np.fromiter(binary_message, dtype=np.int8)
+
+        self.ycrcb, self.y, self.coeffs = method._decompose(cover[None])
+        sub, _ = method._get_subband_ref(self.coeffs)
+        self.sub_flat = sub.astype(np.float64).reshape(1, -1)
+        if self.bit_length > self.sub_flat.shape[1]:
+            raise ValueError(f"Pesan terlalu panjang! Kapasitas: {self.sub_flat.shape[1]} bit, Dibutuhkan: {self.bit_length} bit.")
+        self.idx = method._coef_index(cover.shape, len(self.bitstream))
+
+    def render(self, value) -> np.ndarray:
+        trial = copy.copy(self.method)
+        trial.delta = float(value)
+        # Salinan list: setter hanya mengganti elemen, array hasil wavedec2 tidak diubah
+        coeffs = list(self.coeffs)
+        sub, setter = trial._get_subband_ref(coeffs)
+        sub_flat = self.sub_flat.copy()
+        trial._qim_embed(sub_flat, self.idx, self.bitstream)
+        setter(sub_flat.reshape(sub.shape))
+        return trial._reconstruct(self.ycrcb.copy(), self.y, coeffs)[0]
+
+
+class _FFTRenderer:
+    """
+    Cache: spektrum bidang payload + bidang header yang sudah disisipi
+    (header tidak memakai boost). Per langkah: tulis fase payload + ifft2.
+    """
+    def __init__(self, method: FFTSteganography, cover: np.ndarray, secret_message: str):
+        if method.tile_size is not None:
+            raise ValueError("StrengthTuner belum mendukung FFT mode tile.")
+        for name in (method.payload_channel, method.header_channel):
+            if name not in method.PLANE_NAMES:
+                raise ValueError(f"Unknown channel name: {name}")
+        self.method = method
+        pay_bits = message_to_bit_array(secret_message)
+        self.bit_length = int(pay_bits.size)
+        capacity = method._payload_capacity(*cover.shape[:2])
+        if self.bit_length > capacity:
+            raise ValueError(f"Message too long. Capacity: {capacity} bits, Needed: {self.bit_length} bits.")
+        self.header_bits, self.pay_bits = method._message_bits(secret_message, pay_bits, 1)
+
+        self.planes = dict(zip(method.PLANE_NAMES, method._split_ycrcb(cover[None])))
+        F = np.fft.fftshift(fft2(self.planes[method.payload_channel]), axes=(-2, -1))
+        self.mag, self.phase = np.abs(F), np.angle(F)
+        self.header_plane = None
+        if method.header_channel != method.payload_channel:
+            self.header_plane = method._write_grouped_bits(self.planes[method.header_channel], self.header_bits,
+                                                           repeat=method.HDR_R, allow_boost=False).astype(np.float64)
+
+    def render(self, value) -> np.ndarray:
+        method = self.method
+        trial = copy.copy(method)
+        trial.mag_min_boost = float(value)
+        planes = dict(self.planes)
+        planes[method.payload_channel] = trial._write_phase_bits(self.mag.copy(), self.phase.copy(), self.pay_bits,
+                                                                 repeat=method.PAY_R, allow_boost=True).astype(np.float64)
+        if self.header_plane is None:
+            # Header dan payload di bidang yang sama: header ditulis ulang di atas payload
+            planes[method.header_channel] = trial._write_grouped_bits(planes[method.header_channel], self.header_bits,
+                                                                      repeat=method.HDR_R, allow_boost=False).astype(np.float64)
+        else:
+            planes[method.header_channel] = self.header_plane
+        return method._merge_ycrcb(planes["Y"].astype(np.uint8), planes["Cr"], planes["Cb"])[0]
+
+
+_RENDERERS = {DCTSteganography: _DCTRenderer, DWTSteganography: _DWTRenderer, FFTSteganography: _FFTRenderer}
+
+
+class StrengthTuner:
+    """
+    Mencari parameter kekuatan terkuat (quant_factor DCT, delta DWT,
+    mag_min_boost FFT) yang masih memenuhi target PSNR atau SSIM.
+
+    Transformasi maju cover dihitung sekali; setiap langkah bisection hanya
+    menjalankan kuantisasi + transformasi balik lalu menghitung metrik.
+    Kualitas diasumsikan turun seiring kekuatan naik; nilai yang dikembalikan
+    selalu sudah diverifikasi memenuhi target.
+    """
+    def __init__(self, method, target_psnr: float | None = None, target_ssim: float | None = None,
+                 bounds: tuple | None = None, resolution: float | None = None, max_steps: int = 30):
+        """
+        Args:
+            method: Instance DCTSteganography, DWTSteganography atau FFTSteganography.
+            target_psnr (float | None): PSNR minimal (dB); dihitung dari MSE.
+            target_ssim (float | None): SSIM minimal (lebih mahal per langkah).
+            bounds (tuple | None): (min, max) rentang pencarian; default dari STRENGTH_PARAMS.
+            resolution (float | None): Lebar interval saat bisection berhenti.
+            max_steps (int): Batas langkah bisection.
+        """
+        if type(method) not in _RENDERERS:
+            raise ValueError(f"StrengthTuner tidak mendukung {type(method).__name__}.")
+        if (target_psnr is None) == (target_ssim is None):
+            raise ValueError("Isi tepat satu dari target_psnr atau target_ssim.")
+        self.method = method
+        self.param, default_bounds, default_resolution = STRENGTH_PARAMS[type(method)]
+        self.target_psnr = target_psnr
+        self.target_ssim = target_ssim
+        self.bounds = tuple(bounds or default_bounds)
+        self.resolution = default_resolution if resolution is None else resolution
+        self.max_steps = int(max_steps)
+        if self.bounds[0] > self.bounds[1]:
+            raise ValueError(f"bounds tidak valid: {self.bounds}")
+
+    def _quality(self, cover: np.ndarray, stego: np.ndarray, reference: ReferenceImageStats | None = None) -> dict:
+        # cv2.norm menjumlahkan kuadrat selisih uint8 tanpa salinan float64
+        result = {'mse': cv2.norm(cover, stego, cv2.NORM_L2SQR) / cover.size}
+        result['psnr'] = float(SteganographyMetrics.calculate_psnr(None, result['mse']))
+        if self.target_ssim is not None:
+            result['ssim'] = float(SteganographyMetrics(cover, stego, reference=reference).calculate_ssim())
+            result['ok'] = result['ssim'] >= self.target_ssim
+        else:
+            result['ok'] = result['psnr'] >= self.target_psnr
+        return result
+
+    def tune(self, cover_image: np.ndarray, secret_message: str) -> dict:
+        """
+        Returns:
+            dict: {'param', 'value', 'mse', 'psnr', ('ssim'), 'stego_image', 'bit_length', 'steps'}
+                  untuk nilai terkuat yang memenuhi target.
+        """
+        renderer = _RENDERERS[type(self.method)](self.method, cover_image, secret_message)
+        integer = self.param == 'quant_factor'
+        # Statistik SSIM sisi cover dihitung sekali untuk semua langkah
+        reference = ReferenceImageStats(cover_image) if self.target_ssim is not None else None
+        steps = 0
+
+        def evaluate(value):
+            nonlocal steps
+            steps += 1
+            stego = renderer.render(value)
+            return dict(self._quality(cover_image, stego, reference), value=value, stego_image=stego)
+
+        low, high = self.bounds
+        best = evaluate(high)
+        if not best['ok']:
+            best = evaluate(low)
+            if not best['ok']:
+                raise ValueError(f"Target kualitas tidak tercapai bahkan dengan {self.param}={low} "
+                                 f"(PSNR {best['psnr']:.2f} dB).")
+            # Invarian: `low` memenuhi target, `high` tidak
+            while high - low > self.resolution and steps < self.max_steps:
+                mid = (low + high) // 2 if integer else (low + high) / 2
+                if mid in (low, high):
+                    break
+                trial = evaluate(mid)
+                if trial['ok']:
+                    low, best = mid, trial
+                else:
+                    high = mid
+
+        best.pop('ok')
+        best.update(param=self.param, bit_length=renderer.bit_length, steps=steps)
+        print(f"StrengthTuner: {self.param}={best['value']} (PSNR {best['psnr']:.2f} dB, {steps} langkah)")
+        return best
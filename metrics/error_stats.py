@@ -0,0 +1,188 @@
+import numpy as np
+
+# Row tiles are sized to hold about this many samples (rows * width * channels)
+ERROR_TILE_SAMPLES = 1 << 20
+
+
+def psnr_from_mse(mse: float, max_pixel_value: float = 255.0) -> float:
+    """PSNR in dB for a given MSE; identical images (MSE 0) give infinity."""
+    if mse == 0:
+        return float('inf')
+    return 20 * np.log10(max_pixel_value / np.sqrt(mse))
+
+
+def row_tiles(height: int, row_samples: int, tile_rows: int | None = None) -> list:
+    """(r0, r1) row ranges covering `height` rows, each about ERROR_TILE_SAMPLES samples."""
+    if tile_rows is None:
+        tile_rows = ERROR_TILE_SAMPLES // max(1, row_samples)
+    tile_rows = max(1, int(tile_rows))
+    return [(r0, min(r0 + tile_rows, height)) for r0 in range(0, height, tile_rows)]
+
+
+def _work_dtype(*images: np.ndarray):
+    """int32 for 8/16-bit integer inputs (exact sums), float64 otherwise."""
+    if all(image.dtype.kind in 'ui' and image.dtype.itemsize <= 2 for image in images):
+        return np.int32
+    return np.float64
+
+
+def _uint8_totals(original_image, stego_image, channels, tile_rows, reference=None) -> tuple:
+    """
+    Raw sums for uint8 images from 256-bin histograms: of each image's
+    values and of the per-channel absolute difference. No tile is ever
+    widened beyond uint8. With `reference` = (sum, sum of squares) of the
+    original image, its histogram is skipped.
+    """
+    levels = np.arange(256, dtype=np.int64)
+    hist_a = np.zeros(256, dtype=np.int64)
+    hist_b = np.zeros(256, dtype=np.int64)
+    hist_d = np.zeros((channels, 256), dtype=np.int64)
+    height = original_image.shape[0]
+    for r0, r1 in row_tiles(height, original_image.size // height, tile_rows):
+        a = original_image[r0:r1].reshape(-1, channels)
+        b = stego_image[r0:r1].reshape(-1, channels)
+        if reference is None:
+            hist_a += np.bincount(a.ravel(), minlength=256)
+        hist_b += np.bincount(b.ravel(), minlength=256)
+        diff = np.maximum(a, b)
+        diff -= np.minimum(a, b)
+        for channel in range(channels):
+            hist_d[channel] += np.bincount(diff[:, channel], minlength=256)
+
+    squares = levels * levels
+    nonzero = np.flatnonzero(hist_d.sum(axis=0))
+    sum_a, sum_aa = reference or (int(hist_a @ levels), int(hist_a @ squares))
+    return (sum_a, int(hist_b @ levels), sum_aa, int(hist_b @ squares),
+            [int(value) for value in hist_d @ squares], int(hist_d.sum(axis=0) @ levels),
+            int(nonzero[-1]) if nonzero.size else 0)
+
+
+def _generic_totals(original_image, stego_image, channels, tile_rows, reference=None) -> tuple:
+    """Raw sums for any other dtype, one converted tile at a time."""
+    work = _work_dtype(original_image, stego_image)
+    acc = np.int64 if work is np.int32 else np.float64
+    sq_err = np.zeros(channels, dtype=acc)
+    sum_a = sum_b = sum_aa = sum_bb = abs_err = acc(0)
+    max_err = 0
+    height = original_image.shape[0]
+    for r0, r1 in row_tiles(height, original_image.size // height, tile_rows):
+        a = original_image[r0:r1].reshape(-1, channels).astype(work)
+        b = stego_image[r0:r1].reshape(-1, channels).astype(work)
+        if reference is None:
+            sum_a += a.sum(dtype=acc)
+            sum_aa += np.einsum('ij,ij->', a, a, dtype=acc)
+        sum_b += b.sum(dtype=acc)
+        sum_bb += np.einsum('ij,ij->', b, b, dtype=acc)
+        a -= b  # a now holds the difference
+        sq_err += np.einsum('ij,ij->j', a, a, dtype=acc)
+        np.abs(a, out=a)
+        abs_err += a.sum(dtype=acc)
+        max_err = max(max_err, a.max())
+    if reference is not None:
+        sum_a, sum_aa = acc(reference[0]), acc(reference[1])
+    return (sum_a.item(), sum_b.item(), sum_aa.item(), sum_bb.item(),
+            [value.item() for value in sq_err], abs_err.item(), max_err.item())
+
+
+def _totals(original_image, stego_image, channels, tile_rows, reference=None) -> tuple:
+    if original_image.dtype == np.uint8 and stego_image.dtype == np.uint8:
+        return _uint8_totals(original_image, stego_image, channels, tile_rows, reference)
+    return _generic_totals(original_image, stego_image, channels, tile_rows, reference)
+
+
+def _region_totals(original_image, stego_image, channels, tile_rows, region, reference=None) -> tuple:
+    """
+    Raw sums when only the rows of `region` (a helpers.changed_region.ChangedRegion)
+    can differ: the difference terms come from those rows alone, and the
+    stego image's whole-image sums are the cover's with those rows swapped.
+    """
+    parts = [_totals(original_image[r0:r1], stego_image[r0:r1], channels, tile_rows)
+             for r0, r1 in region.row_ranges]
+    sum_a, sum_aa = reference or reference_sums(original_image, tile_rows)
+    part_a = sum(part[0] for part in parts)
+    part_aa = sum(part[2] for part in parts)
+    sum_b = sum_a - part_a + sum(part[1] for part in parts)
+    sum_bb = sum_aa - part_aa + sum(part[3] for part in parts)
+    sq_err = [sum(values) for values in zip(*(part[4] for part in parts))] or [0] * channels
+    return (sum_a, sum_b, sum_aa, sum_bb, sq_err,
+            sum(part[5] for part in parts), max((part[6] for part in parts), default=0))
+
+
+def reference_sums(image: np.ndarray, tile_rows: int | None = None) -> tuple:
+    """(sum, sum of squares) of an image, exact for integer inputs; reusable as `reference`."""
+    if image.dtype == np.uint8:
+        levels = np.arange(256, dtype=np.int64)
+        hist = np.bincount(image.ravel(), minlength=256)
+        return int(hist @ levels), int(hist @ (levels * levels))
+    work = _work_dtype(image)
+    acc = np.int64 if work is np.int32 else np.float64
+    total = total_sq = acc(0)
+    height = image.shape[0]
+    for r0, r1 in row_tiles(height, image.size // height, tile_rows):
+        tile = image[r0:r1].reshape(-1).astype(work)
+        total += tile.sum(dtype=acc)
+        total_sq += np.einsum('i,i->', tile, tile, dtype=acc)
+    return total.item(), total_sq.item()
+
+
+def compute_error_stats(original_image: np.ndarray, stego_image: np.ndarray, tile_rows: int | None = None,
+                        reference: tuple | None = None, region=None) -> dict:
+    """
+    Error metrics between two images in a single pass over row tiles.
+
+    uint8 images are reduced to histograms (values of each image and of
+    the per-channel absolute difference), from which every metric follows
+    exactly. Other dtypes convert one tile at a time (int32 for 8/16-bit
+    integers, float64 otherwise). Either way peak memory stays a small
+    multiple of the tile size instead of several full float64 copies.
+
+    Args:
+        original_image (np.ndarray): (H, W) or (H, W, C) reference image.
+        stego_image (np.ndarray): Image of the same shape.
+        tile_rows (int | None): Rows per tile; None = about ERROR_TILE_SAMPLES samples.
+        reference (tuple | None): reference_sums(original_image), to skip the
+                                  original-only part of the pass.
+        region (ChangedRegion | None): Rows outside which the images are known
+                                       to be identical; only these rows are
+                                       compared (results are unchanged).
+
+    Returns:
+        dict: {'mse', 'psnr', 'mae', 'max_abs_error', 'channel_mse' (list per
+              channel), 'ncc' (zero-mean normalized cross-correlation)}.
+    """
+    if original_image.shape != stego_image.shape:
+        raise ValueError(f"Image shapes differ: {original_image.shape} vs {stego_image.shape}.")
+    channels = original_image.shape[2] if original_image.ndim == 3 else 1
+    size = original_image.size
+    if size == 0:
+        raise ValueError("Images are empty.")
+
+    if region is None:
+        totals = _totals(original_image, stego_image, channels, tile_rows, reference)
+    else:
+        totals = _region_totals(original_image, stego_image, channels, tile_rows, region, reference)
+    sum_a, sum_b, sum_aa, sum_bb, sq_err, abs_err, max_err = totals
+
+    channel_mse = [float(value) / (size // channels) for value in sq_err]
+    mse = float(sum(sq_err)) / size
+
+    # Pearson correlation from the raw sums; Python ints keep the integer case exact
+    sum_ab = sum_aa + sum_bb - sum(sq_err)  # 2 * sum(a*b), from sum((a-b)^2)
+    sum_ab = sum_ab // 2 if isinstance(sum_ab, int) else sum_ab / 2
+    cov = size * sum_ab - sum_a * sum_b
+    var_a = size * sum_aa - sum_a * sum_a
+    var_b = size * sum_bb - sum_b * sum_b
+    if var_a > 0 and var_b > 0:
+        ncc = float(cov / np.sqrt(float(var_a) * float(var_b)))
+    else:
+        # Constant image: correlation is undefined, report 1 only for identical images
+        ncc = 1.0 if mse == 0 else 0.0
+
+    return {
+        'mse': mse,
+        'psnr': psnr_from_mse(mse),
+        'mae': float(abs_err) / size,
+        'max_abs_error': float(max_err),
+        'channel_mse': channel_mse,
+        'ncc': ncc,
+    }
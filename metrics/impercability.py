@@ -1,5 +1,51 @@
+import os
 import numpy as np
-from skimage.metrics import structural_similarity as ssim
+from helpers.tiled_io import map_tiles
+from metrics.ssim import SSIMConfig, mean_ssim, prepare_planes, resolve_downsample, structural_similarity
+from metrics.error_stats import compute_error_stats, psnr_from_mse, reference_sums
+
+
+class ReferenceImageStats:
+    """
+    Cover-side terms computed once, for comparing many stego images with the
+    same cover: the sums used by the error metrics and, for every SSIM plane,
+    the local mean and variance maps (two float32 maps per plane).
+    """
+    def __init__(self, cover_image: np.ndarray, luma: bool = False, downsample_by: int | bool = 1,
+                 gaussian: bool = False):
+        """
+        Args:
+            cover_image (np.ndarray): The original (cover) image.
+            luma, downsample_by, gaussian: SSIM variant the statistics are prepared
+                                           for (see SteganographyMetrics.calculate_ssim).
+        """
+        self.image = np.asarray(cover_image)
+        self.luma = luma
+        self.gaussian = gaussian
+        self.downsample_by = resolve_downsample(self.image.shape, downsample_by)
+        self.sums = reference_sums(self.image)
+        self.ssim_config = SSIMConfig(gaussian=gaussian, sample_covariance=not gaussian)
+        self.planes = prepare_planes(self.image, luma, self.downsample_by)
+        self.moments = [self.ssim_config.moments(plane.astype(np.float32) - self.ssim_config.offset)
+                        for plane in self.planes]
+
+    def matches(self, luma: bool, downsample_by: int | bool, gaussian: bool) -> bool:
+        """True when the precomputed SSIM terms belong to this SSIM variant."""
+        return (luma == self.luma and gaussian == self.gaussian
+                and resolve_downsample(self.image.shape, downsample_by) == self.downsample_by)
+
+    def error_stats(self, stego_image: np.ndarray, region=None) -> dict:
+        """Error metrics of one stego image (see metrics.error_stats.compute_error_stats)."""
+        return compute_error_stats(self.image, stego_image, reference=self.sums, region=region)
+
+    def ssim(self, stego_image: np.ndarray, region=None) -> float:
+        """SSIM of one stego image against the cover, evaluating only the stego-side terms."""
+        if stego_image.shape != self.image.shape:
+            raise ValueError(f"Image shapes differ: {self.image.shape} vs {stego_image.shape}.")
+        y_planes = prepare_planes(stego_image, self.luma, self.downsample_by)
+        return mean_ssim(self.ssim_config, self.planes, y_planes, references=self.moments,
+                         region=region, downsample_by=self.downsample_by)
+
 
 class SteganographyMetrics:
     """
@@ -8,17 +54,28 @@ class SteganographyMetrics:
 
     This version is optimized for RGB (multichannel) images.
     """
-    def __init__(self, original_image: np.ndarray, stego_image: np.ndarray):
+    def __init__(self, original_image: np.ndarray, stego_image: np.ndarray,
+                 reference: ReferenceImageStats | None = None, region=None):
         """
         Initializes the metrics calculator with the two images to compare.
 
         Args:
             original_image (np.ndarray): The original image before modification.
             stego_image (np.ndarray): The image after data has been embedded.
+            reference (ReferenceImageStats | None): Precomputed statistics of
+                                                    original_image, reused when given.
+            region (ChangedRegion | None): Rows outside which the two images are
+                                           identical (a spatial method's
+                                           last_changed_region). Metrics stay
+                                           exact but only scan around these rows.
         """
-        # Ensure images are float type for accurate calculations
-        self.original_image = original_image.astype(np.float64)
-        self.stego_image = stego_image.astype(np.float64)
+        # Kept in their own dtype; each metric converts only what it needs
+        # (see metrics.error_stats for the tiled single-pass error metrics)
+        self.original_image = np.asarray(original_image)
+        self.stego_image = np.asarray(stego_image)
+        self.reference = reference
+        self.region = region
+        self._error_stats = None
 
     def calculate_mse(self) -> float:
         """
@@ -26,7 +83,22 @@ class SteganographyMetrics:
         MSE measures the average of the squares of the errors.
         A lower MSE value means less error and higher similarity.
         """
-        return np.mean((self.original_image - self.stego_image) ** 2)
+        return self.calculate_error_stats()['mse']
+
+    def calculate_error_stats(self) -> dict:
+        """
+        MSE, PSNR, MAE, max abs error, per-channel MSE and NCC from one
+        tiled pass over the images (computed once, then cached).
+
+        Returns:
+            dict: See metrics.error_stats.compute_error_stats.
+        """
+        if self._error_stats is None:
+            if self.reference is not None:
+                self._error_stats = self.reference.error_stats(self.stego_image, self.region)
+            else:
+                self._error_stats = compute_error_stats(self.original_image, self.stego_image, region=self.region)
+        return self._error_stats
 
     def calculate_psnr(self, mse: float = None) -> float:
         """
@@ -41,29 +113,28 @@ class SteganographyMetrics:
         if mse is None:
             mse = self.calculate_mse()
 
-        if mse == 0:
-            # The images are identical, PSNR is infinite.
-            return float('inf')
+        # Identical images (MSE 0) give an infinite PSNR
+        return psnr_from_mse(mse)
 
-        max_pixel_value = 255.0
-        psnr_value = 20 * np.log10(max_pixel_value / np.sqrt(mse))
-        return psnr_value
-
-    def calculate_ssim(self) -> float:
+    def calculate_ssim(self, luma: bool = False, downsample_by: int | bool = 1, gaussian: bool = False) -> float:
         """
         Calculates the Structural Similarity Index (SSIM) between the two RGB images.
         SSIM measures the similarity in terms of structure, luminance, and contrast.
         The value ranges from -1 to 1, where 1 means identical images.
-        """
-        # data_range must be specified for float images
-        data_range = 255.0
 
-        # Since we know images are RGB, we can call ssim directly
-        # with multichannel=True and specify the channel_axis.
-        return ssim(self.original_image, self.stego_image,
-                    multichannel=True,
-                    data_range=data_range,
-                    channel_axis=2) # Assumes shape (H, W, C)
+        Uses the native float32 engine in metrics.ssim; the defaults match
+        skimage's structural_similarity (7x7 uniform window, channel_axis=2).
+
+        Args:
+            luma (bool): Compare only the luma (Y) plane; about 3x faster.
+            downsample_by (int | bool): Downsample first (True = automatic factor).
+            gaussian (bool): Gaussian 11x11 window (reference SSIM) instead of 7x7 uniform.
+        """
+        if self.reference is not None and self.reference.matches(luma, downsample_by, gaussian):
+            return self.reference.ssim(self.stego_image, self.region)
+        return structural_similarity(self.original_image, self.stego_image, data_range=255.0,
+                                     gaussian=gaussian, sample_covariance=not gaussian,
+                                     luma=luma, downsample_by=downsample_by, region=self.region)
 
     def get_all_metrics(self) -> dict:
         """
@@ -89,4 +160,41 @@ class SteganographyMetrics:
             'mse': mse,
             'psnr': psnr,
             'ssim': ssim_val
-        }
\ No newline at end of file
+        }
+
+    @staticmethod
+    def batch(cover_stats, stego_images: list, workers: int | None = None, regions: list | None = None) -> list:
+        """
+        Metrics of many stego images against one cover, evaluated in parallel.
+
+        The cover-side terms come from `cover_stats` and are computed only
+        once; every stego image then costs only its own side of the error
+        pass and the SSIM filters.
+
+        Args:
+            cover_stats (ReferenceImageStats | np.ndarray): Precomputed cover
+                statistics (their SSIM variant is used), or the cover image itself.
+            stego_images (list): Stego images with the cover's shape.
+            workers (int | None): Thread pool size; None = os.cpu_count().
+            regions (list | None): One ChangedRegion (or None) per stego image.
+
+        Returns:
+            list: One dict per stego image, in order, with the error metrics
+                  (see calculate_error_stats) plus 'ssim'.
+        """
+        if not isinstance(cover_stats, ReferenceImageStats):
+            cover_stats = ReferenceImageStats(cover_stats)
+
+        stego_images = list(stego_images)
+        regions = [None] * len(stego_images) if regions is None else list(regions)
+        if len(regions) != len(stego_images):
+            raise ValueError(f"Expected {len(stego_images)} regions, got {len(regions)}.")
+
+        def evaluate(task):
+            stego_image, region = task
+            metrics = SteganographyMetrics(cover_stats.image, stego_image, reference=cover_stats, region=region)
+            result = dict(metrics.calculate_error_stats())
+            result['ssim'] = cover_stats.ssim(metrics.stego_image, region)
+            return result
+
+        return map_tiles(evaluate, list(zip(stego_images, regions)), workers or os.cpu_count() or 1)
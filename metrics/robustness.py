@@ -1,15 +1,110 @@
+import inspect
+import os
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import shared_memory
 import numpy as np
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 import cv2
-from helpers.message_binary import message_to_binary
+from helpers.message_binary import message_to_bit_array
+from methods.spatial import kernels
+
+# Serangan yang memakai bilangan acak (menerima argumen `rng`)
+RANDOM_ATTACKS = ('Gaussian_Noise', 'SP_Noise')
+# Nama konfigurasi rantai serangan: {'name': 'Chain', 'label': ..., 'steps': [config, ...]}
+CHAIN_ATTACK = 'Chain'
+
+# State per proses worker (diisi oleh _init_attack_worker)
+_worker_state = {}
+
+# Kebijakan penyimpanan gambar hasil serangan (lihat run_all_tests)
+RETENTION_POLICIES = ('full', 'none', 'thumbnail', 'lazy')
+THUMBNAIL_SIZE = 256  # Sisi terpanjang thumbnail, dalam piksel
+THUMBNAIL_JPEG_QUALITY = 85
+
+
+def encode_thumbnail(image: np.ndarray, size: int = THUMBNAIL_SIZE, quality: int = THUMBNAIL_JPEG_QUALITY) -> bytes:
+    """JPEG (bytes) dari gambar RGB yang diperkecil hingga sisi terpanjangnya `size` piksel."""
+    if size < 1:
+        raise ValueError("Ukuran thumbnail minimal 1 piksel.")
+    h, w = image.shape[:2]
+    scale = size / max(h, w)
+    if scale < 1:
+        image = cv2.resize(image, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode('.jpg', cv2.cvtColor(image, cv2.COLOR_RGB2BGR), [int(cv2.IMWRITE_JPEG_QUALITY), quality])
+    if not ok:
+        raise ValueError("Gagal meng-encode thumbnail JPEG.")
+    return encoded.tobytes()
+
+
+def _init_attack_worker(steganography_instance, original_binary_message: str, image_spec: tuple, backend: str):
+    """
+    Initializer pool: instance metode dan tester dibuat sekali per worker,
+    gambar (stego, atau buffer hasil serangan pada mode batch) dibaca
+    langsung dari shared memory.
+    """
+    kernels.init_worker(backend)
+    np.random.seed()  # Worker hasil fork tidak berbagi state acak yang sama
+    name, shape, dtype = image_spec
+    shm = shared_memory.SharedMemory(name=name)
+    _worker_state['shm'] = shm
+    _worker_state['image'] = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+    _worker_state['tester'] = RobustnessTester(steganography_instance, original_binary_message)
+
+
+def _run_attack_worker(index: int, config: dict, extraction_arg, seed, retention: str, thumbnail_size: int) -> tuple:
+    """
+    Menjalankan satu serangan di worker; mengembalikan (index, hasil _run_attack)
+    dengan `retention` sudah diterapkan, jadi gambar utuh hanya dikirim balik
+    jika retention='full'.
+    """
+    tester = _worker_state['tester']
+    outcome = tester._run_attack(_worker_state['image'], config, extraction_arg, tester._attack_rng(seed, index), seed)
+    return index, tester._retain_outcome(outcome, retention, thumbnail_size)
+
+
+def _extract_slot_worker(index: int, attack_label: str, extraction_arg) -> tuple:
+    """
+    Mode batch: gambar serangan ke-`index` sudah ada di buffer bersama, worker
+    hanya mengekstrak. Gambar tidak dikirim balik (diambil induk dari buffer).
+    """
+    attack_label, ber, _, error = _worker_state['tester']._score(attack_label, _worker_state['image'][index],
+                                                                 extraction_arg)
+    return index, (attack_label, ber, None, error)
+
+class LazyAttackImage:
+    """
+    Gambar hasil serangan yang tidak disimpan (retention='lazy'): dibuat ulang
+    dari gambar stego, konfigurasi dan seed serangan saat dibutuhkan.
+    Thumbnail di-encode sekali per ukuran lalu di-cache.
+    """
+    def __init__(self, tester, stego_image: np.ndarray, config: dict, seed: int, rng_index: int):
+        self.tester = tester
+        self.stego_image = stego_image
+        self.config = config
+        self.seed = seed
+        self.rng_index = rng_index
+        self._thumbnails = {}
+
+    def load(self) -> np.ndarray:
+        """Menjalankan ulang serangan; hasilnya sama dengan gambar saat pengujian."""
+        rng = self.tester._attack_rng(self.seed, self.rng_index)
+        return self.tester._apply_single(self.stego_image, self.config, rng, self.seed)
+
+    def thumbnail(self, size: int = THUMBNAIL_SIZE) -> bytes:
+        if size not in self._thumbnails:
+            self._thumbnails[size] = encode_thumbnail(self.load(), size)
+        return self._thumbnails[size]
+
 
 class RobustnessTester:
     def __init__(self, steganography_instance, original_binary_message: str):
         self.steganography_instance = steganography_instance
         self.original_binary_message = original_binary_message
         self.bit_length = len(original_binary_message)
+        self.original_bits = np.frombuffer(original_binary_message.encode('ascii'), dtype=np.uint8) - ord('0')
 
         # Maps the 'name' from configurations to a specific attack function
         self.attack_map = {
@@ -22,87 +117,594 @@ class RobustnessTester:
             'Blur': self._apply_gaussian_blur,
             'Sharpen': self._apply_sharpening,
             'HistEq': self._apply_histogram_equalization,
+            CHAIN_ATTACK: self._apply_chain,
+        }
+
+        # Kernel per keluarga serangan (mode batch): satu panggilan untuk semua
+        # konfigurasi satu keluarga, menulis langsung ke slot buffer (N, H, W, 3)
+        self.batch_attack_map = {
+            'JPEG': self._batch_jpeg_compression,
+            'Gaussian_Noise': self._batch_gaussian_noise,
+            'Rotate': self._batch_rotation,
+            'Scale': self._batch_downscale_upscale,
+            'Blur': self._batch_gaussian_blur,
         }
 
     def _calculate_ber(self, extracted_message: str) -> float:
         """Calculates the Bit Error Rate between original and extracted messages."""
         if not extracted_message:
             return 1.0
+        return self._calculate_ber_bits(message_to_bit_array(extracted_message))
+
+    def _calculate_ber_bits(self, extracted_bits: np.ndarray) -> float:
+        """
+        BER of an extracted uint8 0/1 array against the original bits (XOR +
+        count_nonzero). Missing bits count as '0', as in the text version;
+        an empty extraction gives 1.0.
+        """
+        if extracted_bits is None or len(extracted_bits) == 0:
+            return 1.0
+        if self.bit_length == 0:
+            return 0.0
+        extracted_bits = np.asarray(extracted_bits, dtype=np.uint8)[:self.bit_length]
+        errors = int(np.count_nonzero(self.original_bits[:len(extracted_bits)] ^ extracted_bits))
+        errors += int(np.count_nonzero(self.original_bits[len(extracted_bits):]))
+        return errors / self.bit_length
+
+    def _extract_bits(self, attacked_image: np.ndarray, extraction_arg) -> np.ndarray:
+        """
+        Bits extracted from an attacked image, straight from the method's
+        bit-level extraction when it has one (no UTF-8 round trip).
+        """
+        extract_bits = getattr(self.steganography_instance, 'extract_bits', None)
+        if extract_bits is not None:
+            return extract_bits(attacked_image, extraction_arg)
+        return message_to_bit_array(self.steganography_instance.extract(attacked_image, extraction_arg) or "")
+
+    @staticmethod
+    def _attack_rng(seed, index: int):
+        """RandomState serangan ke-`index` (turunan dari `seed`); None = np.random global."""
+        if seed is None:
+            return None
+        return np.random.RandomState(np.random.SeedSequence([seed, index]).generate_state(4))
+
+    def _run_attack(self, stego_image: np.ndarray, config: dict, extraction_arg, rng=None, seed=None):
+        """
+        Menjalankan satu serangan + ekstraksi.
+
+        Returns:
+            tuple | None: (label, BER, attacked_image, error) atau None jika
+                          nama serangan tidak dikenal. Jika gagal, BER 1.0,
+                          gambar None dan error berisi pesannya.
+        """
+        attack_label = config.get('label', config.get('name'))
+        if config.get('name') not in self.attack_map:
+            return None
 
         try:
-             extracted_binary = message_to_binary(extracted_message)
-             if not extracted_binary:
-                return 1.0
+            attacked_image = self._apply_single(stego_image, config, rng, seed)
         except Exception as e:
-             print(f"Error saat konversi biner: {e}. Mengasumsikan BER 1.0")
-             return 1.0
+            return attack_label, 1.0, None, str(e)
+        return self._score(attack_label, attacked_image, extraction_arg)
+
+    def _score(self, attack_label: str, attacked_image: np.ndarray, extraction_arg) -> tuple:
+        """Ekstraksi bit + BER satu gambar hasil serangan; format hasil sama dengan _run_attack."""
+        try:
+            # Ekstraksi bit dijalankan pada gambar RGB yang diserang
+            extracted_bits = self._extract_bits(attacked_image, extraction_arg)
+            return attack_label, self._calculate_ber_bits(extracted_bits), attacked_image, None
+        except Exception as e:
+            return attack_label, 1.0, None, str(e)
+
+    @staticmethod
+    def _attack_params(config: dict) -> dict:
+        return {k: v for k, v in config.items() if k not in ['name', 'label']}
+
+    def _params_error(self, config: dict) -> str | None:
+        """
+        Pesan error jika fungsi serangan (attack_map) tidak menerima parameter
+        `config`, seperti saat dipanggil langsung; None jika diterima. Kernel
+        keluarga membaca parameter dengan default, jadi kunci yang salah eja
+        harus ditolak di sini agar mode batch gagal sama seperti mode serial.
+        """
+        function = self.attack_map[config.get('name')]
+        try:
+            inspect.signature(function).bind(None, **self._attack_params(config))
+        except TypeError as e:
+            return f"{function.__qualname__}() {e}"
+        return None
+
+    def _apply_single(self, image: np.ndarray, config: dict, rng=None, seed=None) -> np.ndarray:
+        """Satu serangan dari attack_map pada salinan `image` (rantai memakai `seed`, lihat _apply_chain)."""
+        if config.get('name') == CHAIN_ATTACK:
+            return self._apply_chain(image, config.get('steps'), seed)
+        params = self._attack_params(config)
+        if rng is not None and config.get('name') in RANDOM_ATTACKS:
+            params['rng'] = rng
+        # Fungsi serangan menerima RGB dan mengembalikan RGB
+        return self.attack_map[config.get('name')](image.copy(), **params)
+
+    def _apply_single_into(self, image: np.ndarray, config: dict, rng, dst: np.ndarray, seed=None):
+        """Serangan tunggal (attack_map) dengan hasil disalin ke slot buffer `dst`."""
+        attacked = self._apply_single(image, config, rng, seed)
+        if attacked.shape != dst.shape:
+            raise ValueError(f"Hasil serangan berukuran {attacked.shape}, buffer {dst.shape}.")
+        dst[...] = attacked
+
+    def _apply_step_into(self, image: np.ndarray, step: dict, rng, dst: np.ndarray):
+        """Satu langkah rantai ke buffer `dst`, lewat kernel keluarga jika ada (menulis langsung ke dst)."""
+        kernel = self.batch_attack_map.get(step.get('name'))
+        if kernel is not None:
+            kernel(image, [self._attack_params(step)], [dst], [rng])
+        else:
+            self._apply_single_into(image, step, rng, dst)
+
+    def _check_chain(self, steps) -> None:
+        """ValueError jika rantai kosong, ada langkah tak dikenal, atau parameter langkah tidak diterima."""
+        if not steps:
+            raise ValueError("Rantai serangan harus punya minimal satu langkah ('steps').")
+        for step in steps:
+            if step.get('name') not in self.attack_map or step.get('name') == CHAIN_ATTACK:
+                raise ValueError(f"Langkah rantai '{step.get('name')}' tidak dikenal.")
+            # Kernel keluarga (_apply_step_into) mengabaikan kunci yang salah eja
+            error = self._params_error(step)
+            if error is not None:
+                raise ValueError(f"Langkah rantai '{step.get('name')}': {error}")
+
+    @staticmethod
+    def _step_key(step: dict) -> str:
+        """Identitas langkah rantai (nama + parameter, tanpa label), untuk berbagi prefiks."""
+        return repr((step.get('name'), sorted(RobustnessTester._attack_params(step).items())))
+
+    @staticmethod
+    def _chain_rng(seed, path: tuple):
+        """
+        RandomState satu langkah rantai, turunan dari `seed` dan prefiks langkahnya
+        (bukan indeks konfigurasi), sehingga prefiks yang sama selalu memberi
+        gambar yang sama, dijalankan sendiri maupun dibagi (_run_chain_tree).
+        """
+        if seed is None:
+            return None
+        return np.random.RandomState(np.random.SeedSequence([seed, zlib.crc32(repr(path).encode())]).generate_state(4))
+
+    def _apply_chain(self, image: np.ndarray, steps: list, seed: int | None = None) -> np.ndarray:
+        """
+        Menjalankan satu rantai serangan. Gambar antara bergantian ditulis ke
+        dua buffer yang dialokasikan sekali (ping-pong).
+        """
+        self._check_chain(steps)
+        buffers = np.empty((min(2, len(steps)),) + image.shape, dtype=image.dtype)
+        current, path = image, ()
+        for position, step in enumerate(steps):
+            path += (self._step_key(step),)
+            dst = buffers[position % 2]
+            self._apply_step_into(current, step, self._chain_rng(seed, path), dst)
+            current = dst
+        return current.copy()
+
+    def _run_chain_tree(self, image: np.ndarray, chains: list, out: list, seed: int | None = None) -> int:
+        """
+        Menjalankan banyak rantai sebagai trie: prefiks yang sama dihitung sekali.
 
+        Trie ditelusuri depth-first dengan satu buffer per kedalaman (dialokasikan
+        sekali); simpul kedalaman d membaca buffer d-1 dan menulis buffer d, lalu
+        disalin ke slot `out` rantai yang berakhir di simpul itu. Daun dengan
+        satu rantai ditulis langsung ke slotnya. Hasil sama dengan _apply_chain.
 
-        original_binary = self.original_binary_message[:self.bit_length]
-        extracted_binary = extracted_binary[:self.bit_length]
+        Returns:
+            int: Jumlah langkah yang benar-benar dijalankan (simpul unik trie).
+        """
+        root = {}
+        for steps, slot in zip(chains, out):
+            self._check_chain(steps)
+            children = root
+            for step in steps:
+                node = children.setdefault(self._step_key(step), {'step': step, 'children': {}, 'slots': []})
+                children = node['children']
+            node['slots'].append(slot)
+
+        buffers = np.empty((max(len(steps) for steps in chains),) + image.shape, dtype=image.dtype)
+        computed = 0
+
+        def visit(children, parent, depth, path):
+            nonlocal computed
+            for key, node in children.items():
+                node_path = path + (key,)
+                leaf = not node['children'] and len(node['slots']) == 1
+                dst = node['slots'][0] if leaf else buffers[depth]
+                self._apply_step_into(parent, node['step'], self._chain_rng(seed, node_path), dst)
+                computed += 1
+                for slot in node['slots']:
+                    if slot is not dst:
+                        slot[...] = dst
+                # Seluruh subtree selesai sebelum saudara berikutnya menimpa buffers[depth]
+                visit(node['children'], dst, depth + 1, node_path)
+
+        visit(root, image, 0, ())
+        return computed
+
+    def apply_attack_batch(self, image: np.ndarray, attack_configurations: list, seed: int | None = None,
+                           out: np.ndarray | None = None) -> tuple:
+        """
+        Menjalankan semua serangan per keluarga ke dalam satu buffer.
+
+        Konfigurasi dengan nama yang sama dikelompokkan dan dijalankan oleh
+        kernel keluarga (batch_attack_map) yang berbagi pekerjaan antar level:
+        konversi warna JPEG sekali, satu medan noise Gaussian satuan yang
+        diskalakan per sigma, dst. Keluarga tanpa kernel (atau yang kernelnya
+        gagal) dijalankan per konfigurasi. Hasil non-acak identik dengan mode
+        per serangan; noise Gaussian satu keluarga memakai medan yang sama.
+        Semua rantai (CHAIN_ATTACK) dijalankan bersama sebagai satu trie
+        (_run_chain_tree) sehingga prefiks yang sama hanya dihitung sekali.
+
+        Args:
+            image (np.ndarray): Gambar stego RGB (H, W, 3), tidak diubah.
+            attack_configurations (list): Daftar konfigurasi serangan.
+            seed (int | None): Seed serangan acak (lihat run_all_tests).
+            out (np.ndarray | None): Buffer (N, H, W, 3) uint8 yang sudah dialokasikan.
+
+        Returns:
+            tuple: (buffer (N, H, W, 3), errors) dengan errors[i] None jika
+                   berhasil, atau pesan error (serangan tak dikenal juga gagal).
+        """
+        count = len(attack_configurations)
+        buffer = np.empty((count,) + image.shape, dtype=image.dtype) if out is None else out
+        errors = [None] * count
+
+        families = {}
+        for index, config in enumerate(attack_configurations):
+            families.setdefault(config.get('name'), []).append(index)
+
+        for name, indices in families.items():
+            if name not in self.attack_map:
+                for index in indices:
+                    errors[index] = f"Serangan '{name}' tidak ditemukan."
+                continue
+            if name == CHAIN_ATTACK:
+                # Rantai yang tidak valid gagal sendiri, tanpa menggagalkan trie
+                valid = []
+                for index in indices:
+                    try:
+                        self._check_chain(attack_configurations[index].get('steps'))
+                        valid.append(index)
+                    except ValueError as e:
+                        errors[index] = str(e)
+                indices = valid
+                if not indices:
+                    continue
+                try:
+                    self._run_chain_tree(image, [attack_configurations[i].get('steps') for i in indices],
+                                         [buffer[i] for i in indices], seed)
+                    continue
+                except Exception:
+                    pass  # Diulang per rantai agar error hanya mengenai rantai yang gagal
+            kernel = self.batch_attack_map.get(name)
+            if kernel is not None:
+                # Parameter tak dikenal gagal per konfigurasi, seperti mode serial
+                valid = []
+                for index in indices:
+                    errors[index] = self._params_error(attack_configurations[index])
+                    if errors[index] is None:
+                        valid.append(index)
+                indices = valid
+            rngs = [self._attack_rng(seed, index) for index in indices]
+            if kernel is not None and indices:
+                try:
+                    kernel(image, [self._attack_params(attack_configurations[i]) for i in indices],
+                           [buffer[i] for i in indices], rngs)
+                    continue
+                except Exception:
+                    pass  # Diulang per konfigurasi agar error hanya mengenai konfigurasi yang gagal
+            for index, rng in zip(indices, rngs):
+                try:
+                    self._apply_single_into(image, attack_configurations[index], rng, buffer[index], seed)
+                except Exception as e:
+                    errors[index] = str(e)
+        return buffer, errors
+
+    def _run_parallel(self, image: np.ndarray, tasks: list, workers: int):
+        """
+        Generator hasil (index, outcome) dalam urutan selesai, dari pool proses.
 
-        if len(extracted_binary) < len(original_binary):
-            extracted_binary = extracted_binary.ljust(len(original_binary), '0')
+        Args:
+            image (np.ndarray): Gambar stego yang disalin ke shared memory.
+            tasks (list): (fungsi worker, argumen) per tugas.
+        """
+        shm = shared_memory.SharedMemory(create=True, size=max(1, image.nbytes))
+        try:
+            np.ndarray(image.shape, dtype=image.dtype, buffer=shm.buf)[...] = image
+            yield from self._run_pool(shm, image.shape, image.dtype, tasks, workers)
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def _run_pool(self, shm: shared_memory.SharedMemory, shape: tuple, dtype, tasks: list, workers: int):
+        """Pool proses yang membaca array (`shape`, `dtype`) dari shared memory `shm` milik pemanggil."""
+        spec = (shm.name, tuple(shape), np.dtype(dtype).str)
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_attack_worker,
+                                 initargs=(self.steganography_instance, self.original_binary_message,
+                                           spec, kernels.get_backend())) as pool:
+            futures = [pool.submit(worker, *args) for worker, args in tasks]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def _rng_indices(self, attack_configurations: list, batched: bool) -> list:
+        """
+        Indeks RandomState (_attack_rng) yang menghasilkan tiap serangan. Pada
+        mode batch, kernel keluarga memakai rng konfigurasi valid pertama
+        keluarganya (lihat apply_attack_batch).
+        """
+        if not batched:
+            return list(range(len(attack_configurations)))
+        first = {}
+        indices = []
+        for index, config in enumerate(attack_configurations):
+            name = config.get('name')
+            if name in self.batch_attack_map and self._params_error(config) is None:
+                indices.append(first.setdefault(name, index))
+            else:
+                indices.append(index)
+        return indices
 
-        errors = sum(1 for a, b in zip(original_binary, extracted_binary) if a != b)
-        return errors / self.bit_length if self.bit_length > 0 else 0.0
+    @staticmethod
+    def _retain_outcome(outcome, retention: str, thumbnail_size: int):
+        """
+        Hasil _run_attack dengan gambar dalam bentuk yang disimpan, sesuai
+        `retention`. Untuk 'lazy' gambar dilepas; LazyAttackImage dibuat oleh
+        run_all_tests, yang memegang gambar stego dan seed.
+        """
+        if outcome is None or outcome[2] is None or retention == 'full':
+            return outcome
+        attack_label, ber, attacked_image, error = outcome
+        kept = encode_thumbnail(attacked_image, thumbnail_size) if retention == 'thumbnail' else None
+        return attack_label, ber, kept, error
+
+    def _slot_outcome(self, buffer: np.ndarray, index: int, outcome: tuple, retention: str, thumbnail_size: int,
+                      copy: bool) -> tuple:
+        """Hasil ekstraksi slot `index` dari worker, dengan gambar slot itu sesuai `retention`."""
+        attack_label, ber, _, error = outcome
+        attacked_image = None
+        if error is None:
+            attacked_image = buffer[index].copy() if copy and retention == 'full' else buffer[index]
+        return self._retain_outcome((attack_label, ber, attacked_image, error), retention, thumbnail_size)
+
+    def _batched_outcomes(self, stego_image: np.ndarray, attack_configurations: list, extraction_arg,
+                          workers: int, seed, retention: str, thumbnail_size: int):
+        """
+        Mode batch: semua serangan ke satu buffer (apply_attack_batch), lalu
+        ekstraksi per slot. Dengan workers > 1 buffer langsung dialokasikan di
+        shared memory (tanpa salinan kedua) dan dilepas setelah ekstraksi
+        terakhir; gambar 'full' disalin keluar per slot.
+        """
+        shm = None
+        if workers > 1:
+            shm = shared_memory.SharedMemory(create=True, size=max(1, len(attack_configurations) * stego_image.nbytes))
+        out = buffer = None
+        try:
+            if shm is not None:
+                out = np.ndarray((len(attack_configurations),) + stego_image.shape, dtype=stego_image.dtype,
+                                 buffer=shm.buf)
+            buffer, errors = self.apply_attack_batch(stego_image, attack_configurations, seed, out)
+            pending = []
+            for index, config in enumerate(attack_configurations):
+                attack_label = config.get('label', config.get('name'))
+                if config.get('name') not in self.attack_map:
+                    yield index, None
+                elif errors[index] is not None:
+                    yield index, (attack_label, 1.0, None, errors[index])
+                elif shm is None:
+                    yield index, self._slot_outcome(buffer, index, self._score(attack_label, buffer[index], extraction_arg),
+                                                    retention, thumbnail_size, copy=False)
+                else:
+                    pending.append((_extract_slot_worker, (index, attack_label, extraction_arg)))
+            if pending:
+                for index, outcome in self._run_pool(shm, buffer.shape, buffer.dtype, pending, workers):
+                    yield index, self._slot_outcome(buffer, index, outcome, retention, thumbnail_size, copy=True)
+        finally:
+            if shm is not None:
+                # Tidak boleh ada view ke shm.buf yang tersisa saat close()
+                del out, buffer
+                shm.close()
+                shm.unlink()
 
     def run_all_tests(self,
                         stego_image: np.ndarray,
                         attack_configurations: list,
-                        bit_lengths=None) -> dict:
+                        bit_lengths=None,
+                        workers: int | None = 1,
+                        seed: int | None = None,
+                        batched: bool = False,
+                        retention: str = 'full',
+                        thumbnail_size: int = THUMBNAIL_SIZE) -> dict:
         """
         Menjalankan semua uji ketahanan.
         Asumsi stego_image adalah np.ndarray dalam format RGB.
 
         Args:
             stego_image (np.ndarray): Gambar yang berisi pesan tersembunyi.
-            attack_configurations (list): Daftar konfigurasi serangan.
+            attack_configurations (list): Daftar konfigurasi serangan, termasuk
+                                          rantai {'name': CHAIN_ATTACK, 'steps': [...]}.
             bit_lengths (any, optional): Argumen panjang bit untuk metode extract.
+            workers (int | None): 1 = serial; >1 = pool proses (gambar stego lewat
+                                  shared memory, metode dibuat sekali per worker);
+                                  None = os.cpu_count().
+            seed (int | None): Seed serangan acak (noise). Dengan seed, hasil mode
+                               serial dan paralel identik.
+            batched (bool): Jalankan serangan per keluarga ke satu buffer
+                            (N, H, W, 3) dulu (lihat apply_attack_batch). Dengan
+                            retention='full', gambar hasil di dict adalah view
+                            ke buffer tersebut (serial) atau salinan slotnya
+                            (workers > 1, buffer ada di shared memory).
+            retention (str): Apa yang disimpan dari tiap gambar hasil serangan:
+                             'full' = array RGB utuh, 'none' = tidak ada (None),
+                             'thumbnail' = JPEG (bytes) yang diperkecil, di-encode
+                             sekali, 'lazy' = LazyAttackImage yang membuat ulang
+                             gambar dari seed + konfigurasi saat dibutuhkan.
+                             Selain 'full', setiap gambar dilepas begitu BER-nya
+                             dihitung; dengan workers > 1 hal itu terjadi di
+                             worker, jadi gambar utuh tidak dikirim balik.
+                             Pengecualian mode batch: buffer (N, H, W, 3) baru
+                             dilepas setelah slot terakhir diekstrak.
+            thumbnail_size (int): Sisi terpanjang thumbnail (retention='thumbnail').
             
         Returns:
-            dict: Kamus yang memetakan label serangan ke (BER, attacked_image_array).
+            dict: Kamus yang memetakan label serangan ke (BER, attacked_image),
+                  dengan attacked_image sesuai `retention`.
                   Contoh: {'JPEG_90': (0.01, <np.ndarray>), 'Crop_10': (0.5, <np.ndarray>)}
-                  # <--- PERUBAHAN DOCSTRING DI SINI ---
         """
         robustness_results = {}
         print(f"--- Menjalankan Uji Ketahanan ---")
 
+        if retention not in RETENTION_POLICIES:
+            raise ValueError(f"retention harus salah satu dari {RETENTION_POLICIES}.")
+        if retention == 'lazy' and seed is None:
+            # Serangan acak hanya bisa dibuat ulang dari seed yang diketahui
+            seed = int(np.random.randint(2 ** 31))
         extraction_arg = bit_lengths if bit_lengths is not None else self.bit_length
-
-        for config in attack_configurations:
-            attack_name = config.get('name')
-            attack_label = config.get('label', attack_name)
-            attack_function = self.attack_map.get(attack_name)
-            if not attack_function:
-                print(f"  - ⚠️ Peringatan: Serangan '{attack_name}' tidak ditemukan. Dilewati.")
+        workers = max(1, int(workers or os.cpu_count() or 1))
+        rng_indices = self._rng_indices(attack_configurations, batched)
+
+        if batched:
+            outcomes = self._batched_outcomes(stego_image, attack_configurations, extraction_arg, workers, seed,
+                                              retention, thumbnail_size)
+        elif workers == 1 or len(attack_configurations) <= 1:
+            outcomes = ((index, self._retain_outcome(self._run_attack(stego_image, config, extraction_arg,
+                                                                      self._attack_rng(seed, index), seed),
+                                                     retention, thumbnail_size))
+                        for index, config in enumerate(attack_configurations))
+        else:
+            outcomes = self._run_parallel(stego_image,
+                                          [(_run_attack_worker, (index, config, extraction_arg, seed, retention,
+                                                                 thumbnail_size))
+                                           for index, config in enumerate(attack_configurations)],
+                                          workers)
+
+        results_by_index = {}
+        for index, outcome in outcomes:
+            if outcome is None:
+                results_by_index[index] = outcome
+                print(f"  - ⚠️ Peringatan: Serangan '{attack_configurations[index].get('name')}' tidak ditemukan. Dilewati.")
                 continue
-
-            params = {k: v for k, v in config.items() if k not in ['name', 'label']}
-            try:
-                # Fungsi serangan menerima RGB dan mengembalikan RGB
-                attacked_image = attack_function(stego_image.copy(), **params)
-
-                # Ekstraksi dijalankan pada gambar RGB yang diserang
-                extracted_message = self.steganography_instance.extract(attacked_image, extraction_arg)
-
-                ber = self._calculate_ber(extracted_message)
-                
-                # --- PERUBAHAN DI SINI: Simpan BER dan gambar ---
-                robustness_results[attack_label] = (ber, attacked_image)
-                # --- AKHIR PERUBAHAN ---
-                
-                print(f"  - ✅ Selesai: {attack_label:<20} | BER: {ber:.4f}")
-            except Exception as e:
-                print(f"  - ❌ Error saat serangan '{attack_label}': {e}")
-                
-                # --- PERUBAHAN DI SINI: Kembalikan None untuk gambar jika gagal ---
-                robustness_results[attack_label] = (1.0, None)
-                # --- AKHIR PERUBAHAN ---
+            attack_label, ber, attacked_image, error = outcome
+            if retention == 'lazy' and error is None:
+                attacked_image = LazyAttackImage(self, stego_image, attack_configurations[index], seed,
+                                                 rng_indices[index])
+            results_by_index[index] = (attack_label, ber, attacked_image, error)
+            if error is None:
+                print(f"  - ✅ Selesai: {attack_label:<20} | BER: {ber:.4f}")
+            else:
+                print(f"  - ❌ Error saat serangan '{attack_label}': {error}")
+
+        # Urutan hasil mengikuti urutan konfigurasi (sama seperti mode serial);
+        # jika gagal, gambar bernilai None dan BER 1.0
+        for index in range(len(attack_configurations)):
+            outcome = results_by_index.get(index)
+            if outcome is not None:
+                robustness_results[outcome[0]] = (outcome[1], outcome[2])
 
         print("--- Semua pengujian selesai. ---")
         return robustness_results
 
+    @staticmethod
+    def _strength_levels(strength_range: tuple) -> list:
+        """Nilai parameter dari terlemah ke terkuat, dengan jarak `step` (lihat ATTACK_STRENGTH_RANGES)."""
+        _, weakest, strongest, step = strength_range
+        count = max(1, int(round(abs(strongest - weakest) / step)))
+        integer = isinstance(weakest, int) and isinstance(strongest, int)
+        levels = [weakest + (strongest - weakest) * i / count for i in range(count + 1)]
+        return [int(round(value)) if integer else round(value, 9) for value in levels]
+
+    @staticmethod
+    def _strength_config(name: str, param: str, value) -> dict:
+        # Blur memakai kernel persegi (k, k)
+        if param == 'kernel_size':
+            value = (value, value)
+        return {'name': name, 'label': f"{name} ({param}={value})", param: value}
+
+    def find_breaking_points(self,
+                             stego_image: np.ndarray,
+                             threshold: float = 0.1,
+                             bit_lengths=None,
+                             families: list | None = None,
+                             strength_ranges: dict | None = None,
+                             seed: int | None = None) -> dict:
+        """
+        Mode adaptif: mencari titik patah tiap keluarga serangan dengan bisection.
+
+        BER dianggap naik monoton terhadap kekuatan serangan. Per keluarga,
+        level terkuat diuji dulu (jika lolos, keluarga tidak patah dalam
+        rentangnya), lalu level terlemah (jika sudah patah, berhenti), lalu
+        bisection di antara keduanya. Jadi cukup sekitar 2 + log2(jumlah level)
+        ekstraksi per keluarga, bukan seluruh grid. BER >= 0.5 (pesan sudah
+        acak) selalu dihitung patah, berapapun threshold-nya.
+
+        Args:
+            stego_image (np.ndarray): Gambar stego RGB.
+            threshold (float): BER minimum yang dianggap patah.
+            bit_lengths (any, optional): Argumen panjang bit untuk metode extract.
+            families (list | None): Nama keluarga yang diuji; None = semua di strength_ranges.
+            strength_ranges (dict | None): Pengganti ATTACK_STRENGTH_RANGES.
+            seed (int | None): Seed serangan acak (noise).
+
+        Returns:
+            dict: Per keluarga: {'param', 'breaking_value' (level terlemah dengan
+                  BER >= threshold, None jika tidak patah), 'passing_value' (level
+                  terkuat yang masih lolos, None jika patah di level terlemah),
+                  'ber' (BER di breaking_value), 'evaluations' (list (nilai, BER)
+                  yang diuji, urut dari terlemah), 'extractions'}.
+        """
+        strength_ranges = strength_ranges or ATTACK_STRENGTH_RANGES
+        families = list(strength_ranges) if families is None else families
+        extraction_arg = bit_lengths if bit_lengths is not None else self.bit_length
+        limit = min(threshold, 0.5)
+        probe_count = 0
+        breaking_points = {}
+        print(f"--- Mencari Titik Patah (BER >= {limit}) ---")
+
+        for name in families:
+            if name not in self.attack_map or name not in strength_ranges:
+                print(f"  - ⚠️ Peringatan: Serangan '{name}' tidak punya rentang kekuatan. Dilewati.")
+                continue
+            param = strength_ranges[name][0]
+            levels = self._strength_levels(strength_ranges[name])
+            bers = {}
+
+            def probe(position):
+                nonlocal probe_count
+                if position not in bers:
+                    config = self._strength_config(name, param, levels[position])
+                    outcome = self._run_attack(stego_image, config, extraction_arg, self._attack_rng(seed, probe_count))
+                    probe_count += 1
+                    bers[position] = outcome[1]
+                return bers[position] >= limit
+
+            if not probe(len(levels) - 1):
+                lo, hi = len(levels) - 1, None  # Tidak patah di seluruh rentang
+            elif probe(0):
+                lo, hi = None, 0  # Sudah patah di level terlemah
+            else:
+                lo, hi = 0, len(levels) - 1
+                while hi - lo > 1:
+                    mid = (lo + hi) // 2
+                    if probe(mid):
+                        hi = mid
+                    else:
+                        lo = mid
+
+            breaking_points[name] = {
+                'param': param,
+                'breaking_value': None if hi is None else levels[hi],
+                'passing_value': None if lo is None else levels[lo],
+                'ber': None if hi is None else bers[hi],
+                'evaluations': [(levels[position], bers[position]) for position in sorted(bers)],
+                'extractions': len(bers),
+            }
+            result = "tidak patah" if hi is None else f"patah di {param}={levels[hi]} (BER: {bers[hi]:.4f})"
+            print(f"  - ✅ {name:<20} | {result} | {len(bers)} ekstraksi")
+
+        print("--- Pencarian titik patah selesai. ---")
+        return breaking_points
+
     # --- Static Attack Methods (Input/Output adalah RGB) ---
     # (Metode-metode ini tidak berubah)
     @staticmethod
@@ -114,13 +716,15 @@ class RobustnessTester:
         return cv2.cvtColor(dec_img_bgr, cv2.COLOR_BGR2RGB)
 
     @staticmethod
-    def _apply_gaussian_noise(image, sigma=25):
-        gauss = np.random.normal(0, sigma, image.shape)
+    def _apply_gaussian_noise(image, sigma=25, rng=None):
+        rng = rng or np.random
+        gauss = rng.normal(0, sigma, image.shape)
         noisy = image.astype(np.float32) + gauss
         return np.clip(noisy, 0, 255).astype(np.uint8)
 
     @staticmethod
-    def _apply_salt_pepper_noise(image, density=0.01):
+    def _apply_salt_pepper_noise(image, density=0.01, rng=None):
+        rng = rng or np.random
         output = image.copy()
         h, w, c = output.shape
         if c != 3:
@@ -128,12 +732,12 @@ class RobustnessTester:
              return image
         num_pixels = h * w
         num_salt = int(np.ceil(density * num_pixels * 0.5))
-        salt_coords_h = np.random.randint(0, h - 1, num_salt)
-        salt_coords_w = np.random.randint(0, w - 1, num_salt)
+        salt_coords_h = rng.randint(0, h - 1, num_salt)
+        salt_coords_w = rng.randint(0, w - 1, num_salt)
         output[salt_coords_h, salt_coords_w] = (255, 255, 255)
         num_pepper = int(np.ceil(density * num_pixels * 0.5))
-        pepper_coords_h = np.random.randint(0, h - 1, num_pepper)
-        pepper_coords_w = np.random.randint(0, w - 1, num_pepper)
+        pepper_coords_h = rng.randint(0, h - 1, num_pepper)
+        pepper_coords_w = rng.randint(0, w - 1, num_pepper)
         output[pepper_coords_h, pepper_coords_w] = (0, 0, 0)
         return output
 
@@ -177,6 +781,53 @@ class RobustnessTester:
         ycrcb = cv2.cvtColor(image, cv2.COLOR_RGB2YCrCb)
         ycrcb[:, :, 0] = cv2.equalizeHist(ycrcb[:, :, 0])
         return cv2.cvtColor(ycrcb, cv2.COLOR_YCrCb2RGB)
+
+    # --- Kernel Keluarga Serangan (mode batch) ---
+    # Argumen: (image, daftar params, daftar slot buffer tujuan, daftar rng).
+    # Gambar masukan tidak diubah; setiap hasil ditulis langsung ke slotnya.
+    @staticmethod
+    def _batch_jpeg_compression(image, params_list, out, rngs):
+        # Konversi RGB -> BGR sekali untuk semua kualitas
+        image_bgr = cv2.cvtColor(image, cv2.COLOR_RGB2BGR)
+        for params, dst in zip(params_list, out):
+            encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), params.get('quality', 95)]
+            _, enc_img = cv2.imencode('.jpg', image_bgr, encode_param)
+            cv2.cvtColor(cv2.imdecode(enc_img, cv2.IMREAD_COLOR), cv2.COLOR_BGR2RGB, dst=dst)
+
+    @staticmethod
+    def _batch_gaussian_noise(image, params_list, out, rngs):
+        # Satu medan noise satuan untuk semua sigma: normal(0, s) == s * standard_normal
+        rng = rngs[0] or np.random
+        unit = rng.standard_normal(image.shape)
+        base = image.astype(np.float32)
+        noisy = np.empty(image.shape, dtype=np.float64)
+        for params, dst in zip(params_list, out):
+            np.multiply(unit, params.get('sigma', 25), out=noisy)
+            noisy += base
+            np.clip(noisy, 0, 255, out=noisy)
+            dst[...] = noisy  # Cast ke uint8 memotong seperti astype
+
+    @staticmethod
+    def _batch_rotation(image, params_list, out, rngs):
+        h, w = image.shape[:2]
+        center = (w // 2, h // 2)
+        for params, dst in zip(params_list, out):
+            M = cv2.getRotationMatrix2D(center, params.get('angle', 5), 1.0)
+            cv2.warpAffine(image, M, (w, h), dst=dst, borderMode=cv2.BORDER_CONSTANT, borderValue=(0, 0, 0))
+
+    @staticmethod
+    def _batch_downscale_upscale(image, params_list, out, rngs):
+        h, w = image.shape[:2]
+        for params, dst in zip(params_list, out):
+            factor = params.get('downscale_factor', 0.7)
+            downscaled = cv2.resize(image, (int(w * factor), int(h * factor)), interpolation=cv2.INTER_AREA)
+            cv2.resize(downscaled, (w, h), dst=dst, interpolation=cv2.INTER_LINEAR)
+
+    @staticmethod
+    def _batch_gaussian_blur(image, params_list, out, rngs):
+        for params, dst in zip(params_list, out):
+            k_w, k_h = (k if k % 2 != 0 else k + 1 for k in params.get('kernel_size', (5, 5)))
+            cv2.GaussianBlur(image, (k_w, k_h), 0, dst=dst)
     
     
     
@@ -228,25 +879,47 @@ ATTACK_CONFIGURATIONS = [
     {'name': 'HistEq', 'label': 'Hist. Equalize'},
 ]
 
+# Contoh rantai serangan seperti saluran distribusi nyata (bisa digabung dengan
+# ATTACK_CONFIGURATIONS); pada mode batch prefiks yang sama dihitung sekali
+ATTACK_CHAIN_CONFIGURATIONS = [
+    {'name': CHAIN_ATTACK, 'label': 'Scale (80%) → JPEG (Q=70)',
+     'steps': [{'name': 'Scale', 'downscale_factor': 0.8}, {'name': 'JPEG', 'quality': 70}]},
+    {'name': CHAIN_ATTACK, 'label': 'Scale (80%) → JPEG (Q=70) → Sharpen',
+     'steps': [{'name': 'Scale', 'downscale_factor': 0.8}, {'name': 'JPEG', 'quality': 70}, {'name': 'Sharpen'}]},
+    {'name': CHAIN_ATTACK, 'label': 'Scale (50%) → JPEG (Q=50)',
+     'steps': [{'name': 'Scale', 'downscale_factor': 0.5}, {'name': 'JPEG', 'quality': 50}]},
+    {'name': CHAIN_ATTACK, 'label': 'JPEG (Q=90) → JPEG (Q=70)',
+     'steps': [{'name': 'JPEG', 'quality': 90}, {'name': 'JPEG', 'quality': 70}]},
+]
+
+# Rentang kekuatan per keluarga untuk find_breaking_points:
+# (parameter, nilai terlemah, nilai terkuat, jarak antar level)
+ATTACK_STRENGTH_RANGES = {
+    'JPEG': ('quality', 100, 5, 5),
+    'Gaussian_Noise': ('sigma', 0.0, 64.0, 1.0),
+    'SP_Noise': ('density', 0.0, 0.32, 0.005),
+    'Crop': ('crop_percent', 0, 90, 2),
+    'Rotate': ('angle', 0.0, 90.0, 1.0),
+    'Scale': ('downscale_factor', 1.0, 0.02, 0.02),
+    'Blur': ('kernel_size', 1, 63, 2),
+}
+
 def calculate_ber(original_text: str, extracted_text: str) -> float:
     """Calculates the Bit Error Rate between two text strings."""
     if not extracted_text:
         return 1.0  # Maximum error if extraction fails
 
-    original_binary = message_to_binary(original_text)
-    extracted_binary = message_to_binary(extracted_text)
+    original_bits = message_to_bit_array(original_text)
+    extracted_bits = message_to_bit_array(extracted_text)
 
-    total_bits = len(original_binary)
+    total_bits = len(original_bits)
     if total_bits == 0:
         return 0.0
 
-    errors = 0
-    compare_len = min(len(original_binary), len(extracted_binary))
-    for i in range(compare_len):
-        if original_binary[i] != extracted_binary[i]:
-            errors += 1
+    compare_len = min(len(original_bits), len(extracted_bits))
+    errors = int(np.count_nonzero(original_bits[:compare_len] ^ extracted_bits[:compare_len]))
 
     # Add errors for any difference in length
-    errors += abs(len(original_binary) - len(extracted_binary))
+    errors += abs(len(original_bits) - len(extracted_bits))
 
-    return errors / total_bits
\ No newline at end of file
+    return errors / total_bits
@@ -0,0 +1,210 @@
+import cv2
+import numpy as np
+
+# Rows per SSIM tile (plus a halo of win_size // 2 rows on each side)
+SSIM_TILE_ROWS = 512
+# Gaussian window of the reference SSIM: sigma 1.5, 11 taps
+SSIM_GAUSSIAN_SIGMA = 1.5
+SSIM_GAUSSIAN_WIN = 11
+# ITU-R BT.601 luma weights for RGB input
+LUMA_WEIGHTS = np.array([0.299, 0.587, 0.114], dtype=np.float32)
+
+
+def to_luma(image: np.ndarray) -> np.ndarray:
+    """(H, W) float32 BT.601 luma of an RGB image; 2-D input is returned as float32."""
+    if image.ndim == 2:
+        return image.astype(np.float32)
+    return image[..., :3].astype(np.float32) @ LUMA_WEIGHTS
+
+
+def downsample_factor(shape: tuple) -> int:
+    """Automatic downsample factor of the reference SSIM: round(min(H, W) / 256), at least 1."""
+    return max(1, int(round(min(shape[:2]) / 256)))
+
+
+def resolve_downsample(shape: tuple, downsample_by: int | bool) -> int:
+    """Downsample factor for an image of `shape`: True = automatic, otherwise the given factor (at least 1)."""
+    return downsample_factor(shape) if downsample_by is True else max(1, int(downsample_by))
+
+
+def downsample(plane: np.ndarray, factor: int) -> np.ndarray:
+    """f x f mean filter (symmetric border) followed by taking every f-th sample, as in the reference SSIM."""
+    if factor <= 1:
+        return plane
+    anchor = ((factor - 1) // 2, (factor - 1) // 2)
+    blurred = cv2.boxFilter(plane.astype(np.float32), -1, (factor, factor), anchor=anchor,
+                            normalize=True, borderType=cv2.BORDER_REFLECT)
+    return blurred[::factor, ::factor]
+
+
+class SSIMConfig:
+    """Window and constants of one SSIM variant (shared by the plane and reference helpers)."""
+    def __init__(self, data_range: float = 255.0, gaussian: bool = False, win_size: int | None = None,
+                 sample_covariance: bool = True, k1: float = 0.01, k2: float = 0.03):
+        """
+        Args:
+            data_range (float): Value range of the images (255 for uint8).
+            gaussian (bool): Gaussian window (sigma 1.5) instead of a uniform one.
+            win_size (int | None): Odd window size; None = 7 (uniform) or 11 (Gaussian).
+            sample_covariance (bool): Normalize (co)variances by N-1 instead of N.
+            k1, k2 (float): Stabilizing constants.
+        """
+        self.win_size = int(win_size or (SSIM_GAUSSIAN_WIN if gaussian else 7))
+        if self.win_size < 3 or self.win_size % 2 == 0:
+            raise ValueError("win_size must be odd and at least 3.")
+        self.gaussian = gaussian
+        self.pad = self.win_size // 2
+        samples = self.win_size ** 2
+        self.cov_norm = samples / (samples - 1) if sample_covariance else 1.0
+        self.c1 = (k1 * data_range) ** 2
+        self.c2 = (k2 * data_range) ** 2
+        # Second moments are taken around the middle of the range to limit float32 cancellation
+        self.offset = np.float32(data_range / 2)
+
+    def filter(self, plane: np.ndarray) -> np.ndarray:
+        """Local mean over the window, with a symmetric (reflect) border."""
+        size = (self.win_size, self.win_size)
+        if self.gaussian:
+            return cv2.GaussianBlur(plane, size, SSIM_GAUSSIAN_SIGMA, borderType=cv2.BORDER_REFLECT)
+        return cv2.boxFilter(plane, -1, size, normalize=True, borderType=cv2.BORDER_REFLECT)
+
+    def moments(self, plane: np.ndarray) -> tuple:
+        """(centered local mean, local variance) of a float32 plane already shifted by `offset`."""
+        mu = self.filter(plane)
+        var = self.filter(plane * plane)
+        var -= mu * mu
+        var *= self.cov_norm
+        return mu, var
+
+    def ssim_map(self, x: np.ndarray, y: np.ndarray, mu_x: np.ndarray, var_x: np.ndarray) -> np.ndarray:
+        """SSIM map from the reference moments and the two (offset-shifted) planes."""
+        mu_y, var_y = self.moments(y)
+        cov = self.filter(x * y)
+        cov -= mu_x * mu_y
+        cov *= self.cov_norm
+        # Means back in the original range for the luminance term
+        mu_x = mu_x + self.offset
+        mu_y += self.offset
+        numerator = (2 * mu_x * mu_y + self.c1) * (2 * cov + self.c2)
+        denominator = (mu_x * mu_x + mu_y * mu_y + self.c1) * (var_x + var_y + self.c2)
+        return numerator / denominator
+
+
+def _halo_tiles(height: int, pad: int, tile_rows: int, row_ranges: list) -> list:
+    """(r0, r1, a, b): output rows [r0, r1) within `row_ranges` and the input rows [a, b) they need."""
+    tile_rows = max(1, int(tile_rows))
+    tiles = []
+    for lo, hi in row_ranges:
+        for r0 in range(lo, hi, tile_rows):
+            r1 = min(r0 + tile_rows, hi)
+            tiles.append((r0, r1, max(0, r0 - pad), min(height, r1 + pad)))
+    return tiles
+
+
+def ssim_plane_sum(cfg: SSIMConfig, x_plane: np.ndarray, y_plane: np.ndarray, tile_rows: int = SSIM_TILE_ROWS,
+                   reference: tuple | None = None, region=None) -> tuple:
+    """
+    Sum and count of the SSIM map over the valid region (border of win_size // 2
+    cropped, as skimage does) of one 2-D plane pair, one row tile at a time.
+
+    Args:
+        reference (tuple | None): Precomputed full-plane (mu_x, var_x) of x_plane
+                                  (see metrics.impercability.ReferenceImageStats).
+        region (ChangedRegion | None): Rows (in plane coordinates) outside which
+                                       the planes are identical. Only windows
+                                       overlapping them are evaluated; every
+                                       other window has SSIM exactly 1.
+
+    Returns:
+        tuple: (sum (float), count (int)).
+    """
+    height, width = x_plane.shape
+    pad = cfg.pad
+    if min(height, width) < cfg.win_size:
+        raise ValueError(f"Image ({height}x{width}) is smaller than the SSIM window ({cfg.win_size}).")
+    if region is None:
+        row_ranges = [(pad, height - pad)]
+    else:
+        row_ranges = region.dilated(pad, pad, height - pad)
+    skipped_rows = height - 2 * pad - sum(r1 - r0 for r0, r1 in row_ranges)
+    total = float(skipped_rows * (width - 2 * pad))
+    for r0, r1, a, b in _halo_tiles(height, pad, tile_rows, row_ranges):
+        x = x_plane[a:b].astype(np.float32) - cfg.offset
+        y = y_plane[a:b].astype(np.float32) - cfg.offset
+        if reference is None:
+            mu_x, var_x = cfg.moments(x)
+        else:
+            mu_x, var_x = reference[0][a:b], reference[1][a:b]
+        s = cfg.ssim_map(x, y, mu_x, var_x)
+        total += float(s[r0 - a:r1 - a, pad:width - pad].sum(dtype=np.float64))
+    return total, (height - 2 * pad) * (width - 2 * pad)
+
+
+def prepare_planes(image: np.ndarray, luma: bool = False, downsample_by: int = 1) -> list:
+    """
+    The 2-D planes SSIM is computed on: each channel (or the luma plane),
+    downsampled first when downsample_by > 1. Undownsampled channels stay
+    in the input dtype and are converted tile by tile.
+    """
+    if luma:
+        planes = [to_luma(image)]
+    elif image.ndim == 2:
+        planes = [image]
+    else:
+        planes = [image[..., channel] for channel in range(image.shape[2])]
+    return [downsample(plane, downsample_by) for plane in planes]
+
+
+def mean_ssim(cfg: SSIMConfig, x_planes: list, y_planes: list, tile_rows: int = SSIM_TILE_ROWS,
+              references: list | None = None, region=None, downsample_by: int = 1) -> float:
+    """
+    Mean over planes of each plane's mean SSIM (skimage's channel averaging).
+    `region` is in image rows; it is mapped to the planes' rows when they
+    were downsampled by `downsample_by`.
+    """
+    if region is not None and downsample_by > 1:
+        region = region.downsampled(downsample_by, x_planes[0].shape[0])
+    means = []
+    for index, (x, y) in enumerate(zip(x_planes, y_planes)):
+        reference = None if references is None else references[index]
+        total, count = ssim_plane_sum(cfg, x, y, tile_rows, reference, region)
+        means.append(total / count)
+    return float(np.mean(means))
+
+
+def structural_similarity(original_image: np.ndarray, stego_image: np.ndarray, data_range: float = 255.0,
+                          gaussian: bool = False, win_size: int | None = None, sample_covariance: bool = True,
+                          luma: bool = False, downsample_by: int | bool = 1,
+                          tile_rows: int = SSIM_TILE_ROWS, region=None) -> float:
+    """
+    Mean SSIM between two images, computed in float32 with OpenCV filters.
+
+    With the defaults it matches skimage.metrics.structural_similarity
+    (uniform 7x7 window, sample covariance, channel_axis=2) to about 1e-6;
+    gaussian=True with sample_covariance=False gives the reference
+    (Wang et al.) variant.
+
+    Args:
+        original_image (np.ndarray): (H, W) or (H, W, C) reference image.
+        stego_image (np.ndarray): Image of the same shape.
+        data_range (float): Value range of the images.
+        gaussian (bool): Gaussian (sigma 1.5, 11x11) window instead of uniform.
+        win_size (int | None): Window size override.
+        sample_covariance (bool): N-1 normalization of (co)variances.
+        luma (bool): Compare only the BT.601 luma plane instead of every channel.
+        downsample_by (int | bool): Mean-filter and decimate by this factor first;
+                                    True = automatic factor round(min(H, W) / 256).
+        tile_rows (int): Rows per tile; bounds memory to a few float32 tiles.
+        region (ChangedRegion | None): Rows outside which the images are identical
+                                       (e.g. a spatial method's last_changed_region);
+                                       only windows overlapping them are evaluated.
+
+    Returns:
+        float: Mean SSIM (averaged over channels).
+    """
+    if original_image.shape != stego_image.shape:
+        raise ValueError(f"Image shapes differ: {original_image.shape} vs {stego_image.shape}.")
+    cfg = SSIMConfig(data_range, gaussian, win_size, sample_covariance)
+    factor = resolve_downsample(original_image.shape, downsample_by)
+    return mean_ssim(cfg, prepare_planes(original_image, luma, factor), prepare_planes(stego_image, luma, factor),
+                     tile_rows, region=region, downsample_by=factor)
@@ -0,0 +1,63 @@
+import copy
+
+import numpy as np
+import cv2
+import pytest
+
+from constants import (METHOD_DCT_EMD, METHOD_DCT_LSB, METHOD_DCT_PVD, METHOD_DWT_PVD, METHOD_EMD,
+                       METHOD_FFT_LSB)
+from helpers.plausibility import clean_text_ratio, strip_foreign_tail
+from methods.auto_detect import AutoDetector
+from methods.registry import METHOD_REGISTRY, create_method
+
+MESSAGE = "The quick brown fox jumps over the lazy dog 123456"
+SENTENCE = "Meet me at the old bridge at seven pm sharp."
+SHORT_MESSAGE = "Hello there, general Kenobi 42"
+
+
+def _stego(method: str, message: str = MESSAGE, params: dict = None) -> tuple:
+    cover = np.random.default_rng(0).integers(0, 256, (256, 256, 3), dtype=np.uint8)
+    cover = cv2.GaussianBlur(cover, (5, 5), 0)
+    return create_method(method, params or METHOD_REGISTRY[method][1]).embed(cover, message)
+
+
+@pytest.mark.parametrize("method", [METHOD_DCT_LSB, METHOD_DWT_PVD])
+@pytest.mark.parametrize("workers", [1, 2])
+def test_detects_hybrid_with_aligned_halves(method, workers):
+    stego, bit_lengths = _stego(method)
+    best = AutoDetector(workers=workers).detect(stego)[0]
+    assert best['method'] == method
+    assert best['message'] == MESSAGE
+    assert best['bit_length'] == bit_lengths
+
+
+def test_overrun_prefix_is_trimmed_to_shared_leading_text():
+    hits = [{'method': 'm', 'params': {}, 'message': MESSAGE + "w", 'bit_length': 408, 'score': 1.0,
+             'verified': False},
+            {'method': 'm', 'params': {}, 'message': MESSAGE, 'bit_length': 400, 'score': 1.0,
+             'verified': False}]
+    assert [hit['message'] for hit in AutoDetector._trim_overruns(hits)] == [MESSAGE, MESSAGE]
+
+
+@pytest.mark.parametrize("method", [METHOD_DCT_LSB, METHOD_DCT_PVD, METHOD_DCT_EMD])
+def test_neighbouring_quant_factors_outvote_near_miss(method):
+    params = copy.deepcopy(METHOD_REGISTRY[method][1])
+    params['dct_params']['quant_factor'] = 70
+    stego, _ = _stego(method, SENTENCE, params)
+    best = AutoDetector(workers=1).detect(stego)[0]
+    assert (best['method'], best['message']) == (method, SENTENCE)
+
+
+def test_foreign_junk_tail_is_not_reported():
+    stego, bit_length = _stego(METHOD_EMD, SENTENCE)
+    best = AutoDetector(workers=1).detect(stego)[0]
+    assert (best['method'], best['message'], best['bit_length']) == (METHOD_EMD, SENTENCE, bit_length)
+    assert clean_text_ratio(SENTENCE + "\ucb00") < 1.0
+    assert strip_foreign_tail(SENTENCE + "\ucb00") == SENTENCE
+
+
+@pytest.mark.parametrize("method", [METHOD_DCT_LSB, METHOD_DCT_PVD, METHOD_DWT_PVD, METHOD_FFT_LSB])
+def test_short_hybrid_message_is_detected(method):
+    stego, bit_lengths = _stego(method, SHORT_MESSAGE)
+    best = AutoDetector(workers=1).detect(stego)[0]
+    assert (best['method'], best['message'], best['bit_length']) == (method, SHORT_MESSAGE, bit_lengths)
@@ -0,0 +1,13 @@
+import numpy as np
+import pytest
+
+from constants import METHOD_LSB
+from methods.registry import compile_plan, create_method
+
+
+def test_plan_rejects_instance_with_other_parameters():
+    cover = np.zeros((32, 32, 3), dtype=np.uint8)
+    plan = compile_plan(METHOD_LSB, {'position_key': None}, cover.shape)
+    create_method(METHOD_LSB, {'position_key': None}).embed(cover, "hi", plan=plan)
+    with pytest.raises(ValueError):
+        create_method(METHOD_LSB, {'position_key': 1234}).embed(cover, "hi", plan=plan)
@@ -375,7 +375,8 @@ def draw_dwt_emd_extract_tab():
                             results = tester.run_all_tests(
                                 stego_image=stego_image_rgb,
                                 attack_configurations=ATTACK_CONFIGURATIONS,
-                                bit_lengths=bit_lengths_tuple
+                                bit_lengths=bit_lengths_tuple,
+                                retention='thumbnail'
                             )
                             ber_data = []
                             image_results = []
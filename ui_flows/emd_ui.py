@@ -224,7 +224,8 @@ def draw_emd_extract_tab():
                             results = tester.run_all_tests(
                                 stego_image=stego_image_rgb,
                                 attack_configurations=ATTACK_CONFIGURATIONS,
-                                bit_lengths=message_bit_length_extract
+                                bit_lengths=message_bit_length_extract,
+                                retention='thumbnail'
                             )
                             ber_data = []
                             image_results = []
@@ -323,7 +323,8 @@ def draw_fft_extract_tab():
                             results = tester.run_all_tests(
                                 stego_image=stego_image_rgb,
                                 attack_configurations=ATTACK_CONFIGURATIONS,
-                                bit_lengths=bit_length_to_use 
+                                bit_lengths=bit_length_to_use,
+                                retention='thumbnail'
                             )
                             # --- AKHIR PERUBAHAN ---
                             
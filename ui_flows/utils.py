@@ -3,6 +3,7 @@
 import streamlit as st
 from helpers.message_generator import create_pattern_padded_message
 from constants import DEFAULT_MESSAGE
+from metrics.robustness import LazyAttackImage, THUMBNAIL_SIZE
 
 def generate_dummy_message_callback(target_bit_len_key, message_key):
     """
@@ -30,20 +31,26 @@ def reset_embed_state(method_key_prefix):
     if params_key in st.session_state:
         st.session_state[params_key] = None
         
-def make_image_grid(image_results: list, num_columns: int = 4):
+def make_image_grid(image_results: list, num_columns: int = 4, thumbnail_size: int = THUMBNAIL_SIZE):
     """
     Menghasilkan grid gambar yang responsif dengan caption.
     
     Args:
         image_results (list): Sebuah list dari tuple, di mana setiap tuple adalah
-                              (label, ber, img_array).
+                              (label, ber, img), dengan img berupa array RGB,
+                              thumbnail JPEG (bytes) atau LazyAttackImage
+                              (lihat retention di RobustnessTester.run_all_tests).
         num_columns (int): Jumlah kolom untuk grid.
+        thumbnail_size (int): Ukuran thumbnail untuk LazyAttackImage.
     """
     # Membuat kolom
     cols = st.columns(num_columns)
     
     # Iterasi melalui hasil dan letakkan setiap gambar
     for index, (label, ber, img) in enumerate(image_results):
+        if isinstance(img, LazyAttackImage):
+            # Dibuat ulang lalu dikirim sebagai thumbnail (di-cache), bukan gambar penuh
+            img = img.thumbnail(thumbnail_size)
         if img is not None:
             # Tentukan di kolom mana gambar akan ditempatkan
             col_index = index % num_columns